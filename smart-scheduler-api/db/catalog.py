@@ -0,0 +1,262 @@
+# smart-scheduler-api/db/catalog.py
+import asyncio
+import os
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from db.models import Course, CatalogVersion
+from genetic_algorithm.time_model import normalize_days
+
+# Phiên bản danh mục môn học lưu trong MongoDB (collection catalog_versions, 1 document cho mỗi học kỳ và "*" cho
+# toàn bộ): tăng mỗi khi danh mục thay đổi (API admin, scripts/), nên mọi worker đều thấy.
+# Dùng làm 1 phần khóa cache để kết quả cũ tự hết hiệu lực.
+ALL_SEMESTERS = "*"
+# Đọc lại phiên bản trên MongoDB sau tối đa bao nhiêu giây (thay đổi từ worker khác được thấy sau chừng ấy giây)
+VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", 5))
+
+# Bản sao trong process của phiên bản đọc/ghi gần nhất và thời điểm đọc (time.monotonic)
+_known_versions: Dict[str, int] = {}
+_checked_at: Dict[str, float] = {}
+
+
+def _version_key(semester: Optional[str]) -> str:
+    return semester or ALL_SEMESTERS
+
+
+async def fetch_catalog_version(semester: Optional[str] = None) -> int:
+    """Đọc phiên bản trên MongoDB (của học kỳ và của toàn bộ danh mục), cập nhật bản sao trong process"""
+    keys = list({ALL_SEMESTERS, _version_key(semester)})
+    documents = await CatalogVersion.find({"_id": {"$in": keys}}).to_list()
+    found = {document.id: document.version for document in documents}
+    now = time.monotonic()
+    for key in keys:
+        _known_versions[key] = found.get(key, 0)
+        _checked_at[key] = now
+    return _known_versions[_version_key(semester)]
+
+
+async def refresh_catalog_version(semester: Optional[str] = None, max_age: Optional[float] = None) -> int:
+    """Phiên bản hiện tại, chỉ đọc lại từ MongoDB nếu bản sao trong process cũ hơn max_age giây"""
+    if version_is_fresh(semester, max_age):
+        return get_catalog_version(semester)
+    return await fetch_catalog_version(semester)
+
+
+def version_is_fresh(semester: Optional[str] = None, max_age: Optional[float] = None) -> bool:
+    max_age = VERSION_CHECK_SECONDS if max_age is None else max_age
+    checked_at = _checked_at.get(_version_key(semester))
+    return checked_at is not None and time.monotonic() - checked_at < max_age
+
+
+async def bump_catalog_version(semester: Optional[str] = None) -> int:
+    """Tăng phiên bản danh mục (của 1 học kỳ và của toàn bộ) trên MongoDB, trả về phiên bản toàn bộ"""
+    for key in [ALL_SEMESTERS] + ([semester] if semester else []):
+        await CatalogVersion.find_one({"_id": key}).update(
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now()}}, upsert=True
+        )
+    await fetch_catalog_version(semester)
+    return get_catalog_version()
+
+
+def get_catalog_version(semester: Optional[str] = None) -> int:
+    """Phiên bản đọc được gần nhất (không truy vấn DB); semester=None nghĩa là toàn bộ danh mục"""
+    return _known_versions.get(_version_key(semester), 0)
+
+
+def original_course_code(code: Optional[str]) -> str:
+    """Mã môn gốc của 1 nhóm lớp: 'INT1234-G02' -> 'INT1234'"""
+    code = code or ""
+    return code.split("-G")[0] if "-G" in code else code
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class CatalogSection:
+    """1 nhóm lớp trong snapshot: Course gốc + ngày/giờ/thứ đã chuẩn hóa sẵn (chỉ đọc)"""
+
+    __slots__ = ("course", "code", "original_code", "start_date", "end_date", "start_time", "end_time", "day", "days")
+
+    def __init__(self, course: Course):
+        metadata = course.metadata or {}
+        self.course = course
+        self.code = course.code
+        self.original_code = metadata.get("original_code") or original_course_code(course.code)
+        # None nếu không có/không đọc được ngày (nhóm lớp đó không dùng làm nhóm thay thế)
+        self.start_date = _parse_date(metadata.get("start_date"))
+        self.end_date = _parse_date(metadata.get("end_date"))
+        self.start_time = metadata.get("start_time", "07:00")
+        self.end_time = metadata.get("end_time", "11:30")
+        self.day = metadata.get("day")
+        self.days = normalize_days(self.day)
+
+
+class CatalogSnapshot:
+    """Danh mục 1 học kỳ tại 1 phiên bản: mọi môn (theo mã) và các nhóm lớp gom theo metadata.original_code"""
+
+    def __init__(self, semester: Optional[str], version: int, courses: List[Course]):
+        self.semester = semester
+        self.version = version
+        self.loaded_at = datetime.now()
+        self.loaded_monotonic = time.monotonic()
+        # Sắp theo (mã, id): thứ tự toàn phần để phân trang theo khóa (cùng mã có thể ở nhiều học kỳ)
+        self.courses: Tuple[Course, ...] = tuple(sorted(courses, key=self.sort_key))
+        self._keys = [self.sort_key(course) for course in self.courses]
+        # Danh sách đã sắp của từng ngành (lọc theo ngành không phải quét qua môn ngành khác)
+        by_major: Dict[Optional[str], List[Course]] = {}
+        for course in self.courses:
+            by_major.setdefault(course.major, []).append(course)
+        self._by_major = {
+            major: (items, [self.sort_key(course) for course in items]) for major, items in by_major.items()
+        }
+        self.by_code: Dict[str, CatalogSection] = {}
+        sections: Dict[str, List[CatalogSection]] = {}
+        for course in self.courses:
+            section = CatalogSection(course)
+            self.by_code[course.code] = section
+            # Giống truy vấn cũ theo metadata.original_code: môn không có trường này không thuộc nhóm nào
+            if course.metadata and course.metadata.get("original_code"):
+                sections.setdefault(course.metadata["original_code"], []).append(section)
+        self.sections: Dict[str, Tuple[CatalogSection, ...]] = {
+            code: tuple(items) for code, items in sections.items()
+        }
+
+    @staticmethod
+    def sort_key(course: Course) -> Tuple[str, str]:
+        return course.code, str(course.id)
+
+    def sessions(self, original_code: str) -> Tuple[CatalogSection, ...]:
+        return self.sections.get(original_code, ())
+
+    def count(self, major: Optional[str] = None) -> int:
+        """Số môn (của ngành nếu có)"""
+        return len(self._by_major.get(major, ((), []))[0]) if major else len(self.courses)
+
+    def page(self, after: Optional[Tuple[str, str]], limit: int, major: Optional[str] = None) -> List[Course]:
+        """Tối đa limit môn (của ngành nếu có) đứng sau khóa after, tìm vị trí bắt đầu bằng bisect"""
+        courses, keys = self._by_major.get(major, ((), [])) if major else (self.courses, self._keys)
+        start = bisect_right(keys, tuple(after)) if after else 0
+        return list(courses[start:start + limit])
+
+
+# Số học kỳ giữ trong bộ nhớ (thường chỉ 1-2 học kỳ đang xếp lịch được đọc nhiều)
+MAX_RESIDENT_SEMESTERS = 4
+# Tuổi tối đa của snapshot: nạp lại kể cả khi phiên bản không đổi (sửa thẳng collection courses mà không tăng phiên bản)
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE_SECONDS", 600))
+
+
+class CatalogSnapshotStore:
+    """
+    Snapshot danh mục theo học kỳ trong process. Snapshot không bao giờ bị sửa, chỉ bị thay bằng snapshot mới:
+    người đọc lấy snapshot hiện tại không cần khóa. Phiên bản trên MongoDB được đọc lại sau mỗi check_seconds giây;
+    snapshot cũ hơn phiên bản đó (admin/worker khác/scripts vừa ghi) hoặc quá max_age_seconds giây được nạp lại
+    lười ở lần đọc kế tiếp. Giữ tối đa max_semesters học kỳ (bỏ học kỳ ít dùng nhất).
+    semester=None là toàn bộ danh mục (theo phiên bản chung).
+    """
+
+    def __init__(self, max_semesters: int = MAX_RESIDENT_SEMESTERS, check_seconds: Optional[float] = None,
+                 max_age_seconds: Optional[float] = None):
+        self.max_semesters = max_semesters
+        self.check_seconds = VERSION_CHECK_SECONDS if check_seconds is None else check_seconds
+        self.max_age_seconds = SNAPSHOT_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        self._snapshots: "OrderedDict[Optional[str], CatalogSnapshot]" = OrderedDict()
+        self._loading: Dict[Tuple[Optional[str], int], asyncio.Future] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def _valid(self, snapshot: Optional[CatalogSnapshot], version: int) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == version
+            and time.monotonic() - snapshot.loaded_monotonic < self.max_age_seconds
+        )
+
+    def current(self, semester: Optional[str] = None) -> Optional[CatalogSnapshot]:
+        """Snapshot dùng được ngay (không truy vấn DB), None nếu cần đọc lại phiên bản hoặc nạp lại"""
+        snapshot = self._snapshots.get(semester)
+        if version_is_fresh(semester, self.check_seconds) and self._valid(snapshot, get_catalog_version(semester)):
+            return snapshot
+        return None
+
+    async def get(self, semester: Optional[str] = None) -> CatalogSnapshot:
+        version = await refresh_catalog_version(semester, self.check_seconds)
+        snapshot = self._snapshots.get(semester)
+        if self._valid(snapshot, version):
+            self.hits += 1
+            self._snapshots.move_to_end(semester)
+            return snapshot
+
+        # Nhiều request cùng thấy snapshot cũ chỉ nạp lại 1 lần
+        key = (semester, version)
+        future = self._loading.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(semester, version))
+            self._loading[key] = future
+            future.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _load(self, semester: Optional[str], version: int) -> CatalogSnapshot:
+        self.loads += 1
+        query = {"semester": semester} if semester else {}
+        courses = await Course.find(query).to_list()
+        # Gắn phiên bản lúc bắt đầu nạp: nếu có ghi trong lúc nạp, lần đọc sau sẽ nạp lại
+        snapshot = CatalogSnapshot(semester, version, courses)
+        resident = self._snapshots.get(semester)
+        if resident is None or resident.version <= version:
+            self._snapshots[semester] = snapshot
+            self._snapshots.move_to_end(semester)
+            while len(self._snapshots) > self.max_semesters:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def stats(self) -> dict:
+        return {
+            "resident_semesters": [semester for semester in self._snapshots],
+            "max_semesters": self.max_semesters,
+            "check_seconds": self.check_seconds,
+            "max_age_seconds": self.max_age_seconds,
+            "loads": self.loads,
+            "hits": self.hits,
+        }
+
+
+catalog_snapshots = CatalogSnapshotStore()
+
+
+class SectionIndex:
+    """
+    Chỉ mục nhóm lớp trong 1 request (hoặc 1 batch nhiều sinh viên): prefetch lấy snapshot danh mục của
+    học kỳ (đọc DB chỉ khi cần kiểm tra phiên bản hoặc snapshot đã cũ), mọi tra cứu nhóm thay thế (sessions, by_code) sau đó chạy
+    trong bộ nhớ và cùng 1 phiên bản danh mục suốt request.
+    """
+
+    def __init__(self, store: Optional[CatalogSnapshotStore] = None):
+        self._store = store or catalog_snapshots
+        self._snapshots: Dict[Optional[str], CatalogSnapshot] = {}
+        self.queries = 0  # Số học kỳ phải đọc DB (kiểm tra phiên bản hoặc nạp lại)
+
+    async def prefetch(self, semester: Optional[str] = None):
+        """Lấy snapshot học kỳ (1 lần cho cả request)"""
+        if semester in self._snapshots:
+            return
+        if self._store.current(semester) is None:
+            self.queries += 1
+        self._snapshots[semester] = await self._store.get(semester)
+
+    def sessions(self, original_code: str, semester: Optional[str] = None) -> Tuple[CatalogSection, ...]:
+        """Các nhóm/lớp của 1 môn (phải prefetch trước)"""
+        snapshot = self._snapshots.get(semester)
+        return snapshot.sessions(original_code) if snapshot else ()
+
+    def by_code(self, code: str) -> Optional[CatalogSection]:
+        for snapshot in self._snapshots.values():
+            if code in snapshot.by_code:
+                return snapshot.by_code[code]
+        return None
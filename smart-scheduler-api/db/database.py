@@ -5,7 +5,8 @@ from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure
-from .models import User, Schedule, Course, ChatHistory, OTP  # Đảm bảo import cả User, Schedule, Course, ChatHistory, OTP
+from .models import User, Schedule, Course, CatalogVersion, ChatHistory, OTP  # Đảm bảo import cả User, Schedule, Course, ChatHistory, OTP
+from .indexes import verify_indexes
 
 # Global client để tái sử dụng
 _client = None
@@ -31,6 +32,10 @@ def load_env_file():
 # Load .env khi import module
 load_env_file()
 
+def get_database():
+    """Database đang dùng (sau khi init_db)"""
+    return _client.smart_scheduler_db
+
 async def init_db():
     global _client
     
@@ -76,11 +81,17 @@ async def init_db():
                 User,
                 Schedule,
                 Course,
+                CatalogVersion,
                 ChatHistory,
                 OTP
-            ]
+            ],
+            skip_indexes=True,  # Index được tạo/kiểm tra từng cái trong verify_indexes
         )
         print("✓ Khởi tạo Beanie hoàn tất.")
+
+        # Tạo index còn thiếu; index lỗi (VD dữ liệu cũ bị trùng) chỉ cảnh báo, không chặn khởi động
+        await verify_indexes(database)
+        print("✓ Kiểm tra index hoàn tất.")
         
     except (ServerSelectionTimeoutError, ConnectionFailure) as e:
         print("=" * 60)
@@ -0,0 +1,51 @@
+# smart-scheduler-api/db/indexes.py
+"""
+Kiểm tra các index khai báo trong Settings.indexes của model đã có trên MongoDB.
+init_db gọi init_beanie với skip_indexes=True rồi gọi verify_indexes: index còn thiếu được tạo từng cái một,
+1 index lỗi (VD dữ liệu cũ trùng username) chỉ được báo cáo, không làm hỏng các index khác.
+"""
+from typing import Dict, List
+
+from pymongo.errors import OperationFailure
+
+from .models import User, Schedule, Course, CatalogVersion, ChatHistory, OTP
+
+DOCUMENT_MODELS = [User, Schedule, Course, CatalogVersion, ChatHistory, OTP]
+
+
+def declared_indexes(model) -> List:
+    """Các IndexModel khai báo trong Settings.indexes của model"""
+    return list(getattr(model.Settings, "indexes", None) or [])
+
+
+async def verify_indexes(database) -> Dict[str, dict]:
+    """
+    So index khai báo với index thật của từng collection.
+    Trả về {collection: {"present": [...], "created": [...], "missing": [...], "errors": {...}}}.
+    """
+    report = {}
+    for model in DOCUMENT_MODELS:
+        collection_name = model.Settings.name
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        result = {"present": [], "created": [], "missing": [], "errors": {}}
+        for index in declared_indexes(model):
+            name = index.document["name"]
+            if name in existing:
+                result["present"].append(name)
+                continue
+            try:
+                await collection.create_indexes([index])
+                result["created"].append(name)
+            except OperationFailure as e:
+                result["missing"].append(name)
+                result["errors"][name] = str(e)
+        report[collection_name] = result
+
+        if result["missing"]:
+            print(f"⚠️ Collection {collection_name} thiếu index: {', '.join(result['missing'])}")
+            for name, error in result["errors"].items():
+                print(f"   - {name}: {error}")
+        elif result["created"]:
+            print(f"✓ Collection {collection_name}: đã tạo index {', '.join(result['created'])}")
+    return report
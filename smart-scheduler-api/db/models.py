@@ -1,6 +1,7 @@
 # smart-scheduler-api/db/models.py
 from beanie import Document
 from pydantic import Field, EmailStr
+from pymongo import IndexModel, ASCENDING
 from uuid import UUID, uuid4
 from typing import Optional, List, Dict, Any
 from datetime import datetime # Thêm import này
@@ -20,6 +21,16 @@ class User(Document):
     
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            # email/phone không bắt buộc: chỉ unique với các user có giá trị (bỏ qua null)
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True,
+                       partialFilterExpression={"email": {"$type": "string"}}),
+            IndexModel([("phone", ASCENDING)], name="phone_unique", unique=True,
+                       partialFilterExpression={"phone": {"$type": "string"}}),
+            # Danh sách user (admin), phân trang theo (created_at, _id)
+            IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+        ]
 
 # =================
 # Model Lịch Học
@@ -31,9 +42,13 @@ class Schedule(Document):
     
     schedule_data: List[Dict[str, Any]]
     cost: float
+    engine: Optional[str] = None  # Engine đã giải: fixed, exact, annealing, tabu, ga
     
     class Settings:
         name = "schedules"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING)], name="user_created"),
+        ]
 
 # =================
 # Model Môn học
@@ -52,6 +67,25 @@ class Course(Document):
     
     class Settings:
         name = "courses"
+        indexes = [
+            # Snapshot danh mục theo học kỳ, kiểm tra môn đã tồn tại khi upload/thêm môn
+            IndexModel([("semester", ASCENDING), ("code", ASCENDING)], name="semester_code"),
+            IndexModel([("semester", ASCENDING), ("major", ASCENDING), ("code", ASCENDING)], name="semester_major_code"),
+            # Các nhóm lớp (-G01, -G02...) của 1 môn
+            IndexModel([("metadata.original_code", ASCENDING), ("semester", ASCENDING), ("code", ASCENDING)],
+                       name="original_code_semester_code"),
+        ]
+
+# =================
+# Model Phiên bản danh mục môn học
+# =================
+class CatalogVersion(Document):
+    id: str  # Học kỳ, "*" = toàn bộ danh mục
+    version: int = 0  # Tăng mỗi khi danh mục thay đổi (db/catalog.py bump_catalog_version)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "catalog_versions"
 
 # =================
 # Model Lịch sử Chat
@@ -66,10 +100,21 @@ class ChatHistory(Document):
     
     class Settings:
         name = "chat_history"
+        indexes = [
+            # Lịch sử 1 phiên chat (sắp/phân trang theo created_at, _id), xóa phiên
+            IndexModel([("user_id", ASCENDING), ("session_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+                       name="user_session_created_id"),
+            # Toàn bộ lịch sử / tìm kiếm của 1 user
+            IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="user_created_id"),
+            # Dọn tin nhắn cũ hơn cửa sổ lưu giữ (db/retention.py)
+            IndexModel([("created_at", ASCENDING)], name="created_at"),
+        ]
 
 # =================
 # Model OTP (Mã xác thực)
 # =================
+OTP_TTL_GRACE_SECONDS = 24 * 3600
+
 class OTP(Document):
     id: UUID = Field(default_factory=uuid4)
     identifier: str  # Email hoặc số điện thoại
@@ -80,4 +125,11 @@ class OTP(Document):
     created_at: datetime = Field(default_factory=datetime.now)
     
     class Settings:
-        name = "otps"
\ No newline at end of file
+        name = "otps"
+        indexes = [
+            IndexModel([("identifier", ASCENDING), ("purpose", ASCENDING), ("is_used", ASCENDING)],
+                       name="identifier_purpose_used"),
+            # TTL: MongoDB tự xóa OTP hết hạn. expires_at lưu giờ địa phương còn TTL so theo UTC,
+            # nên xóa trễ thêm 1 ngày để không bao giờ xóa sớm (hạn thật vẫn kiểm tra trong API)
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=OTP_TTL_GRACE_SECONDS),
+        ]
@@ -0,0 +1,50 @@
+# smart-scheduler-api/db/pagination.py
+"""
+Phân trang theo khóa (keyset): trang sau bắt đầu ngay sau khóa sắp xếp của phần tử cuối trang trước,
+nên mỗi trang tốn như nhau dù ở trang thứ mấy (khác skip/offset). Cursor là khóa đó mã hóa base64 (không
+phụ thuộc cấu trúc bên trong).
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Khóa sắp xếp của phần tử cuối trang -> cursor (datetime/UUID được đổi sang chuỗi)"""
+    payload = json.dumps([value if value is None or isinstance(value, (int, float)) else str(value)
+                          for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int, nullable: bool = False) -> List[Optional[str]]:
+    """
+    Cursor -> danh sách size giá trị khóa, mỗi giá trị là chuỗi (hoặc None nếu nullable).
+    ValueError nếu cursor không hợp lệ (cursor giả mạo không được lọt tới truy vấn/so sánh khóa).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Cursor không hợp lệ") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Cursor không hợp lệ")
+    for value in values:
+        if not isinstance(value, str) and not (nullable and value is None):
+            raise ValueError("Cursor không hợp lệ")
+    return values
+
+
+def after_filter(fields: List[str], values: List[Any]) -> Dict[str, Any]:
+    """
+    Điều kiện Mongo "khóa (fields) lớn hơn values" theo thứ tự tăng dần:
+    (a, b) > (va, vb) <=> a > va hoặc (a = va và b > vb). Giá trị None (trường thiếu) nhỏ nhất.
+    """
+    clauses = []
+    for depth, field in enumerate(fields):
+        clause = {previous: values[i] for i, previous in enumerate(fields[:depth])}
+        clause[field] = {"$gt": values[depth]} if values[depth] is not None else {"$ne": None}
+        clauses.append(clause)
+    return {"$or": clauses}
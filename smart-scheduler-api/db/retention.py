@@ -0,0 +1,200 @@
+# smart-scheduler-api/db/retention.py
+"""
+Giữ các collection "nóng" nhỏ: tin nhắn chat cũ hơn CHAT_RETENTION_DAYS ngày được lưu trữ ra file nén
+(jsonl.gz) rồi xóa khỏi MongoDB (hoặc xóa luôn), chạy nền theo từng lô. OTP hết hạn do TTL index của MongoDB
+tự xóa (xem OTP.Settings.indexes).
+
+Mọi worker uvicorn đều chạy vòng dọn dẹp: mỗi lô được "nhận" nguyên tử trước khi lưu trữ (ghi retention_claim = mã lô
+vào các tin nhắn chưa ai nhận), nên 1 tin nhắn chỉ được lưu trữ/xóa bởi đúng 1 worker. Lô bị nhận quá
+CLAIM_TIMEOUT_MINUTES phút mà chưa xóa (worker chết giữa chừng) được nhận lại.
+"""
+import asyncio
+import gzip
+import json
+import os
+import traceback
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+from pymongo.errors import OperationFailure
+
+from .models import ChatHistory
+from .indexes import DOCUMENT_MODELS
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent.parent / "archives" / "chat_history"
+CLAIM_TIMEOUT_MINUTES = 60
+
+
+class _MessageId(BaseModel):
+    # Projection: chọn lô chỉ cần _id
+    id: UUID = Field(alias="_id")
+
+
+class ChatRetention:
+    """
+    Dọn lịch sử chat theo cửa sổ lưu giữ.
+    - retention_days: giữ tin nhắn trong bao nhiêu ngày (0 = giữ mãi, không chạy).
+    - mode: "archive" (ghi ra file nén trước khi xóa) hoặc "delete".
+    - Mỗi lô batch_size tin nhắn cũ nhất, nghỉ giữa các lô để không chiếm DB của request khác.
+    """
+
+    def __init__(self, retention_days=None, mode=None, archive_dir=None, interval_hours=None, batch_size=None):
+        self.retention_days = retention_days if retention_days is not None else int(os.getenv("CHAT_RETENTION_DAYS", 180))
+        self.mode = mode or os.getenv("CHAT_RETENTION_MODE", "archive")
+        self.archive_dir = Path(archive_dir or os.getenv("CHAT_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR))
+        self.interval_hours = interval_hours or float(os.getenv("CHAT_RETENTION_INTERVAL_HOURS", 24))
+        self.batch_size = batch_size or int(os.getenv("CHAT_RETENTION_BATCH", 1000))
+        self.batch_pause_seconds = 0.2
+        self.last_run: Optional[dict] = None
+        self.total_purged = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.retention_days > 0
+
+    def start(self):
+        """Chạy dọn dẹp định kỳ (gọi khi server khởi động, sau init_db)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.interval_hours * 3600)
+
+    async def run_once(self) -> dict:
+        """Dọn 1 lượt: lưu trữ/xóa mọi tin nhắn cũ hơn cửa sổ lưu giữ, theo từng lô"""
+        async with self._lock:
+            cutoff = datetime.now() - timedelta(days=self.retention_days)
+            run = {
+                "started_at": datetime.now(),
+                "finished_at": None,
+                "cutoff": cutoff,
+                "mode": self.mode,
+                "purged": 0,
+                "batches": 0,
+                "archive_file": None,
+                "error": None,
+            }
+            self.last_run = run
+            if not self.enabled:
+                run["finished_at"] = datetime.now()
+                return run
+
+            archive_path = None
+            if self.mode == "archive":
+                # pid trong tên file: các worker chạy cùng lúc không ghi chung 1 file
+                archive_path = self.archive_dir / f"chat_history-{run['started_at']:%Y%m%d-%H%M%S}-{os.getpid()}.jsonl.gz"
+            try:
+                while True:
+                    candidates, claim_id, batch = await self._claim_batch(cutoff)
+                    if not candidates:
+                        break
+                    if batch:
+                        claim = {"_id": {"$in": [message.id for message in batch]}, "retention_claim": claim_id}
+                        if archive_path is not None:
+                            rows = [message.model_dump(mode="json") for message in batch]
+                            await asyncio.to_thread(_append_archive, archive_path, rows)
+                            run["archive_file"] = str(archive_path)
+                        # Chỉ xóa sau khi đã ghi file lưu trữ thành công
+                        await ChatHistory.find(claim).delete()
+                        run["purged"] += len(batch)
+                        run["batches"] += 1
+                        self.total_purged += len(batch)
+                    if len(candidates) < self.batch_size:
+                        break
+                    await asyncio.sleep(self.batch_pause_seconds)
+            except Exception as e:
+                run["error"] = str(e)
+                raise
+            finally:
+                run["finished_at"] = datetime.now()
+                if run["purged"]:
+                    print(f"🧹 Đã dọn {run['purged']} tin nhắn chat cũ hơn {cutoff:%Y-%m-%d} ({self.mode})")
+            return run
+
+    async def _claim_batch(self, cutoff):
+        """
+        Nhận 1 lô tin nhắn cũ: chọn tối đa batch_size tin chưa ai nhận (hoặc nhận đã quá hạn), đánh dấu bằng mã lô
+        trong 1 lệnh update (mỗi document được cập nhật nguyên tử, worker khác nhận trước thì bỏ qua), rồi đọc lại
+        các tin đã thực sự nhận được. Trả về (id các tin được chọn, mã lô, các tin thuộc lô của worker này).
+        """
+        now = datetime.now()
+        unclaimed = {"$or": [
+            {"retention_claim": None},
+            {"retention_claimed_at": {"$lt": now - timedelta(minutes=CLAIM_TIMEOUT_MINUTES)}},
+        ]}
+        candidates = await ChatHistory.find(
+            {"created_at": {"$lt": cutoff}, **unclaimed}
+        ).sort("created_at").limit(self.batch_size).project(_MessageId).to_list()
+        if not candidates:
+            return [], None, []
+        claim_id = str(uuid4())
+        ids = [candidate.id for candidate in candidates]
+        await ChatHistory.find({"_id": {"$in": ids}, **unclaimed}).update(
+            {"$set": {"retention_claim": claim_id, "retention_claimed_at": now}}
+        )
+        batch = await ChatHistory.find({"_id": {"$in": ids}, "retention_claim": claim_id}).to_list()
+        return ids, claim_id, batch
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "retention_days": self.retention_days,
+            "mode": self.mode,
+            "archive_dir": str(self.archive_dir) if self.mode == "archive" else None,
+            "interval_hours": self.interval_hours,
+            "batch_size": self.batch_size,
+            "total_purged": self.total_purged,
+            "last_run": self.last_run,
+        }
+
+
+def _append_archive(path: Path, rows: List[dict]):
+    # Mỗi lô ghi thêm 1 member gzip vào cùng file (gzip.open đọc lại được cả file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+async def collection_stats(database) -> Dict[str, dict]:
+    """Số document, dung lượng dữ liệu và index của từng collection (byte)"""
+    stats = {}
+    for model in DOCUMENT_MODELS:
+        name = model.Settings.name
+        try:
+            raw = await database.command("collStats", name)
+        except OperationFailure:
+            raw = {}  # Collection chưa được tạo
+        stats[name] = {
+            "count": raw.get("count", 0),
+            "size_bytes": raw.get("size", 0),
+            "avg_doc_bytes": raw.get("avgObjSize", 0),
+            "storage_bytes": raw.get("storageSize", 0),
+            "index_bytes": raw.get("totalIndexSize", 0),
+            "indexes": raw.get("nindexes", 0),
+        }
+    return stats
+
+
+chat_retention = ChatRetention()
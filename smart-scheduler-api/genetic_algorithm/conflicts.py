@@ -0,0 +1,112 @@
+# smart-scheduler-api/genetic_algorithm/conflicts.py
+"""
+Phát hiện trùng lịch giữa các entry (môn/nhóm lớp đã chuẩn hóa: start/end là date, days, data.start_time/end_time).
+Hai entry trùng lịch <=> khoảng ngày giao nhau và bitmask giờ học trong tuần có bit chung (xem time_model).
+"""
+import heapq
+from collections import defaultdict
+
+from .time_model import MASK_WORDS, weekly_mask, conflict_pairs
+
+_WORD = (1 << 64) - 1
+
+
+def entry_mask(entry):
+    """Bitmask giờ học trong tuần của entry, tính 1 lần rồi lưu trong entry"""
+    if "mask" not in entry:
+        entry["mask"] = weekly_mask(entry.get("days"), entry["data"].start_time, entry["data"].end_time)
+    return entry["mask"]
+
+
+def dates_overlap(entry_a, entry_b):
+    # Giữ nguyên điều kiện cũ (1 ngày bắt đầu nằm trong khoảng của entry kia), kể cả khi start > end
+    return (entry_b["start"] <= entry_a["start"] <= entry_b["end"]
+            or entry_a["start"] <= entry_b["start"] <= entry_a["end"])
+
+
+def entries_conflict(entry_a, entry_b):
+    """2 entry trùng lịch: khoảng ngày giao nhau và có giờ học chung trong tuần"""
+    return dates_overlap(entry_a, entry_b) and bool(entry_mask(entry_a) & entry_mask(entry_b))
+
+
+def find_conflicts(items):
+    """Mọi cặp trùng lịch (a, b) theo thứ tự trong items, tính chung 1 lần bằng ma trận bitmask"""
+    pairs = conflict_pairs(
+        [entry_mask(item) for item in items],
+        [item["start"] for item in items],
+        [item["end"] for item in items],
+    )
+    return [(items[i], items[j]) for i, j in pairs]
+
+
+def _mask_words(mask):
+    # Các word 64 bit (khoảng 5 tiếng của 1 ngày) mà entry chiếm
+    return [word for word in range(MASK_WORDS) if (mask >> (64 * word)) & _WORD]
+
+
+class ConflictIndex:
+    """
+    Đồ thị trùng lịch của 1 danh sách entry, dựng 1 lần:
+    - Chỉ mục giờ: mỗi word của bitmask tuần -> các entry chiếm word đó, chỉ so bitmask với entry cùng word.
+    - Quét theo ngày bắt đầu (sweep line): trong mỗi word chỉ so với các entry chưa kết thúc.
+    Kết quả giống find_conflicts (cùng cặp, cùng thứ tự (i, j) tăng dần).
+    """
+
+    def __init__(self, entries=()):
+        self._entries = list(entries)
+        self._words = [_mask_words(entry_mask(entry)) for entry in self._entries]
+        self._neighbors = [set() for _ in self._entries]  # vị trí -> vị trí các entry trùng lịch với nó
+        self.checks = 0  # Số lần so bitmask
+        self._build()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _link(self, position_a, position_b):
+        self.checks += 1
+        entry_a, entry_b = self._entries[position_a], self._entries[position_b]
+        if entry_a["mask"] & entry_b["mask"] and dates_overlap(entry_a, entry_b):
+            self._neighbors[position_a].add(position_b)
+            self._neighbors[position_b].add(position_a)
+
+    def _build(self):
+        # Entry có ngày kết thúc trước ngày bắt đầu (dữ liệu lỗi) không quét được, so trực tiếp
+        inverted = [position for position, entry in enumerate(self._entries) if entry["start"] > entry["end"]]
+        inverted_set = set(inverted)
+
+        # Quét theo ngày bắt đầu: mỗi word giữ heap (ngày kết thúc, vị trí) của các entry đang mở
+        open_entries = defaultdict(list)
+        buckets = defaultdict(set)  # word -> vị trí các entry chiếm word đó
+        for position in sorted(range(len(self._entries)), key=lambda position: (self._entries[position]["start"], position)):
+            for word in self._words[position]:
+                buckets[word].add(position)
+            if position in inverted_set:
+                continue
+            start = self._entries[position]["start"]
+            candidates = set()
+            for word in self._words[position]:
+                heap = open_entries[word]
+                while heap and heap[0][0] < start:
+                    heapq.heappop(heap)  # Đã kết thúc trước khi entry này bắt đầu
+                candidates.update(other for _, other in heap)
+                heapq.heappush(heap, (self._entries[position]["end"], position))
+            for other in candidates:
+                self._link(position, other)
+
+        for position in inverted:
+            entry = self._entries[position]
+            candidates = set()
+            for word in self._words[position]:
+                candidates |= buckets[word]
+            for other in candidates:
+                if other != position and other not in self._neighbors[position] \
+                        and dates_overlap(self._entries[other], entry):
+                    self._link(position, other)
+
+    def conflicts(self):
+        """Mọi cặp trùng (a, b) theo thứ tự vị trí, giống find_conflicts"""
+        return [
+            (self._entries[position], self._entries[other])
+            for position in range(len(self._entries))
+            for other in sorted(other for other in self._neighbors[position] if other > position)
+        ]
@@ -0,0 +1,200 @@
+# smart-scheduler-api/genetic_algorithm/exact_solver.py
+import time
+import numpy as np
+
+# Branch-and-bound chỉ dùng cho bài toán nhỏ (số môn <= ngưỡng)
+EXACT_MAX_SUBJECTS = 10
+# Chi phí trùng lịch nhỏ nhất (xem calculate_fitness)
+MIN_COLLISION_COST = 1000
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def hungarian(cost):
+    """
+    Bài toán gán chi phí nhỏ nhất (Hungarian, dạng đường tăng ngắn nhất với thế vị u/v).
+    cost: ma trận (n, m) với n <= m. Trả về mảng slot được gán cho từng hàng, không hàng nào trùng cột.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    n, m = cost.shape
+    if n > m:
+        raise ValueError("Số môn phải <= số slot để gán không trùng")
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[j]: hàng (1-based) đang giữ cột j, 0 = trống
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            # Cập nhật chi phí rút gọn nhỏ nhất cho mọi cột chưa dùng cùng lúc
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < min_reduced[1:])
+            min_reduced[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            j1 = int(candidates.argmin()) + 1
+            delta = candidates[j1 - 1]
+            used_columns = np.flatnonzero(used)
+            u[owner[used_columns]] += delta
+            v[used_columns] -= delta
+            min_reduced[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Tăng luồng dọc theo đường vừa tìm
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment = np.zeros(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+
+class ExactSolver:
+    """
+    Giải chính xác trên bài toán đã biên dịch (CompiledProblem: unary_penalty, priority, slot_day).
+    - Không có ràng buộc nhiều gen và trùng lịch chắc chắn không có lợi: Hungarian.
+    - Có avoidConsecutive/balanceDays hoặc trùng lịch có thể có lợi: branch-and-bound.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.nodes = 0
+
+    def collision_free_is_optimal(self):
+        # Nếu mỗi môn chênh lệch unary < chi phí trùng lịch, chuyển môn bị trùng sang slot trống luôn tốt hơn
+        problem = self.problem
+        if problem.num_subjects > problem.num_slots:
+            return False
+        if problem.num_subjects == 0:
+            return True
+        spread = problem.unary_penalty.max(axis=1) - problem.unary_penalty.min(axis=1)
+        return bool((spread < MIN_COLLISION_COST).all())
+
+    def use_hungarian(self):
+        # Miền bị thu hẹp thì chưa chắc còn slot trống hợp lệ để tránh trùng: dùng branch-and-bound
+        return (not self.problem.avoid_consecutive and not self.problem.balance_days
+                and not self.problem.is_reduced and self.collision_free_is_optimal())
+
+    def is_applicable(self, max_subjects=EXACT_MAX_SUBJECTS):
+        # Môn cố định chỉ có 1 nhánh nên độ khó phụ thuộc số môn còn tự do
+        return self.use_hungarian() or len(self.problem.free_subjects) <= max_subjects
+
+    def solve(self, max_ms=None, on_progress=None, archive=None):
+        """Trả về (cá thể, penalty, stats); stats['optimal'] = False nếu hết thời gian/bị dừng trước khi chứng minh tối ưu"""
+        started_at = time.perf_counter()
+        problem = self.problem
+        self.nodes = 0
+        self._evaluations_at_start = problem.evaluations
+
+        if self.use_hungarian():
+            individual = hungarian(problem.unary_penalty).tolist() if problem.num_subjects else []
+            penalty = problem.calculate_fitness(individual)
+            return individual, penalty, self._stats("hungarian", "optimal", started_at)
+
+        deadline = None if max_ms is None else started_at + max_ms / 1000
+        individual, penalty, stop_reason = self._branch_and_bound(deadline, on_progress, archive)
+        return individual, penalty, self._stats("branch_and_bound", stop_reason, started_at)
+
+    def _stats(self, engine, stop_reason, started_at):
+        optimal = stop_reason == "optimal"
+        return {
+            "engine": engine,
+            "stop_reason": stop_reason,
+            "optimal": optimal,
+            "nodes": self.nodes,
+            "evaluations": self.problem.evaluations - self._evaluations_at_start + self.nodes,
+            "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2),
+        }
+
+    def _branch_and_bound(self, deadline, on_progress=None, archive=None):
+        problem = self.problem
+        num_subjects, num_slots = problem.num_subjects, problem.num_slots
+        unary = problem.unary_penalty.tolist()
+        slot_day = problem.slot_day.tolist()
+        priority = problem.subject_priority.tolist()
+        avoid_consecutive, balance_days = problem.avoid_consecutive, problem.balance_days
+
+        # Cận dưới: tổng unary nhỏ nhất (trong miền) của các môn chưa gán (trùng lịch, liền kề, cân bằng đều >= 0)
+        masked = np.where(problem.allowed_slots, problem.unary_penalty, np.iinfo(np.int64).max)
+        row_min = masked.min(axis=1).tolist() if num_subjects else []
+        suffix_min = [0] * (num_subjects + 1)
+        for i in range(num_subjects - 1, -1, -1):
+            suffix_min[i] = suffix_min[i + 1] + row_min[i]
+        slot_order = [sorted(domain, key=row.__getitem__) for row, domain in zip(unary, problem.domains)]
+
+        # Lời giải ban đầu: gán Hungarian (không trùng) nếu được, ngược lại tham lam theo unary trong miền
+        if num_subjects <= num_slots and not problem.is_reduced:
+            best_genes = hungarian(problem.unary_penalty).tolist() if num_subjects else []
+        else:
+            best_genes = [order[0] for order in slot_order]
+        best = [problem.calculate_fitness(best_genes), best_genes]
+
+        genes = [0] * num_subjects
+        slot_first = [-1] * num_slots  # môn đầu tiên (index nhỏ nhất) trong slot
+        day_counts = [0] * len(problem.day_names)
+
+        def balance_bound(remaining):
+            used = [count for count in day_counts if count]
+            if not used:
+                return 0
+            # Ngày ít nhất có thể tăng thêm tối đa `remaining` môn
+            return max(0, max(used) - min(used) - remaining) * 50
+
+        def dfs(i, cost):
+            self.nodes += 1
+            if self.nodes % 2048 == 0:
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise _SearchTimeout("deadline")
+                if on_progress is not None and on_progress(self.nodes, best[1], best[0]):
+                    raise _SearchTimeout("cancelled")
+            if i == num_subjects:
+                total = cost + (balance_bound(0) if balance_days else 0)
+                if archive is not None:
+                    archive.add(genes, total)
+                if total < best[0]:
+                    best[0], best[1] = total, genes[:]
+                return
+            bound_rest = suffix_min[i + 1]
+            for slot in slot_order[i]:
+                step = unary[i][slot]
+                if cost + step + bound_rest >= best[0]:
+                    break  # slot_order tăng dần theo unary nên các slot sau cũng bị cắt
+                first = slot_first[slot]
+                if first >= 0:
+                    step += 1000 if priority[i] > priority[first] else 1500
+                if avoid_consecutive and i > 0 and slot_day[slot] == slot_day[genes[i - 1]]:
+                    step += 200
+                new_cost = cost + step
+                if new_cost + bound_rest >= best[0]:
+                    continue
+
+                genes[i] = slot
+                if first < 0:
+                    slot_first[slot] = i
+                day_counts[slot_day[slot]] += 1
+                if not balance_days or new_cost + bound_rest + balance_bound(num_subjects - i - 1) < best[0]:
+                    dfs(i + 1, new_cost)
+                day_counts[slot_day[slot]] -= 1
+                if first < 0:
+                    slot_first[slot] = -1
+
+        try:
+            dfs(0, 0)
+            stop_reason = "optimal"
+        except _SearchTimeout as e:
+            stop_reason = e.args[0]
+        return best[1], best[0], stop_reason
@@ -0,0 +1,145 @@
+# smart-scheduler-api/genetic_algorithm/local_search.py
+import math
+import random
+import time
+import numpy as np
+
+
+def _greedy_genes(problem):
+    # Điểm xuất phát: mỗi môn lấy slot có unary nhỏ nhất trong miền của nó (có thể trùng, tìm kiếm sẽ sửa)
+    if not problem.num_subjects:
+        return []
+    masked = np.where(problem.allowed_slots, problem.unary_penalty, np.iinfo(np.int64).max)
+    return masked.argmin(axis=1).tolist()
+
+
+def _search_stats(engine, stop_reason, iterations, accepted, evaluations, started_at):
+    return {
+        "engine": engine,
+        "stop_reason": stop_reason,
+        "iterations": iterations,
+        "accepted_moves": accepted,
+        "evaluations": evaluations,
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2),
+    }
+
+
+class SimulatedAnnealing:
+    """Mô phỏng luyện kim: đổi slot 1 môn ngẫu nhiên, chấp nhận bước xấu hơn với xác suất exp(-delta/T)"""
+
+    def __init__(self, problem, iterations=20000, start_temperature=600.0, end_temperature=5.0, seed=None):
+        self.problem = problem
+        self.iterations = iterations
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.rng = random.Random(seed)
+
+    def solve(self, max_ms=None, on_progress=None, archive=None):
+        problem, rng = self.problem, self.rng
+        started_at = time.perf_counter()
+        deadline = None if max_ms is None else started_at + max_ms / 1000
+        evaluations_at_start = problem.evaluations
+
+        state = problem.create_state(_greedy_genes(problem))
+        best_penalty, best_genes = state.penalty, state.genes[:]
+        if not problem.free_subjects:
+            return best_genes, best_penalty, _search_stats("annealing", "optimal", 0, 0, 1, started_at)
+
+        cooling = (self.end_temperature / self.start_temperature) ** (1 / max(self.iterations, 1))
+        temperature = self.start_temperature
+        accepted = 0
+        stop_reason = "max_iterations"
+        iteration = 0
+        for iteration in range(self.iterations):
+            if iteration % 256 == 0:
+                if deadline is not None and time.perf_counter() > deadline:
+                    stop_reason = "deadline"
+                    break
+                if on_progress is not None and on_progress(iteration, best_genes, best_penalty):
+                    stop_reason = "cancelled"
+                    break
+            subject_index = rng.choice(problem.free_subjects)
+            new_slot_index = rng.choice(problem.domains[subject_index])
+            old_slot_index = state.genes[subject_index]
+            if new_slot_index != old_slot_index:
+                before = state.penalty
+                delta = problem.apply_move(state, subject_index, new_slot_index) - before
+                if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                    accepted += 1
+                    if archive is not None:
+                        archive.add(state.genes, state.penalty)
+                    if state.penalty < best_penalty:
+                        best_penalty, best_genes = state.penalty, state.genes[:]
+                else:
+                    problem.apply_move(state, subject_index, old_slot_index)  # Hoàn tác
+            temperature *= cooling
+
+        return best_genes, best_penalty, _search_stats("annealing", stop_reason, iteration + 1, accepted,
+                                                 problem.evaluations - evaluations_at_start, started_at)
+
+
+class TabuSearch:
+    """
+    Tabu search: mỗi bước chọn nước đi tốt nhất trong toàn bộ lân cận (đổi slot 1 môn),
+    cấm đưa môn về slot cũ trong `tenure` bước (trừ khi tạo ra lời giải tốt nhất mới).
+    """
+
+    def __init__(self, problem, iterations=200, tenure=7, stagnation_iterations=50, seed=None):
+        self.problem = problem
+        self.iterations = iterations
+        self.tenure = tenure
+        self.stagnation_iterations = stagnation_iterations
+        self.rng = random.Random(seed)
+
+    def solve(self, max_ms=None, on_progress=None, archive=None):
+        problem, rng = self.problem, self.rng
+        started_at = time.perf_counter()
+        deadline = None if max_ms is None else started_at + max_ms / 1000
+        evaluations_at_start = problem.evaluations
+
+        state = problem.create_state(_greedy_genes(problem))
+        best_penalty, best_genes = state.penalty, state.genes[:]
+        tabu_until = {}  # (môn, slot) -> bước cuối cùng còn bị cấm
+        last_improvement = 0
+        stop_reason = "max_iterations"
+        iteration = 0
+        for iteration in range(self.iterations):
+            if deadline is not None and time.perf_counter() > deadline:
+                stop_reason = "deadline"
+                break
+            if iteration - last_improvement > self.stagnation_iterations:
+                stop_reason = "stagnation"
+                break
+            if on_progress is not None and on_progress(iteration, best_genes, best_penalty):
+                stop_reason = "cancelled"
+                break
+
+            best_move, best_move_penalty = None, float('inf')
+            for subject_index in problem.free_subjects:
+                old_slot_index = state.genes[subject_index]
+                for slot_index in problem.domains[subject_index]:
+                    if slot_index == old_slot_index:
+                        continue
+                    penalty = problem.apply_move(state, subject_index, slot_index)
+                    problem.apply_move(state, subject_index, old_slot_index)
+                    is_tabu = tabu_until.get((subject_index, slot_index), -1) >= iteration
+                    if is_tabu and penalty >= best_penalty:
+                        continue
+                    # Hòa điểm: chọn ngẫu nhiên để tránh lặp
+                    if penalty < best_move_penalty or (penalty == best_move_penalty and rng.random() < 0.5):
+                        best_move, best_move_penalty = (subject_index, slot_index), penalty
+            if best_move is None:
+                stop_reason = "no_moves"
+                break
+
+            subject_index, slot_index = best_move
+            tabu_until[(subject_index, state.genes[subject_index])] = iteration + self.tenure
+            problem.apply_move(state, subject_index, slot_index)
+            if archive is not None:
+                archive.add(state.genes, state.penalty)
+            if state.penalty < best_penalty:
+                best_penalty, best_genes = state.penalty, state.genes[:]
+                last_improvement = iteration
+
+        return best_genes, best_penalty, _search_stats("tabu", stop_reason, iteration + 1, iteration + 1,
+                                                 problem.evaluations - evaluations_at_start, started_at)
@@ -0,0 +1,374 @@
+# smart-scheduler-api/genetic_algorithm/problem.py
+import math
+import numpy as np
+
+from .time_model import parse_minutes
+
+# Khung giờ của từng buổi (phút trong ngày), dùng để ánh xạ giờ học thật sang slot
+PERIOD_MINUTES = {"Sáng": (0, 12 * 60), "Chiều": (12 * 60, 18 * 60), "Tối": (18 * 60, 24 * 60)}
+
+
+def subject_slot_domain(details, time_slots):
+    """
+    Các slot (index) môn có thể chiếm theo ngày học (details['days']) và giờ học thật (start_time/end_time).
+    Trả về None nếu không đủ thông tin hoặc không slot nào khớp (không giới hạn).
+    """
+    days = details.get("days")
+    start, end = parse_minutes(details.get("start_time")), parse_minutes(details.get("end_time"))
+    periods = None
+    if start is not None and end is not None and start < end:
+        # Buổi học kéo dài qua 2 buổi (VD 11:00-13:00) thì cả 2 buổi đều hợp lệ
+        periods = {period for period, (low, high) in PERIOD_MINUTES.items() if start < high and end > low}
+    if not days and not periods:
+        return None
+
+    domain = []
+    for index, slot in enumerate(time_slots):
+        parts = slot.split('_')
+        if days and parts[0] not in days:
+            continue
+        if periods and (len(parts) < 2 or parts[1] not in periods):
+            continue
+        domain.append(index)
+    return domain or None
+
+
+class IndividualState:
+    """Trạng thái của 1 cá thể dùng cho đánh giá tăng dần (delta fitness)"""
+    __slots__ = ("genes", "slot_occupants", "day_counts", "unary", "collision", "consecutive", "penalty")
+
+    def __init__(self, genes, slot_occupants, day_counts, unary, collision, consecutive, penalty):
+        self.genes = genes  # slot index của từng môn
+        self.slot_occupants = slot_occupants  # slot -> bitmask các môn đang chiếm slot
+        self.day_counts = day_counts  # ngày -> số môn
+        self.unary = unary
+        self.collision = collision
+        self.consecutive = consecutive  # số cặp môn liền kề cùng ngày
+        self.penalty = penalty
+
+    def copy(self):
+        return IndividualState(
+            self.genes[:], self.slot_occupants[:], self.day_counts[:],
+            self.unary, self.collision, self.consecutive, self.penalty
+        )
+
+
+class CompiledProblem:
+    """
+    Bài toán xếp lịch đã biên dịch: dùng chung cho mọi engine (GA, exact, annealing, tabu).
+    Mỗi môn được gán đúng 1 slot; penalty = bảng unary + trùng lịch + liền kề + cân bằng ngày.
+    reduce_domains=True: mỗi môn chỉ được xếp vào các slot khớp ngày/giờ học thật (xem subject_slot_domain).
+    """
+
+    def __init__(self, subjects, time_slots, constraints, priorities=None, additional_constraints=None, subject_details=None,
+                 check_delta=False, reduce_domains=True):
+        self.subjects = subjects
+        self.time_slots = time_slots
+        self.constraints = constraints # Ví dụ: {'Toán': ['Thứ 2 - Sáng']}
+        self.priorities = priorities or {}  # Dictionary: subject_name -> priority (1-10)
+        self.additional_constraints = additional_constraints or {}  # Ràng buộc bổ sung
+        self.subject_details = subject_details or {}
+        
+        self.num_subjects = len(subjects)
+        self.num_slots = len(time_slots)
+
+        # Tạo map để tra cứu index nhanh (rất quan trọng)
+        self.slot_to_index = {slot: i for i, slot in enumerate(self.time_slots)}
+
+        self._compile_problem()
+        self._compile_domains(reduce_domains)
+
+        # Đánh giá tăng dần; check_delta=True để so với tính lại toàn bộ (dùng khi test)
+        self.check_delta = check_delta
+        self._compile_delta_tables()
+
+        # Số lần đánh giá (tính toàn bộ hoặc tăng dần), dùng cho benchmark
+        self.evaluations = 0
+
+    # === BIÊN DỊCH BÀI TOÁN (chạy 1 lần mỗi lần giải) ===
+    def _compile_problem(self):
+        """Biên dịch các ràng buộc chỉ phụ thuộc (môn, slot) thành bảng penalty dày num_subjects x num_slots"""
+        slot_parts = [slot.split('_') for slot in self.time_slots]
+        slot_days = [parts[0] for parts in slot_parts]
+        slot_periods = [parts[1] if len(parts) > 1 else "" for parts in slot_parts]
+        self.day_names = list(dict.fromkeys(slot_days))
+        self.period_names = list(dict.fromkeys(slot_periods))
+        day_to_index = {day: i for i, day in enumerate(self.day_names)}
+        period_to_index = {period: i for i, period in enumerate(self.period_names)}
+
+        # Chỉ số ngày / buổi của từng slot
+        self.slot_day = np.array([day_to_index[day] for day in slot_days], dtype=np.int64)
+        self.slot_period = np.array([period_to_index[period] for period in slot_periods], dtype=np.int64)
+
+        # Các phép so khớp chuỗi chỉ làm 1 lần ở đây
+        slot_is_afternoon = np.array(['Chiều' in slot for slot in self.time_slots], dtype=bool)
+        slot_is_evening = np.array(['Tối' in slot for slot in self.time_slots], dtype=bool)
+        slot_is_morning = np.array(['Sáng' in slot for slot in self.time_slots], dtype=bool)
+        slot_is_saturday = np.array(['T7' in slot for slot in self.time_slots], dtype=bool)
+        unavailable_slots = set(self.additional_constraints.get('unavailable_slots', []))
+        slot_is_unavailable = np.array([slot in unavailable_slots for slot in self.time_slots], dtype=bool)
+
+        self.subject_priority = np.array([self.priorities.get(name, 5) for name in self.subjects], dtype=np.int64)
+        priority_offset = (self.subject_priority - 5) * 50
+
+        table = np.zeros((self.num_subjects, self.num_slots), dtype=np.int64)
+        for i, subject_name in enumerate(self.subjects):
+            details = self.subject_details.get(subject_name, {})
+            row = table[i]
+
+            # Ràng buộc 2: Giờ cấm
+            forbidden_slots = self.constraints.get(subject_name, [])
+            if forbidden_slots:
+                forbidden = np.array([slot in forbidden_slots for slot in self.time_slots], dtype=bool)
+                row[forbidden] += 500 - priority_offset[i]
+
+            # Ràng buộc 7: Unavailable slots (môn priority cao bị phạt ít hơn)
+            row[slot_is_unavailable] += 800 - priority_offset[i]
+
+            # Thưởng khi xếp vào preferred_days
+            preferred_days = details.get("preferred_days", [])
+            if preferred_days:
+                preferred = np.array([day in preferred_days for day in slot_days], dtype=bool)
+                row[preferred] -= 150
+
+            if details.get("is_retake", False):
+                row[slot_is_morning] -= 20  # Khuyến khích môn học lại lên buổi sáng
+            else:
+                row[slot_is_evening] += 80  # Giảm xếp lớp thường vào buổi tối
+
+        # Ràng buộc 5: Ưu tiên học buổi sáng
+        if self.additional_constraints.get('preferMorning', False):
+            table[:, slot_is_afternoon] += 100
+
+        # Ràng buộc 6: Cho phép học thứ 7
+        if not self.additional_constraints.get('allowSaturday', False):
+            table[:, slot_is_saturday] += 300
+
+        self.unary_penalty = table
+        self.avoid_consecutive = bool(self.additional_constraints.get('avoidConsecutive', False))
+        self.balance_days = bool(self.additional_constraints.get('balanceDays', False))
+
+        # Chỉ số j < i để tìm môn chiếm slot trước (giống thứ tự duyệt trong calculate_fitness)
+        self._earlier_mask = np.tri(self.num_subjects, k=-1, dtype=bool)
+        self._subject_index = np.arange(self.num_subjects)
+
+    # === MIỀN GIÁ TRỊ (Domain reduction) ===
+    def _compile_domains(self, reduce_domains):
+        """
+        Miền slot cho phép của từng môn. Môn có miền 1 slot là môn cố định: gen của nó không bao giờ đổi,
+        các engine chỉ tìm kiếm trên free_subjects.
+        """
+        allowed = np.ones((self.num_subjects, self.num_slots), dtype=bool)
+        if reduce_domains:
+            for i, subject_name in enumerate(self.subjects):
+                domain = subject_slot_domain(self.subject_details.get(subject_name, {}), self.time_slots)
+                if domain is not None:
+                    allowed[i] = False
+                    allowed[i, domain] = True
+        self.allowed_slots = allowed
+        self.is_reduced = not allowed.all()
+        self.domains = [np.flatnonzero(row).tolist() for row in allowed]
+        self.domain_sizes = allowed.sum(axis=1)
+        self.free_subjects = [i for i, domain in enumerate(self.domains) if len(domain) > 1]
+
+        # Bảng (môn, thứ tự trong miền) -> slot, để sinh gen ngẫu nhiên theo miền bằng NumPy
+        width = max((len(domain) for domain in self.domains), default=1)
+        self._domain_table = np.zeros((self.num_subjects, width), dtype=np.int64)
+        for i, domain in enumerate(self.domains):
+            self._domain_table[i, :len(domain)] = domain
+        self._free_subject_array = np.array(self.free_subjects, dtype=np.int64)
+        self._allowed_rows = allowed.tolist()
+
+    def fixed_genes(self):
+        """Cá thể duy nhất khi mọi môn đều cố định (slot đầu tiên trong miền của từng môn)"""
+        return [domain[0] for domain in self.domains]
+
+    def domain_stats(self):
+        return {
+            "fixed_subjects": self.num_subjects - len(self.free_subjects),
+            "search_space_log10": round(float(np.log10(self.domain_sizes).sum()), 2) if self.num_subjects else 0.0,
+            "full_search_space_log10": round(self.num_subjects * math.log10(self.num_slots), 2) if self.num_slots else 0.0,
+        }
+
+    def random_population(self, rng, size):
+        """Ma trận (size, num_subjects) gen ngẫu nhiên, gen của mỗi môn nằm trong miền của môn đó"""
+        if not self.is_reduced:
+            return rng.integers(0, self.num_slots, size=(size, self.num_subjects), dtype=np.int64)
+        picks = (rng.random((size, self.num_subjects)) * self.domain_sizes).astype(np.int64)
+        return self._domain_table[self._subject_index, picks]
+
+    def random_moves(self, rng, count):
+        """count nước đi ngẫu nhiên (môn chưa cố định, slot mới trong miền của môn đó)"""
+        subjects = self._free_subject_array[rng.integers(0, len(self._free_subject_array), size=count)]
+        if not self.is_reduced:
+            return subjects, rng.integers(0, self.num_slots, size=count)
+        picks = (rng.random(count) * self.domain_sizes[subjects]).astype(np.int64)
+        return subjects, self._domain_table[subjects, picks]
+
+    # === 2. HÀM THÍCH NGHI (Fitness Function) ===
+    def calculate_fitness(self, individual):
+        self.evaluations += 1
+        # Các ràng buộc theo (môn, slot): tra bảng đã biên dịch
+        penalty = int(self.unary_penalty[self._subject_index, individual].sum()) if self.num_subjects else 0
+
+        # Ràng buộc 1: Trùng lịch (Penalty 1000, nhưng ưu tiên môn có priority cao hơn)
+        slots_used = {}  # slot_index -> index của môn chiếm slot đầu tiên
+        for i, slot_index in enumerate(individual):
+            if slot_index in slots_used:
+                # Nếu trùng, ưu tiên môn có priority cao hơn
+                if self.subject_priority[i] > self.subject_priority[slots_used[slot_index]]:
+                    penalty += 1000  # Vẫn phạt nhưng ít hơn
+                else:
+                    penalty += 1500  # Môn hiện tại có priority thấp hơn, phạt nặng hơn
+            else:
+                slots_used[slot_index] = i
+
+        # Ràng buộc 3: Tránh xếp các môn học liên tiếp (cùng ngày)
+        if self.avoid_consecutive:
+            for i in range(len(individual) - 1):
+                if self.slot_day[individual[i]] == self.slot_day[individual[i + 1]]:
+                    penalty += 200
+
+        # Ràng buộc 4: Cân bằng số môn học giữa các ngày
+        if self.balance_days and len(individual):
+            day_counts = np.bincount(self.slot_day[individual])
+            day_counts = day_counts[day_counts > 0]
+            penalty += int(day_counts.max() - day_counts.min()) * 50
+
+        return penalty
+
+    def evaluate_population(self, population):
+        """Tính penalty cho cả quần thể (ma trận pop_size x num_subjects) cùng lúc"""
+        population = np.asarray(population, dtype=np.int64)
+        if population.ndim == 1:
+            population = population[np.newaxis, :]
+        self.evaluations += population.shape[0]
+        if self.num_subjects == 0:
+            return np.zeros(population.shape[0], dtype=np.int64)
+
+        # Các ràng buộc theo (môn, slot): 1 phép gather trên bảng
+        penalties = self.unary_penalty[self._subject_index, population].sum(axis=1)
+
+        # Ràng buộc 1: Trùng lịch - so với môn đầu tiên đã chiếm slot
+        same_slot = (population[:, :, np.newaxis] == population[:, np.newaxis, :]) & self._earlier_mask
+        has_collision = same_slot.any(axis=2)
+        owner_priority = self.subject_priority[same_slot.argmax(axis=2)]
+        collision_cost = np.where(self.subject_priority > owner_priority, 1000, 1500)
+        penalties += (collision_cost * has_collision).sum(axis=1)
+
+        # Ràng buộc 3 & 4 phụ thuộc nhiều gen nên không gộp được vào bảng
+        if self.avoid_consecutive or self.balance_days:
+            days = self.slot_day[population]
+            if self.avoid_consecutive:
+                penalties += (days[:, 1:] == days[:, :-1]).sum(axis=1) * 200
+            if self.balance_days:
+                day_counts = (days[:, :, np.newaxis] == np.arange(len(self.day_names))).sum(axis=1)
+                max_count = day_counts.max(axis=1)
+                min_count = np.where(day_counts > 0, day_counts, self.num_subjects + 1).min(axis=1)
+                penalties += (max_count - min_count) * 50
+
+        return penalties
+
+    # === ĐÁNH GIÁ TĂNG DẦN (Delta fitness) ===
+    def _compile_delta_tables(self):
+        """Bảng dạng list thuần Python cho các phép cập nhật O(1)"""
+        self._unary_rows = self.unary_penalty.tolist()
+        self._slot_day_list = self.slot_day.tolist()
+        priorities = self.subject_priority.tolist()
+        # higher_priority_mask[i]: bitmask các môn có priority lớn hơn môn i
+        self._higher_priority_mask = [
+            sum(1 << j for j, other in enumerate(priorities) if other > own)
+            for own in priorities
+        ]
+
+    def _slot_collision_cost(self, occupants):
+        # Slot có k môn: mỗi môn sau môn đầu tiên bị phạt 1500, hoặc 1000 nếu priority cao hơn môn đầu
+        if occupants & (occupants - 1) == 0:
+            return 0
+        first = (occupants & -occupants).bit_length() - 1
+        count = bin(occupants).count("1")
+        higher = bin(occupants & self._higher_priority_mask[first]).count("1")
+        return 1500 * (count - 1) - 500 * higher
+
+    def _state_penalty(self, state):
+        penalty = state.unary + state.collision
+        if self.avoid_consecutive:
+            penalty += state.consecutive * 200
+        if self.balance_days:
+            used_days = [count for count in state.day_counts if count]
+            if used_days:
+                penalty += (max(used_days) - min(used_days)) * 50
+        return penalty
+
+    def create_state(self, individual):
+        """Tính đầy đủ 1 lần các bộ đếm của cá thể, sau đó chỉ cập nhật tăng dần"""
+        self.evaluations += 1
+        genes = list(individual)
+        slot_occupants = [0] * self.num_slots
+        day_counts = [0] * len(self.day_names)
+        unary = 0
+        for i, slot_index in enumerate(genes):
+            slot_occupants[slot_index] |= 1 << i
+            day_counts[self._slot_day_list[slot_index]] += 1
+            unary += self._unary_rows[i][slot_index]
+        collision = sum(self._slot_collision_cost(occupants) for occupants in slot_occupants)
+        consecutive = sum(
+            1 for i in range(len(genes) - 1)
+            if self._slot_day_list[genes[i]] == self._slot_day_list[genes[i + 1]]
+        )
+        state = IndividualState(genes, slot_occupants, day_counts, unary, collision, consecutive, 0)
+        state.penalty = self._state_penalty(state)
+        return state
+
+    def apply_move(self, state, subject_index, new_slot_index):
+        """Chuyển 1 môn sang slot khác và cập nhật penalty trong O(1)"""
+        genes = state.genes
+        old_slot_index = genes[subject_index]
+        if old_slot_index == new_slot_index:
+            return state.penalty
+        self.evaluations += 1
+
+        row = self._unary_rows[subject_index]
+        state.unary += row[new_slot_index] - row[old_slot_index]
+
+        # Chỉ 2 slot bị ảnh hưởng: slot cũ và slot mới
+        bit = 1 << subject_index
+        occupants = state.slot_occupants
+        state.collision -= self._slot_collision_cost(occupants[old_slot_index]) + self._slot_collision_cost(occupants[new_slot_index])
+        occupants[old_slot_index] &= ~bit
+        occupants[new_slot_index] |= bit
+        state.collision += self._slot_collision_cost(occupants[old_slot_index]) + self._slot_collision_cost(occupants[new_slot_index])
+
+        # Chỉ 2 cặp liền kề (i-1, i) và (i, i+1) bị ảnh hưởng
+        old_day = self._slot_day_list[old_slot_index]
+        new_day = self._slot_day_list[new_slot_index]
+        for neighbor in (subject_index - 1, subject_index + 1):
+            if 0 <= neighbor < self.num_subjects:
+                neighbor_day = self._slot_day_list[genes[neighbor]]
+                state.consecutive += (new_day == neighbor_day) - (old_day == neighbor_day)
+        state.day_counts[old_day] -= 1
+        state.day_counts[new_day] += 1
+
+        genes[subject_index] = new_slot_index
+        state.penalty = self._state_penalty(state)
+
+        if self.check_delta:
+            self._check_state(state)
+        return state.penalty
+
+    def _check_state(self, state):
+        # Chế độ kiểm tra: so sánh với tính lại toàn bộ
+        expected = self.calculate_fitness(state.genes)
+        if state.penalty != expected:
+            raise AssertionError(f"Delta fitness sai: {state.penalty} != {expected} cho {state.genes}")
+
+    def decode_result(self, best_individual):
+        schedule_result = []
+        for i, subject_name in enumerate(self.subjects):
+            slot_index = int(best_individual[i])
+            slot_name = self.time_slots[slot_index]
+            schedule_result.append({
+                "subject": subject_name,
+                "time": slot_name
+            })
+        return schedule_result
@@ -1,131 +1,336 @@
 # smart-scheduler-api/genetic_algorithm/scheduler_ga.py
+import os
 import random
+import time
+from collections import OrderedDict
 import numpy as np # Đảm bảo bạn đã import numpy
 
+from .problem import CompiledProblem
+from .exact_solver import EXACT_MAX_SUBJECTS
+
+# Giới hạn mặc định cho /api/schedule (đảm bảo độ trễ ổn định)
+DEFAULT_MAX_MS = 2000  # Ngân sách thời gian cho 1 lần chạy GA
+DEFAULT_STAGNATION_GENERATIONS = 50  # Dừng nếu không cải thiện sau K thế hệ
+DEFAULT_MIN_DIVERSITY = 0.02  # Dừng nếu tỷ lệ cá thể khác nhau trong quần thể <= ngưỡng
+
+# Memetic: leo đồi trên các cá thể elite mỗi N thế hệ, có ngân sách thời gian riêng
+DEFAULT_MEMETIC_INTERVAL = 10  # 0/None = tắt
+DEFAULT_MEMETIC_ELITES = 3
+DEFAULT_MEMETIC_BUDGET_RATIO = 0.1  # Tổng thời gian leo đồi <= 10% max_ms
+MEMETIC_MAX_MS_WITHOUT_DEADLINE = 200  # Ngân sách khi không giới hạn max_ms
+
+# Khởi tạo có gieo hạt: 1 phần quần thể ban đầu sinh bằng xếp tham lam, phần còn lại ngẫu nhiên
+DEFAULT_SEED_RATIO = 0.2  # 0 = hoàn toàn ngẫu nhiên
+SEED_NOISE = 300  # Nhiễu cộng vào chi phí khi xếp tham lam để các cá thể gieo hạt khác nhau
+
 # ... (Toàn bộ code ScheduleGA và find_optimal_schedule của bạn ở đây) ...
 # (Code bạn gửi đã rất tốt, giữ nguyên)
-class ScheduleGA:
-    def __init__(self, subjects, time_slots, constraints, priorities=None, additional_constraints=None, subject_details=None):
-        self.subjects = subjects
-        self.time_slots = time_slots
-        self.constraints = constraints # Ví dụ: {'Toán': ['Thứ 2 - Sáng']}
-        self.priorities = priorities or {}  # Dictionary: subject_name -> priority (1-10)
-        self.additional_constraints = additional_constraints or {}  # Ràng buộc bổ sung
-        self.subject_details = subject_details or {}
-        
-        self.num_subjects = len(subjects)
-        self.num_slots = len(time_slots)
+class FitnessCache:
+    """Cache LRU có giới hạn: mã hóa nhiễm sắc thể (bytes) -> penalty, dùng trong 1 lần chạy GA"""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        penalty = self.entries.get(key)
+        if penalty is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return penalty
+
+    def put(self, key, penalty):
+        self.entries[key] = penalty
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)  # Bỏ phần tử ít dùng nhất
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+class SolutionArchive:
+    """
+    Giữ tối đa k lời giải tốt nhất khác nhau: 2 lời giải trong archive luôn khác nhau ở ít nhất
+    min_distance môn (khoảng cách Hamming). Lời giải mới quá gần 1 lời giải tốt hơn/bằng thì bị bỏ,
+    ngược lại nó thay thế các lời giải gần nó.
+    """
+
+    def __init__(self, k, min_distance=1):
+        self.k = k
+        self.min_distance = max(1, min_distance)
+        self.genes = None  # ma trận (số lời giải, num_subjects)
+        self.penalties = []
+
+    def __len__(self):
+        return len(self.penalties)
+
+    def add(self, individual, penalty):
+        penalty = int(penalty)
+        if len(self.penalties) >= self.k and penalty >= max(self.penalties):
+            return False
+        individual = np.asarray(individual, dtype=np.int64)
+        if self.genes is None:
+            self.genes, self.penalties = individual[np.newaxis, :].copy(), [penalty]
+            return True
+
+        close = np.flatnonzero((self.genes != individual).sum(axis=1) < self.min_distance)
+        if any(self.penalties[i] <= penalty for i in close):
+            return False
+        keep = np.ones(len(self.penalties), dtype=bool)
+        keep[close] = False
+        self.genes = np.vstack([self.genes[keep], individual])
+        self.penalties = [p for p, kept in zip(self.penalties, keep) if kept] + [penalty]
+        if len(self.penalties) > self.k:
+            worst = int(np.argmax(self.penalties))
+            self.genes = np.delete(self.genes, worst, axis=0)
+            del self.penalties[worst]
+        return True
 
-        # Tạo map để tra cứu index nhanh (rất quan trọng)
-        self.slot_to_index = {slot: i for i, slot in enumerate(self.time_slots)}
+    def add_population(self, population, scores):
+        # Chỉ xét các cá thể tốt hơn lời giải kém nhất trong archive (khi archive đã đủ k)
+        scores = np.asarray(scores)
+        candidates = np.argsort(scores, kind="stable")
+        if len(self.penalties) >= self.k:
+            candidates = candidates[scores[candidates] < max(self.penalties)]
+        for i in candidates:
+            self.add(population[i], scores[i])
+
+    def items(self):
+        """Các lời giải (genes, penalty) theo penalty tăng dần"""
+        order = np.argsort(self.penalties, kind="stable")
+        return [(self.genes[i].tolist(), self.penalties[i]) for i in order]
+
+class ScheduleGA(CompiledProblem):
+    def __init__(self, subjects, time_slots, constraints, priorities=None, additional_constraints=None, subject_details=None,
+                 vectorized=True, seed=None, check_delta=False, fitness_cache_size=4096, reduce_domains=True):
+        super().__init__(subjects, time_slots, constraints, priorities, additional_constraints, subject_details,
+                         check_delta=check_delta, reduce_domains=reduce_domains)
+        self._init_search(vectorized, seed, fitness_cache_size)
+
+    @classmethod
+    def from_problem(cls, problem, vectorized=True, seed=None, fitness_cache_size=4096):
+        """Tạo GA trên bài toán đã biên dịch sẵn (không biên dịch lại)"""
+        ga = cls.__new__(cls)
+        ga.__dict__.update(problem.__dict__)
+        ga._init_search(vectorized, seed, fitness_cache_size)
+        return ga
+
+    def _init_search(self, vectorized, seed, fitness_cache_size):
+        # Chế độ vector hóa: cả quần thể là 1 ma trận (pop_size, num_subjects)
+        self.vectorized = vectorized
+        self.rng = np.random.default_rng(seed)
+
+        # Cache fitness theo nhiễm sắc thể (elite, cá thể trùng lặp không bị tính lại); 0 = tắt
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size else None
+        # Mã hóa gọn: 1 byte/gen khi số slot <= 256
+        self._gene_dtype = np.uint8 if self.num_slots <= 256 else np.uint16
+
+        # Thống kê lần chạy gần nhất (lý do dừng, số thế hệ, thời gian)
+        self.stats = {}
+        self.best_individual = None
+        self.init_memetic(0, DEFAULT_MEMETIC_ELITES)  # Tắt cho tới khi run_ga/đảo cấu hình lại
+
+    def init_memetic(self, memetic_interval, memetic_elites, memetic_max_ms=None, max_ms=None):
+        """Cấu hình leo đồi memetic; ngân sách mặc định = 10% max_ms để leo đồi không chiếm hết thời gian chạy"""
+        self.memetic_interval = memetic_interval
+        self.memetic_elites = memetic_elites
+        if memetic_max_ms is None:
+            memetic_max_ms = max_ms * DEFAULT_MEMETIC_BUDGET_RATIO if max_ms else MEMETIC_MAX_MS_WITHOUT_DEADLINE
+        self.memetic_budget_ms = memetic_max_ms
+        self.memetic_stats = {"phases": 0, "improved": 0, "elapsed_ms": 0.0}
+        self._local_optima = set()  # Cá thể đã leo đồi xong (cực tiểu địa phương), không leo lại
 
     # === 1. BIỂU DIỄN (Chromosome) ===
     def create_individual(self):
-        return [random.randint(0, self.num_slots - 1) for _ in range(self.num_subjects)]
+        # Mỗi gen chỉ lấy slot trong miền của môn (môn cố định luôn giữ slot duy nhất của nó)
+        return [random.choice(domain) for domain in self.domains]
 
-    # === 2. HÀM THÍCH NGHI (Fitness Function) ===
-    def calculate_fitness(self, individual):
-        penalty = 0
-        
-        # Ràng buộc 1: Trùng lịch (Penalty 1000, nhưng ưu tiên môn có priority cao hơn)
-        slots_used = {}  # slot_index -> list of subjects
-        for i, slot_index in enumerate(individual):
-            subject_name = self.subjects[i]
-            if slot_index in slots_used:
-                # Nếu trùng, ưu tiên môn có priority cao hơn
-                existing_subject = slots_used[slot_index][0]
-                current_priority = self.priorities.get(subject_name, 5)
-                existing_priority = self.priorities.get(existing_subject, 5)
-                
-                if current_priority > existing_priority:
-                    # Môn hiện tại có priority cao hơn, giữ lại
-                    penalty += 1000  # Vẫn phạt nhưng ít hơn
-                else:
-                    # Môn hiện tại có priority thấp hơn, phạt nặng hơn
-                    penalty += 1500
+    def greedy_individual(self, noise=0):
+        """
+        Xếp tham lam: môn priority cao xếp trước, mỗi môn vào slot trống trong miền có unary nhỏ nhất
+        (unary đã gồm giờ cấm, slot không rảnh, ngày ưu tiên...). Hết slot trống thì chấp nhận trùng.
+        noise > 0: cộng nhiễu ngẫu nhiên [0, noise) vào chi phí để mỗi lần gọi cho 1 cá thể khác.
+        """
+        jitter = (self.rng.random((self.num_subjects, self.num_slots)) * noise).tolist() if noise else None
+        tie_break = self.rng.random(self.num_subjects).tolist()
+        order = sorted(range(self.num_subjects), key=lambda i: (-int(self.subject_priority[i]), tie_break[i]))
+        occupied = [False] * self.num_slots
+        genes = [0] * self.num_subjects
+        for i in order:
+            row = self._unary_rows[i]
+            best_slot, best_cost = None, None
+            for slot_index in self.domains[i]:
+                cost = row[slot_index] + (1000 if occupied[slot_index] else 0)
+                if jitter is not None:
+                    cost += jitter[i][slot_index]
+                if best_cost is None or cost < best_cost:
+                    best_slot, best_cost = slot_index, cost
+            genes[i] = best_slot
+            occupied[best_slot] = True
+        return genes
+
+    def seed_individuals(self, size, seed_ratio):
+        """round(size * seed_ratio) cá thể tham lam: cá thể đầu không nhiễu, các cá thể sau có nhiễu"""
+        count = min(size, int(round(size * seed_ratio))) if self.num_subjects else 0
+        return [self.greedy_individual(noise=SEED_NOISE if k else 0) for k in range(count)]
+
+    # === 2. HÀM THÍCH NGHI: xem CompiledProblem (calculate_fitness, evaluate_population) ===
+    def score_population(self, population):
+        """Như evaluate_population nhưng chỉ tính các cá thể chưa có trong fitness cache"""
+        if self.fitness_cache is None:
+            return self.evaluate_population(population)
+        encoded = np.ascontiguousarray(population, dtype=self._gene_dtype)
+        keys = [row.tobytes() for row in encoded]
+        scores = np.empty(len(keys), dtype=np.int64)
+        missing = []
+        for i, key in enumerate(keys):
+            penalty = self.fitness_cache.get(key)
+            if penalty is None:
+                missing.append(i)
             else:
-                slots_used[slot_index] = [subject_name]
-            
-        # Ràng buộc 2: Giờ cấm (Penalty 500, tăng theo priority thấp)
-        for i, subject_name in enumerate(self.subjects):
-            if subject_name in self.constraints:
-                forbidden_slots = self.constraints[subject_name]
-                
-                assigned_slot_index = individual[i]
-                assigned_slot_name = self.time_slots[assigned_slot_index]
-                
-                if assigned_slot_name in forbidden_slots:
-                    priority = self.priorities.get(subject_name, 5)
-                    # Môn có priority cao hơn bị phạt ít hơn khi vi phạm
-                    penalty += 500 - (priority - 5) * 50
-
-        # Ràng buộc 3: Tránh xếp các môn học liên tiếp
-        if self.additional_constraints.get('avoidConsecutive', False):
-            for i in range(len(individual) - 1):
-                slot1 = self.time_slots[individual[i]]
-                slot2 = self.time_slots[individual[i + 1]]
-                # Kiểm tra nếu 2 môn liên tiếp cùng ngày
-                day1 = slot1.split('_')[0]
-                day2 = slot2.split('_')[0]
-                if day1 == day2:
-                    penalty += 200  # Phạt nhẹ nếu liên tiếp
-
-        # Ràng buộc 4: Cân bằng số môn học giữa các ngày
-        if self.additional_constraints.get('balanceDays', False):
-            day_counts = {}
-            for slot_index in individual:
-                slot_name = self.time_slots[slot_index]
-                day = slot_name.split('_')[0]
-                day_counts[day] = day_counts.get(day, 0) + 1
-            
-            if day_counts:
-                max_count = max(day_counts.values())
-                min_count = min(day_counts.values())
-                penalty += (max_count - min_count) * 50  # Phạt nếu chênh lệch nhiều
-
-        # Ràng buộc 5: Ưu tiên học buổi sáng
-        if self.additional_constraints.get('preferMorning', False):
-            for i, slot_index in enumerate(individual):
-                slot_name = self.time_slots[slot_index]
-                if 'Chiều' in slot_name:
-                    penalty += 100  # Phạt nhẹ nếu xếp buổi chiều
-
-        # Ràng buộc 6: Cho phép học thứ 7
-        if not self.additional_constraints.get('allowSaturday', False):
-            for i, slot_index in enumerate(individual):
-                slot_name = self.time_slots[slot_index]
-                if 'T7' in slot_name:
-                    penalty += 300  # Phạt nếu xếp thứ 7 khi không cho phép
-
-        # Ràng buộc 7: Phạt khi xếp vào unavailable slots (ngày không rảnh)
-        available_slots = self.additional_constraints.get('available_slots', [])
-        unavailable_slots = self.additional_constraints.get('unavailable_slots', [])
-        
-        for i, slot_index in enumerate(individual):
-            subject_name = self.subjects[i]
-            slot_name = self.time_slots[slot_index]
-            
-            # Phạt nặng nếu xếp vào unavailable slot (nhưng vẫn cho phép)
-            if slot_name in unavailable_slots:
-                priority = self.priorities.get(subject_name, 5)
-                # Phạt ít hơn nếu priority cao (cho phép môn quan trọng vào ngày không rảnh)
-                penalty += 800 - (priority - 5) * 50
-            
-            # Thưởng khi xếp vào preferred_days
-            preferred_days = self.subject_details.get(subject_name, {}).get("preferred_days", [])
-            if preferred_days:
-                day = slot_name.split('_')[0]
-                if day in preferred_days:
-                    # Thưởng (giảm penalty) khi xếp đúng ngày ưu tiên
-                    penalty -= 150
-            
-            is_retake = self.subject_details.get(subject_name, {}).get("is_retake", False)
-            if not is_retake and "Tối" in slot_name:
-                penalty += 80  # Giảm xếp lớp thường vào buổi tối
-            if is_retake and "Sáng" in slot_name:
-                penalty -= 20  # Khuyến khích môn học lại lên buổi sáng sớm để ưu tiên
+                scores[i] = penalty
+        if missing:
+            # Các cá thể chưa có trong cache vẫn được tính chung 1 lần bằng NumPy
+            missing_scores = self.evaluate_population(population[missing])
+            scores[missing] = missing_scores
+            for i, penalty in zip(missing, missing_scores.tolist()):
+                self.fitness_cache.put(keys[i], penalty)
+        return scores
 
-        return penalty
+    # === 2b. ĐÁNH GIÁ TĂNG DẦN: create_state/apply_move trong CompiledProblem ===
+    def crossover_states(self, parent1, parent2):
+        """Lai ghép 1 điểm, cập nhật penalty theo số gen thực sự thay đổi"""
+        if self.num_subjects < 2:
+            return parent1.copy(), parent2.copy()
+        point = random.randint(1, self.num_subjects - 1)
+        genes1, genes2 = parent1.genes, parent2.genes
+        prefix_diff = [i for i in range(point) if genes1[i] != genes2[i]]
+        suffix_diff = [i for i in range(point, self.num_subjects) if genes1[i] != genes2[i]]
+
+        # child1 = parent1[:point] + parent2[point:], child2 = parent2[:point] + parent1[point:]
+        # Xuất phát từ cha/mẹ nào cần ít thay đổi gen hơn
+        if len(suffix_diff) <= len(prefix_diff):
+            child1, child2 = parent1.copy(), parent2.copy()
+            for i in suffix_diff:
+                self.apply_move(child1, i, genes2[i])
+                self.apply_move(child2, i, genes1[i])
+        else:
+            child1, child2 = parent2.copy(), parent1.copy()
+            for i in prefix_diff:
+                self.apply_move(child1, i, genes1[i])
+                self.apply_move(child2, i, genes2[i])
+        return child1, child2
+
+    def mutate_state(self, state):
+        if random.random() < 0.1 and self.free_subjects: # Tỷ lệ đột biến 10%
+            subject_index = random.choice(self.free_subjects)
+            new_slot_index = random.choice(self.domains[subject_index])
+            self.apply_move(state, subject_index, new_slot_index)
+        return state
+
+    # === 2c. TÌM KIẾM CỤC BỘ (Memetic) ===
+    def local_search_state(self, state, deadline=None):
+        """
+        Leo đồi dốc nhất: mỗi bước thử mọi nước đi (đổi slot 1 môn, hoán đổi slot 2 môn) bằng delta fitness
+        và thực hiện nước tốt nhất, dừng khi không còn cải thiện hoặc hết deadline.
+        """
+        genes = state.genes
+        free_subjects, allowed = self.free_subjects, self._allowed_rows
+        while True:
+            best_penalty, best_move = state.penalty, None
+            for position, i in enumerate(free_subjects):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                old_slot_index = genes[i]
+                # Đi liên tiếp qua các slot rồi mới trả về slot cũ (mỗi nước thử chỉ tốn 1 apply_move)
+                for slot_index in self.domains[i]:
+                    if slot_index != old_slot_index:
+                        penalty = self.apply_move(state, i, slot_index)
+                        if penalty < best_penalty:
+                            best_penalty, best_move = penalty, ((i, slot_index),)
+                self.apply_move(state, i, old_slot_index)
+
+                # Hoán đổi chỉ hợp lệ khi slot của mỗi môn nằm trong miền của môn kia
+                for j in free_subjects[position + 1:]:
+                    slot_j = genes[j]
+                    if slot_j == old_slot_index or not allowed[i][slot_j] or not allowed[j][old_slot_index]:
+                        continue
+                    self.apply_move(state, i, slot_j)
+                    penalty = self.apply_move(state, j, old_slot_index)
+                    self.apply_move(state, j, slot_j)
+                    self.apply_move(state, i, old_slot_index)
+                    if penalty < best_penalty:
+                        best_penalty, best_move = penalty, ((i, slot_j), (j, old_slot_index))
+
+            if best_move is None:
+                return state
+            for subject_index, slot_index in best_move:
+                self.apply_move(state, subject_index, slot_index)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return state
+
+    def _memetic_due(self, gen):
+        if not self.memetic_interval or gen % self.memetic_interval:
+            return False
+        return self.memetic_stats["elapsed_ms"] < self.memetic_budget_ms
+
+    def _memetic_deadline(self):
+        return time.perf_counter() + (self.memetic_budget_ms - self.memetic_stats["elapsed_ms"]) / 1000
+
+    def _record_memetic(self, started_at, improved):
+        self.memetic_stats["phases"] += 1
+        self.memetic_stats["improved"] += improved
+        self.memetic_stats["elapsed_ms"] += (time.perf_counter() - started_at) * 1000
+
+    def memetic_batch(self, population, scores):
+        """Leo đồi trên memetic_elites cá thể tốt nhất (khác nhau) của quần thể ma trận, sửa tại chỗ"""
+        started_at = time.perf_counter()
+        deadline = self._memetic_deadline()
+        improved = 0
+        seen = set()
+        for index in np.argsort(scores, kind='stable'):
+            if len(seen) >= self.memetic_elites or time.perf_counter() >= deadline:
+                break
+            key = population[index].tobytes()
+            if key in seen or key in self._local_optima:
+                continue
+            seen.add(key)
+            state = self.local_search_state(self.create_state(population[index].tolist()), deadline)
+            if state.penalty < scores[index]:
+                population[index] = state.genes
+                scores[index] = state.penalty
+                improved += 1
+            self._local_optima.add(population[index].tobytes())
+        self._record_memetic(started_at, improved)
+
+    def memetic_states(self, population):
+        """Như memetic_batch cho quần thể dạng list IndividualState"""
+        started_at = time.perf_counter()
+        deadline = self._memetic_deadline()
+        improved = 0
+        seen = set()
+        for state in sorted(population, key=lambda state: state.penalty):
+            if len(seen) >= self.memetic_elites or time.perf_counter() >= deadline:
+                break
+            key = tuple(state.genes)
+            if key in seen or key in self._local_optima:
+                continue
+            seen.add(key)
+            before = state.penalty
+            self.local_search_state(state, deadline)
+            improved += state.penalty < before
+            self._local_optima.add(tuple(state.genes))
+        self._record_memetic(started_at, improved)
 
     # === 3. CHỌN LỌC (Selection) ===
     def selection(self, population_with_scores):
@@ -143,35 +348,149 @@ class ScheduleGA:
 
     # === 5. ĐỘT BIẾN (Mutation) ===
     def mutate(self, individual):
-        if random.random() < 0.1: # Tỷ lệ đột biến 10%
-            subject_index = random.randint(0, self.num_subjects - 1)
-            new_slot_index = random.randint(0, self.num_slots - 1)
-            individual[subject_index] = new_slot_index
+        if random.random() < 0.1 and self.free_subjects: # Tỷ lệ đột biến 10%
+            subject_index = random.choice(self.free_subjects)
+            individual[subject_index] = random.choice(self.domains[subject_index])
         return individual
 
+    # === 2-5. PHIÊN BẢN VECTOR HÓA (cả quần thể là 1 ma trận) ===
+    def create_population(self, size, seed_ratio=0):
+        population = self.random_population(self.rng, size)
+        seeded = self.seed_individuals(size, seed_ratio)
+        if seeded:
+            population[:len(seeded)] = seeded
+        return population
+
+    def selection_batch(self, scores, count):
+        tournament_size = 5
+        # Mỗi hàng là 1 giải đấu gồm tournament_size cá thể khác nhau
+        tournaments = np.argsort(self.rng.random((count, len(scores))), axis=1)[:, :tournament_size]
+        ranking = np.argsort(scores[tournaments], axis=1, kind='stable')
+        winners = np.take_along_axis(tournaments, ranking[:, :2], axis=1)
+        return winners[:, 0], winners[:, 1]
+
+    def crossover_batch(self, parents1, parents2):
+        if self.num_subjects < 2:
+            return parents1.copy(), parents2.copy()
+        points = self.rng.integers(1, self.num_subjects, size=len(parents1))
+        take_first = np.arange(self.num_subjects) < points[:, np.newaxis]
+        children1 = np.where(take_first, parents1, parents2)
+        children2 = np.where(take_first, parents2, parents1)
+        return children1, children2
+
+    def mutate_batch(self, children):
+        if not self.free_subjects:
+            return children
+        count = len(children)
+        mutated = self.rng.random(count) < 0.1 # Tỷ lệ đột biến 10%
+        subject_indices, new_slot_indices = self.random_moves(self.rng, count)
+        children[mutated, subject_indices[mutated]] = new_slot_indices[mutated]
+        return children
+
+    def next_generation(self, population, scores):
+        """Sinh thế hệ mới: giữ 10% cá thể tốt nhất, phần còn lại qua chọn lọc/lai ghép/đột biến"""
+        population_size = len(population)
+        elitism_count = int(population_size * 0.1)
+        num_children = population_size - elitism_count
+
+        order = np.argsort(scores, kind='stable')
+        elites = population[order[:elitism_count]]
+
+        parents1, parents2 = self.selection_batch(scores, (num_children + 1) // 2)
+        children1, children2 = self.crossover_batch(population[parents1], population[parents2])
+        # Xen kẽ child1, child2 như bản gốc rồi cắt cho đủ kích thước
+        children = np.stack([children1, children2], axis=1).reshape(-1, self.num_subjects)[:num_children]
+        children = self.mutate_batch(children)
+
+        return np.concatenate([elites, children])
+
+    def evolve(self, population, generations, start_generation=0, deadline=None):
+        """
+        Tiến hóa quần thể thêm tối đa `generations` thế hệ (có leo đồi memetic nếu đã bật), dừng sớm khi quá
+        deadline (time.perf_counter). Trả về (quần thể cuối, điểm của nó, số thế hệ đã chạy).
+        """
+        scores = self.score_population(population)
+        done = 0
+        while done < generations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            population = self.next_generation(population, scores)
+            scores = self.score_population(population)
+            done += 1
+            if self._memetic_due(start_generation + done):
+                self.memetic_batch(population, scores)
+        return population, scores, done
+
     # ----------------------------------------------------
     # HÀM CHẠY CHÍNH
     # ----------------------------------------------------
-    def run_ga(self):
+    def run_ga(self, max_ms=None, stagnation_generations=None, min_diversity=None, on_progress=None, archive=None,
+               memetic_interval=DEFAULT_MEMETIC_INTERVAL, memetic_elites=DEFAULT_MEMETIC_ELITES, memetic_max_ms=None,
+               seed_ratio=DEFAULT_SEED_RATIO):
+        # Điều kiện dừng sớm (None = tắt): hết thời gian, trì trệ, quần thể mất đa dạng
+        self.max_ms = max_ms
+        self.stagnation_generations = stagnation_generations
+        self.min_diversity = min_diversity
+        # on_progress(thế hệ, cá thể tốt nhất, penalty) được gọi mỗi thế hệ, trả về True để dừng
+        self.on_progress = on_progress
+        # archive (SolutionArchive) nhận cả quần thể mỗi thế hệ để giữ top-k lời giải khác nhau
+        self.archive = archive
+        self.init_memetic(memetic_interval, memetic_elites, memetic_max_ms, max_ms)
+        # Tỷ lệ quần thể ban đầu sinh bằng xếp tham lam (seed_individuals)
+        self.seed_ratio = seed_ratio
+        if self.fitness_cache is not None:
+            self.fitness_cache = FitnessCache(self.fitness_cache.max_size)  # Cache riêng cho mỗi lần chạy
+        self.evaluations = 0
+
+        if self.vectorized:
+            return self._run_ga_vectorized()
+
         POPULATION_SIZE = 100
         GENERATIONS = 200 # Số thế hệ
 
-        population = [self.create_individual() for _ in range(POPULATION_SIZE)]
+        # Mỗi cá thể mang theo bộ đếm slot/ngày để con sinh ra chỉ cần cập nhật phần gen thay đổi
+        seeded = self.seed_individuals(POPULATION_SIZE, self.seed_ratio)
+        population = [self.create_state(genes) for genes in seeded]
+        population += [self.create_state(self.create_individual()) for _ in range(POPULATION_SIZE - len(seeded))]
         best_individual = None
         best_score = float('inf')
+        started_at = time.perf_counter()
+        last_improvement = 0
+        stop_reason = "max_generations"
 
         for gen in range(GENERATIONS):
+            if self._memetic_due(gen):
+                self.memetic_states(population)
+
             population_with_scores = []
-            for individual in population:
-                score = self.calculate_fitness(individual)
-                population_with_scores.append((individual, score))
+            for state in population:
+                score = state.penalty
+                population_with_scores.append((state, score))
                 
                 if score < best_score:
                     best_score = score
-                    best_individual = individual
+                    best_individual = state.genes[:]
+                    last_improvement = gen
+            if self.archive is not None:
+                self.archive.add_population(
+                    [state.genes for state in population], [state.penalty for state in population]
+                )
 
             if best_score == 0:
                 print("Tìm thấy giải pháp hoàn hảo!")
+                stop_reason = "optimal"
+                break
+
+            if self.on_progress is not None and self.on_progress(gen, best_individual, best_score):
+                stop_reason = "cancelled"
+                break
+
+            early_stop = self._early_stop_reason(
+                gen, started_at, last_improvement,
+                lambda: len({tuple(state.genes) for state in population}) / len(population)
+            )
+            if early_stop:
+                stop_reason = early_stop
                 break
                 
             new_population = []
@@ -181,9 +500,9 @@ class ScheduleGA:
 
             while len(new_population) < POPULATION_SIZE:
                 parent1, parent2 = self.selection(population_with_scores)
-                child1, child2 = self.crossover(parent1, parent2)
-                child1 = self.mutate(child1)
-                child2 = self.mutate(child2)
+                child1, child2 = self.crossover_states(parent1, parent2)
+                child1 = self.mutate_state(child1)
+                child2 = self.mutate_state(child2)
                 new_population.append(child1)
                 if len(new_population) < POPULATION_SIZE:
                     new_population.append(child2)
@@ -193,25 +512,321 @@ class ScheduleGA:
             if gen % 20 == 0:
                 print(f"Thế hệ {gen}: Điểm tốt nhất (penalty) = {best_score}")
 
-        print(f"Hoàn tất GA! Điểm cuối cùng = {best_score}")
+        self._finish_run(stop_reason, gen + 1, started_at, last_improvement, best_individual, best_score)
         
         return self.decode_result(best_individual), best_score
 
-    def decode_result(self, best_individual):
-        schedule_result = []
-        for i, subject_name in enumerate(self.subjects):
-            slot_index = best_individual[i]
-            slot_name = self.time_slots[slot_index]
-            schedule_result.append({
-                "subject": subject_name,
-                "time": slot_name
-            })
-        return schedule_result
+    def _run_ga_vectorized(self):
+        POPULATION_SIZE = 100
+        GENERATIONS = 200 # Số thế hệ
+
+        population = self.create_population(POPULATION_SIZE, self.seed_ratio)
+        best_individual = None
+        best_score = float('inf')
+        started_at = time.perf_counter()
+        last_improvement = 0
+        stop_reason = "max_generations"
+
+        for gen in range(GENERATIONS):
+            scores = self.score_population(population)
+            if self._memetic_due(gen):
+                self.memetic_batch(population, scores)
+            gen_best = int(scores.argmin())
+            if scores[gen_best] < best_score:
+                best_score = int(scores[gen_best])
+                best_individual = population[gen_best].copy()
+                last_improvement = gen
+            if self.archive is not None:
+                self.archive.add_population(population, scores)
+
+            if best_score == 0:
+                print("Tìm thấy giải pháp hoàn hảo!")
+                stop_reason = "optimal"
+                break
+
+            if self.on_progress is not None and self.on_progress(gen, best_individual, best_score):
+                stop_reason = "cancelled"
+                break
+
+            early_stop = self._early_stop_reason(
+                gen, started_at, last_improvement,
+                lambda: len({row.tobytes() for row in population}) / len(population)
+            )
+            if early_stop:
+                stop_reason = early_stop
+                break
+
+            population = self.next_generation(population, scores)
+
+            if gen % 20 == 0:
+                print(f"Thế hệ {gen}: Điểm tốt nhất (penalty) = {best_score}")
+
+        self._finish_run(stop_reason, gen + 1, started_at, last_improvement, best_individual, best_score)
 
+        return self.decode_result(best_individual), best_score
+
+    def _early_stop_reason(self, gen, started_at, last_improvement, population_diversity):
+        if self.max_ms is not None and (time.perf_counter() - started_at) * 1000 >= self.max_ms:
+            return "deadline"
+        if self.stagnation_generations and gen - last_improvement >= self.stagnation_generations:
+            return "stagnation"
+        # population_diversity chỉ được tính khi cần (tốn thêm 1 lần duyệt quần thể)
+        if self.min_diversity is not None and population_diversity() <= self.min_diversity:
+            return "diversity_collapse"
+        return None
+
+    def _finish_run(self, stop_reason, generations, started_at, last_improvement, best_individual, best_score):
+        self.best_individual = [int(slot_index) for slot_index in best_individual]
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        self.stats = {
+            "engine": "ga",
+            "stop_reason": stop_reason,
+            "generations": generations,
+            "best_generation": last_improvement,
+            "evaluations": self.evaluations,
+            "elapsed_ms": round(elapsed_ms, 2),
+        }
+        if self.vectorized and self.fitness_cache is not None:
+            self.stats["fitness_cache"] = self.fitness_cache.stats()
+        if self.memetic_interval:
+            self.stats["memetic"] = {**self.memetic_stats, "elapsed_ms": round(self.memetic_stats["elapsed_ms"], 2)}
+        print(f"Hoàn tất GA! Điểm cuối cùng = {best_score} ({stop_reason}, {generations} thế hệ, {elapsed_ms:.0f} ms)")
 # ----------------------------------------------------
 # HÀM "CÔNG KHAI" ĐỂ main.py GỌI
 # ----------------------------------------------------
-def find_optimal_schedule(subjects, time_slots, constraints, priorities=None, additional_constraints=None, subject_details=None):
-    ga = ScheduleGA(subjects, time_slots, constraints, priorities, additional_constraints, subject_details)
-    final_schedule, final_cost = ga.run_ga()
-    return final_schedule, final_cost
\ No newline at end of file
+def _progress_callback(problem, on_progress, should_stop, interval_ms):
+    """Callback cho solver: gửi lịch tốt nhất khi cải thiện, hỏi should_stop tối đa 1 lần mỗi interval_ms"""
+    started_at = time.perf_counter()
+    last = {"checked_at": None, "penalty": None}
+
+    def report(generation, individual, penalty):
+        now = time.perf_counter()
+        if last["checked_at"] is not None and (now - last["checked_at"]) * 1000 < interval_ms:
+            return False
+        last["checked_at"] = now
+        if on_progress is not None and individual is not None and penalty != last["penalty"]:
+            last["penalty"] = penalty
+            on_progress({
+                "generation": int(generation),
+                "penalty": int(penalty),
+                "schedule": problem.decode_result(individual),
+                "elapsed_ms": round((now - started_at) * 1000, 2),
+            })
+        return bool(should_stop is not None and should_stop())
+
+    return report
+
+def find_optimal_schedule(subjects, time_slots, constraints, priorities=None, additional_constraints=None, subject_details=None,
+                          max_ms=DEFAULT_MAX_MS, stagnation_generations=DEFAULT_STAGNATION_GENERATIONS,
+                          min_diversity=DEFAULT_MIN_DIVERSITY, return_stats=False,
+                          engine="auto", exact_max_subjects=EXACT_MAX_SUBJECTS, seed=None,
+                          on_progress=None, should_stop=None, progress_interval_ms=100,
+                          top_k=1, min_distance=None, memetic_interval=DEFAULT_MEMETIC_INTERVAL,
+                          memetic_elites=DEFAULT_MEMETIC_ELITES, memetic_max_ms=None, reduce_domains=True,
+                          seed_ratio=DEFAULT_SEED_RATIO):
+    """
+    on_progress(event): nhận lịch tốt nhất hiện tại {generation, penalty, schedule, elapsed_ms} mỗi khi cải thiện.
+    should_stop(): trả về True để dừng sớm và lấy lịch tốt nhất hiện tại (stop_reason = 'cancelled').
+    top_k > 1: stats['alternatives'] chứa thêm tối đa top_k - 1 lịch {schedule, cost} khác lịch tốt nhất
+    ở ít nhất min_distance môn (mặc định 20% số môn).
+    memetic_*: leo đồi trên elite của GA (memetic_interval=0 để tắt, memetic_max_ms = ngân sách riêng).
+    reduce_domains: chỉ xếp mỗi môn vào các slot khớp ngày/giờ học thật trong subject_details ('days',
+    'start_time', 'end_time'); môn chỉ có 1 slot hợp lệ được cố định. stats['domain'] ghi kích thước không gian tìm kiếm.
+    seed_ratio: tỷ lệ quần thể ban đầu của GA sinh bằng xếp tham lam (0 = hoàn toàn ngẫu nhiên).
+    """
+    # Import tại đây vì solvers.py cũng import ScheduleGA từ module này
+    from .solvers import solve_problem
+
+    problem = CompiledProblem(subjects, time_slots, constraints, priorities, additional_constraints, subject_details,
+                              reduce_domains=reduce_domains)
+    report = None
+    if on_progress is not None or should_stop is not None:
+        report = _progress_callback(problem, on_progress, should_stop, progress_interval_ms)
+    archive = None
+    if top_k > 1:
+        archive = SolutionArchive(top_k, min_distance or max(1, round(problem.num_subjects * 0.2)))
+    individual, final_cost, stats = solve_problem(
+        problem,
+        engine=engine,
+        max_ms=max_ms,
+        seed=seed,
+        on_progress=report,
+        archive=archive,
+        exact_max_subjects=exact_max_subjects,
+        stagnation_generations=stagnation_generations,
+        min_diversity=min_diversity,
+        memetic_interval=memetic_interval,
+        memetic_elites=memetic_elites,
+        memetic_max_ms=memetic_max_ms,
+        seed_ratio=seed_ratio,
+    )
+    final_schedule = problem.decode_result(individual)
+    stats["domain"] = problem.domain_stats()
+    if archive is not None:
+        best_genes = [int(slot_index) for slot_index in individual]
+        stats["alternatives"] = [
+            {"schedule": problem.decode_result(genes), "cost": penalty}
+            for genes, penalty in archive.items() if genes != best_genes
+        ][:top_k - 1]
+        # Số lịch thay thế còn thiếu (bài toán không có đủ lời giải khác nhau ở ít nhất min_distance môn)
+        stats["alternatives_missing"] = top_k - 1 - len(stats["alternatives"])
+    if return_stats:
+        return final_schedule, final_cost, stats
+    return final_schedule, final_cost
+
+# ----------------------------------------------------
+# MÔ HÌNH ĐẢO (Island model) - chạy song song nhiều quần thể
+# ----------------------------------------------------
+DEFAULT_NUM_ISLANDS = 4
+DEFAULT_MIGRATION_INTERVAL = 20  # Số thế hệ mỗi epoch (giữa 2 lần di cư)
+DEFAULT_MIGRATION_SIZE = 5
+
+_island_ga = None  # ScheduleGA dùng riêng trong mỗi worker process
+
+def _init_island_worker(problem, memetic):
+    # Mỗi process tạo GA trên bài toán đã biên dịch 1 lần
+    global _island_ga
+    _island_ga = ScheduleGA.from_problem(problem)
+    _island_ga.init_memetic(*memetic)
+
+def _evolve_island(island, generations, start_generation, max_ms):
+    """
+    1 epoch của 1 đảo. island mang theo mọi trạng thái riêng của đảo (quần thể, rng, trạng thái memetic) nên
+    kết quả không phụ thuộc process nào chạy đảo đó. Dừng giữa epoch nếu hết max_ms (tính trong process này).
+    """
+    ga = _island_ga
+    ga.rng = island["rng"]
+    ga.memetic_stats = island["memetic_stats"]
+    ga._local_optima = island["local_optima"]
+    evaluations_before = ga.evaluations
+    deadline = None if max_ms is None else time.perf_counter() + max_ms / 1000
+    population, scores, done = ga.evolve(island["population"], generations, start_generation, deadline)
+    return {
+        **island,
+        "population": population,
+        "scores": scores,
+        "rng": ga.rng,
+        "generations": done,
+        "evaluations": island["evaluations"] + ga.evaluations - evaluations_before,
+    }
+
+def _migration_targets(island, num_islands, topology):
+    if topology == "ring":
+        return [(island + 1) % num_islands]
+    if topology == "fully_connected":
+        return [other for other in range(num_islands) if other != island]
+    raise ValueError(f"Topology không hợp lệ: {topology}")
+
+def run_islands(problem, seed=None, max_ms=None, on_progress=None, archive=None, num_islands=DEFAULT_NUM_ISLANDS,
+                population_size=100, generations=200, migration_interval=DEFAULT_MIGRATION_INTERVAL,
+                migration_size=DEFAULT_MIGRATION_SIZE, topology="ring", max_workers=None, parallel=True,
+                stagnation_generations=DEFAULT_STAGNATION_GENERATIONS, memetic_interval=DEFAULT_MEMETIC_INTERVAL,
+                memetic_elites=DEFAULT_MEMETIC_ELITES, memetic_max_ms=None, seed_ratio=DEFAULT_SEED_RATIO):
+    """
+    Chạy num_islands quần thể độc lập trên bài toán đã biên dịch (mỗi đảo trong 1 process), cứ migration_interval
+    thế hệ thì gửi migration_size cá thể tốt nhất sang đảo kế bên (ring) hoặc mọi đảo (fully_connected) để thay
+    các cá thể kém nhất. Quần thể ban đầu có gieo hạt tham lam (seed_ratio), mỗi đảo leo đồi memetic như GA.
+    Cùng seed cho cùng kết quả, kể cả khi chạy song song (khi không bị cắt bởi max_ms).
+    Trả về (cá thể, penalty, stats) như các Solver.
+    """
+    started_at = time.perf_counter()
+    deadline = None if max_ms is None else started_at + max_ms / 1000
+
+    # Mỗi đảo có bộ sinh số ngẫu nhiên riêng, tách ra từ cùng 1 seed
+    seeder = ScheduleGA.from_problem(problem)
+    islands = []
+    for child in np.random.SeedSequence(seed).spawn(num_islands):
+        seeder.rng = np.random.default_rng(child)
+        islands.append({
+            "population": seeder.create_population(population_size, seed_ratio),
+            "rng": seeder.rng,
+            "memetic_stats": {"phases": 0, "improved": 0, "elapsed_ms": 0.0},
+            "local_optima": set(),
+            "evaluations": 0,
+        })
+    memetic = (memetic_interval, memetic_elites, memetic_max_ms, max_ms)
+
+    pool = None
+    if parallel and num_islands > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(
+            max_workers=min(num_islands, max_workers or os.cpu_count() or 1),
+            initializer=_init_island_worker,
+            initargs=(problem, memetic),
+        )
+    else:
+        _init_island_worker(problem, memetic)
+
+    best_individual = None
+    best_score = float('inf')
+    generations_done = 0
+    last_improvement = 0
+    stop_reason = "max_generations"
+    try:
+        while generations_done < generations:
+            epoch = min(migration_interval, generations - generations_done)
+            remaining_ms = None if deadline is None else max((deadline - time.perf_counter()) * 1000, 0)
+            if pool is not None:
+                futures = [pool.submit(_evolve_island, island, epoch, generations_done, remaining_ms)
+                           for island in islands]
+                islands = [future.result() for future in futures]
+            else:
+                islands = [_evolve_island(island, epoch, generations_done, remaining_ms) for island in islands]
+            generations_done += max(island["generations"] for island in islands)
+
+            for island in islands:
+                island_best = int(island["scores"].argmin())
+                if island["scores"][island_best] < best_score:
+                    best_score = int(island["scores"][island_best])
+                    best_individual = island["population"][island_best].copy()
+                    last_improvement = generations_done
+                if archive is not None:
+                    archive.add_population(island["population"], island["scores"])
+
+            if best_score == 0:
+                stop_reason = "optimal"
+                break
+            if on_progress is not None and on_progress(generations_done, best_individual, best_score):
+                stop_reason = "cancelled"
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                stop_reason = "deadline"
+                break
+            if stagnation_generations and generations_done - last_improvement >= stagnation_generations:
+                stop_reason = "stagnation"
+                break
+
+            # Di cư: cá thể tốt nhất của mỗi đảo thay cá thể kém nhất ở đảo đích (thứ tự cố định)
+            emigrants = []
+            for island in islands:
+                order = np.argsort(island["scores"], kind='stable')[:migration_size]
+                emigrants.append((island["population"][order].copy(), island["scores"][order].copy()))
+            for index in range(num_islands):
+                for target in _migration_targets(index, num_islands, topology):
+                    migrants, migrant_scores = emigrants[index]
+                    worst = np.argsort(islands[target]["scores"], kind='stable')[::-1][:len(migrants)]
+                    islands[target]["population"][worst] = migrants
+                    islands[target]["scores"][worst] = migrant_scores
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    print(f"Hoàn tất GA đảo ({num_islands} đảo)! Điểm cuối cùng = {best_score} ({stop_reason}, {elapsed_ms:.0f} ms)")
+    stats = {
+        "engine": "islands",
+        "stop_reason": stop_reason,
+        "generations": generations_done,
+        "best_generation": last_improvement,
+        "evaluations": sum(island["evaluations"] for island in islands),
+        "elapsed_ms": round(elapsed_ms, 2),
+        "islands": num_islands,
+        "topology": topology,
+    }
+    if memetic_interval:
+        stats["memetic"] = {
+            "phases": sum(island["memetic_stats"]["phases"] for island in islands),
+            "improved": sum(island["memetic_stats"]["improved"] for island in islands),
+            "elapsed_ms": round(sum(island["memetic_stats"]["elapsed_ms"] for island in islands), 2),
+        }
+    return [int(slot_index) for slot_index in best_individual], best_score, stats
@@ -0,0 +1,142 @@
+# smart-scheduler-api/genetic_algorithm/section_selection.py
+"""
+Chọn nhóm lớp cho mọi môn cùng lúc: mỗi môn chọn đúng 1 nhóm (hoặc bị loại), các nhóm được chọn không trùng lịch
+và tổng priority các môn giữ lại là lớn nhất. Quay lui + kiểm tra trước (forward checking) trên đồ thị trùng lịch
+giữa mọi nhóm lớp, tính 1 lần bằng ConflictIndex.
+"""
+import time
+
+from .conflicts import ConflictIndex
+
+DEFAULT_SELECTION_MAX_MS = 200
+# Điểm thưởng nhỏ cho từng nhóm (tổng thưởng không bao giờ bằng 1 đơn vị priority):
+# giữ nhóm gốc > nhóm thay thế nằm trong slot rảnh > nhóm thay thế khác
+ORIGINAL_BONUS = 2
+AVAILABLE_BONUS = 1
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def select_sections(candidates, priorities, bonuses=None, max_ms=DEFAULT_SELECTION_MAX_MS):
+    """
+    candidates[i]: các entry (nhóm lớp, mỗi entry là 1 object riêng) có thể chọn cho môn i.
+    priorities[i]: priority của môn i; bonuses[i][k]: điểm thưởng nhỏ của nhóm k (mặc định 0).
+    Các môn được duyệt theo thứ tự truyền vào (nên sắp priority giảm dần): khi hòa điểm, môn đứng trước được giữ.
+    Trả về (chosen, stats): chosen[i] = index nhóm được chọn của môn i, None nếu môn bị loại.
+    Hết max_ms thì trả về lời giải tốt nhất đã tìm được (stats['optimal'] = False).
+    """
+    started_at = time.perf_counter()
+    deadline = None if max_ms is None else started_at + max_ms / 1000
+    num_subjects = len(candidates)
+    bonuses = bonuses or [[0] * len(sections) for sections in candidates]
+
+    # Đánh số toàn cục các nhóm lớp; trọng số = priority * scale + thưởng (scale đủ lớn để thưởng chỉ phân định hòa)
+    scale = max((bonus for row in bonuses for bonus in row), default=0) * num_subjects + 1
+    owner, local_index, weight, domains = [], [], [], []
+    for i, sections in enumerate(candidates):
+        domain = 0
+        for k in range(len(sections)):
+            domain |= 1 << len(owner)
+            owner.append(i)
+            local_index.append(k)
+            weight.append(priorities[i] * scale + bonuses[i][k])
+        domains.append(domain)
+    sections = [section for row in candidates for section in row]
+
+    # Đồ thị trùng lịch: adjacency[g] = bitmask các nhóm (của môn khác) trùng với nhóm g
+    adjacency = [0] * len(sections)
+    index = ConflictIndex(sections)
+    edges = 0
+    position_of = {id(section): g for g, section in enumerate(sections)}
+    for section_a, section_b in index.conflicts():
+        a, b = position_of[id(section_a)], position_of[id(section_b)]
+        if owner[a] != owner[b]:
+            adjacency[a] |= 1 << b
+            adjacency[b] |= 1 << a
+            edges += 1
+
+    # Trong domain, thử nhóm trọng số cao trước (cùng trọng số: thứ tự truyền vào)
+    ordered = [sorted(_bits(domain), key=lambda g: (-weight[g], g)) for domain in domains]
+
+    # Lời giải ban đầu: tham lam theo thứ tự môn
+    chosen = [None] * num_subjects
+    blocked = 0
+    value = 0
+    for i in range(num_subjects):
+        for g in ordered[i]:
+            if not blocked >> g & 1:
+                chosen[i], blocked, value = g, blocked | adjacency[g], value + weight[g]
+                break
+    best = [value, chosen[:]]
+
+    nodes = [0]
+    current = [None] * num_subjects
+
+    def upper_bound(depth, current_domains):
+        # Phủ các môn chưa xét bằng "clique": mọi nhóm trong 1 clique đôi một trùng lịch nên chọn được tối đa 1,
+        # cận trên = tổng trọng số lớn nhất của từng clique (chặt hơn cộng max của từng môn)
+        cliques = []  # [bitmask các nhóm, trọng số lớn nhất]
+        for j in range(depth, num_subjects):
+            domain = current_domains[j]
+            if not domain:
+                continue
+            members = list(_bits(domain))
+            best_weight = max(weight[g] for g in members)
+            for clique in cliques:
+                if all(adjacency[g] & clique[0] == clique[0] for g in members):
+                    clique[0] |= domain
+                    clique[1] = max(clique[1], best_weight)
+                    break
+            else:
+                cliques.append([domain, best_weight])
+        return sum(clique_weight for _, clique_weight in cliques)
+
+    def search(depth, current_domains, value):
+        nodes[0] += 1
+        if nodes[0] % 1024 == 0 and deadline is not None and time.perf_counter() > deadline:
+            raise _SearchTimeout()
+        if depth == num_subjects:
+            if value > best[0]:
+                best[0], best[1] = value, current[:]
+            return
+        if value + upper_bound(depth, current_domains) <= best[0]:
+            return
+
+        domain = current_domains[depth]
+        for g in ordered[depth]:
+            if not domain >> g & 1:
+                continue
+            # Forward checking: bỏ các nhóm trùng với g khỏi domain của các môn chưa xét
+            removed = ~adjacency[g]
+            next_domains = current_domains[:depth + 1] + [
+                other & removed for other in current_domains[depth + 1:]
+            ]
+            current[depth] = g
+            search(depth + 1, next_domains, value + weight[g])
+        # Loại môn này
+        current[depth] = None
+        search(depth + 1, current_domains, value)
+
+    try:
+        search(0, domains, 0)
+        optimal = True
+    except _SearchTimeout:
+        optimal = False
+
+    stats = {
+        "optimal": optimal,
+        "nodes": nodes[0],
+        "sections": len(sections),
+        "conflict_edges": edges,
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2),
+    }
+    return [None if g is None else local_index[g] for g in best[1]], stats
@@ -0,0 +1,76 @@
+# smart-scheduler-api/genetic_algorithm/solution_cache.py
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+
+
+class SolutionCache:
+    """
+    Cache kết quả xếp lịch giữa các request, khóa theo input đã chuẩn hóa + phiên bản danh mục.
+    Hết hạn theo TTL và bỏ phần tử ít dùng nhất khi vượt max_entries.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = max_entries or int(os.getenv("SOLUTION_CACHE_SIZE", 512))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("SOLUTION_CACHE_TTL", 600))
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(schedule_input, catalog_version):
+        """
+        Hash ổn định của subjects, slots, constraints, additionalConstraints, ngân sách thời gian (max_ms)
+        và phiên bản danh mục. max_ms nằm trong khóa: lời giải bị cắt ở deadline ngắn không được trả cho
+        request có ngân sách khác.
+        """
+        payload = schedule_input.model_dump(mode="json", exclude={"use_cache", "save_alternatives"})
+        # Danh sách giờ cấm được dùng như tập hợp nên thứ tự không quan trọng
+        payload["constraints"] = {
+            name: sorted(slots) for name, slots in (payload.get("constraints") or {}).items()
+        }
+        payload["catalog_version"] = catalog_version
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Dùng chung cho toàn bộ app (mỗi worker uvicorn có cache riêng)
+solution_cache = SolutionCache()
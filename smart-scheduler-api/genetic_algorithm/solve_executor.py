@@ -0,0 +1,186 @@
+# smart-scheduler-api/genetic_algorithm/solve_executor.py
+import os
+import queue
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from .scheduler_ga import find_optimal_schedule
+
+
+class QueueFullError(Exception):
+    """Hàng đợi giải lịch đã đầy, client nên thử lại sau"""
+
+
+def _solve_with_progress(progress_queue, stop_event, args, kwargs):
+    # Chạy trong process con: đẩy lịch tốt nhất vào queue, dừng khi stop_event được set
+    return find_optimal_schedule(*args, on_progress=progress_queue.put, should_stop=stop_event.is_set, **kwargs)
+
+
+class SolveExecutor:
+    """
+    Chạy GA trong các process riêng để không chặn event loop của uvicorn.
+    - Số process chạy đồng thời bị giới hạn bởi max_workers.
+    - Số yêu cầu đang chờ + đang chạy bị giới hạn bởi max_queue.
+    - Job bất đồng bộ được giữ trong bộ nhớ job_ttl_seconds sau khi xong. Job chỉ nằm trong bộ nhớ của worker
+      uvicorn đã nhận POST /api/schedule/jobs: chạy nhiều worker thì GET /api/schedule/jobs/{id} phải tới
+      đúng worker đó (sticky session), nếu không sẽ 404.
+    - Stream cũng vậy: stream_id chỉ có trong bộ nhớ của worker đang giữ kết nối SSE, nên
+      POST /api/schedule/stream/{id}/accept phải tới đúng worker đó (sticky session), nếu không sẽ 404.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None, job_ttl_seconds=600):
+        self.max_workers = max_workers or int(os.getenv("SOLVER_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        self.max_queue = max_queue or int(os.getenv("SOLVER_MAX_QUEUE", 32))
+        self.job_ttl = timedelta(seconds=job_ttl_seconds)
+        self.jobs = {}  # job_id -> thông tin job
+        self.streams = {}  # stream_id -> {owner_id, stop_event} của các lần giải đang stream
+        self._pool = None
+        self._manager = None  # Manager tạo queue/event dùng chung giữa các process (chỉ khi stream)
+        self._pending = 0  # số lần solve đang chờ hoặc đang chạy
+        self._tasks = set()  # Giữ tham chiếu tới các task để không bị GC
+
+    def _get_pool(self):
+        # Tạo pool khi dùng lần đầu (không spawn process lúc import)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _get_manager(self):
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager
+
+    def _active_jobs(self):
+        return sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    async def solve(self, *args, **kwargs):
+        """Gọi find_optimal_schedule trong process pool"""
+        if self._pending >= self.max_queue:
+            raise QueueFullError("Hệ thống đang bận, vui lòng thử lại sau.")
+        try:
+            self._pending += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_pool(),
+                functools.partial(find_optimal_schedule, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+
+    async def solve_stream(self, *args, owner_id=None, **kwargs):
+        """
+        Như solve nhưng trả về dần các sự kiện:
+        started (stream_id) -> progress (generation, penalty, schedule) -> result (kết quả của find_optimal_schedule).
+        Đóng generator giữa chừng (client ngắt kết nối) sẽ dừng solver ngay.
+        """
+        if self._pending >= self.max_queue:
+            raise QueueFullError("Hệ thống đang bận, vui lòng thử lại sau.")
+        stream_id = str(uuid4())
+        stop_event = None
+        try:
+            self._pending += 1
+            # Lỗi khi tạo Manager/queue vẫn đi qua finally (không làm rò _pending)
+            manager = self._get_manager()
+            progress_queue = manager.Queue()
+            stop_event = manager.Event()
+            self.streams[stream_id] = {"owner_id": owner_id, "stop_event": stop_event}
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._get_pool(),
+                functools.partial(_solve_with_progress, progress_queue, stop_event, args, kwargs)
+            )
+            yield {"type": "started", "stream_id": stream_id}
+            while True:
+                try:
+                    event = await asyncio.to_thread(progress_queue.get, True, 0.2)
+                except queue.Empty:
+                    if future.done():
+                        break
+                    continue
+                yield {"type": "progress", **event}
+            yield {"type": "result", "result": await future}
+        finally:
+            if stop_event is not None:
+                stop_event.set()
+            self.streams.pop(stream_id, None)
+            self._pending -= 1
+
+    def stop_stream(self, stream_id, owner_id=None):
+        """
+        Dừng sớm 1 lần giải đang stream; solver trả về lịch tốt nhất hiện tại.
+        Chỉ thấy stream của worker này: False nếu stream_id thuộc worker khác (hoặc đã xong/không phải của owner_id).
+        """
+        stream = self.streams.get(stream_id)
+        if not stream or stream["owner_id"] != owner_id:
+            return False
+        stream["stop_event"].set()
+        return True
+
+    # === JOB BẤT ĐỒNG BỘ ===
+    def submit_job(self, coro, owner_id=None):
+        """Chạy coroutine ở nền và trả về job_id ngay lập tức"""
+        self._purge_finished_jobs()
+        if self._active_jobs() >= self.max_queue:
+            coro.close()
+            raise QueueFullError("Hàng đợi xếp lịch đã đầy, vui lòng thử lại sau.")
+
+        job_id = str(uuid4())
+        job = {
+            "job_id": job_id,
+            "owner_id": owner_id,
+            "status": "queued",
+            "created_at": datetime.now(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        try:
+            task = asyncio.create_task(self._run_job(job, coro))
+        except Exception:
+            coro.close()
+            raise
+        self.jobs[job_id] = job
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _run_job(self, job, coro):
+        job["status"] = "running"
+        try:
+            job["result"] = await coro
+            job["status"] = "done"
+        except Exception as e:
+            # HTTPException có detail, các lỗi khác dùng str(e)
+            job["error"] = getattr(e, "detail", None) or str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.now()
+
+    def get_job(self, job_id):
+        self._purge_finished_jobs()
+        return self.jobs.get(job_id)
+
+    def _purge_finished_jobs(self):
+        expired_before = datetime.now() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < expired_before
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+# Dùng chung cho toàn bộ app
+solve_executor = SolveExecutor()
@@ -0,0 +1,173 @@
+# smart-scheduler-api/genetic_algorithm/solvers.py
+import time
+
+from .exact_solver import ExactSolver, EXACT_MAX_SUBJECTS
+from .local_search import SimulatedAnnealing, TabuSearch
+from .scheduler_ga import (
+    ScheduleGA, run_islands, DEFAULT_STAGNATION_GENERATIONS, DEFAULT_MIN_DIVERSITY, DEFAULT_MEMETIC_INTERVAL,
+    DEFAULT_MEMETIC_ELITES, DEFAULT_SEED_RATIO,
+)
+
+# Bài toán vừa (không cần GA) được giao cho tìm kiếm cục bộ
+LOCAL_SEARCH_MAX_SUBJECTS = 16
+# GA bổ sung lời giải thay thế luôn có ít nhất 10% max_ms (có thể vượt max_ms tối đa chừng ấy)
+TOP_UP_MIN_RATIO = 0.1
+
+
+class Solver:
+    """
+    Giao diện chung cho mọi engine: solve(max_ms) -> (cá thể, penalty, stats có key 'engine').
+    on_progress(bước, cá thể tốt nhất, penalty) được gọi định kỳ, trả về True để dừng sớm.
+    archive (SolutionArchive) nếu có sẽ nhận các lời giải engine gặp trong lúc tìm kiếm.
+    """
+    name = None
+
+    def __init__(self, problem, seed=None, on_progress=None, archive=None, **params):
+        self.problem = problem
+        self.seed = seed
+        self.on_progress = on_progress
+        self.archive = archive
+        self.params = params
+
+    def solve(self, max_ms=None):
+        raise NotImplementedError
+
+
+class FixedSolver(Solver):
+    """Mọi môn đều cố định (miền 1 slot): lời giải duy nhất, không cần tìm kiếm"""
+    name = "fixed"
+
+    def solve(self, max_ms=None):
+        started_at = time.perf_counter()
+        individual = self.problem.fixed_genes()
+        penalty = self.problem.calculate_fitness(individual)
+        return individual, penalty, {
+            "engine": self.name,
+            "stop_reason": "optimal",
+            "optimal": True,
+            "evaluations": 1,
+            "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2),
+        }
+
+
+class GASolver(Solver):
+    name = "ga"
+
+    def solve(self, max_ms=None):
+        ga = ScheduleGA.from_problem(self.problem, seed=self.seed)
+        _, penalty = ga.run_ga(
+            max_ms=max_ms,
+            stagnation_generations=self.params.get("stagnation_generations", DEFAULT_STAGNATION_GENERATIONS),
+            min_diversity=self.params.get("min_diversity", DEFAULT_MIN_DIVERSITY),
+            on_progress=self.on_progress,
+            archive=self.archive,
+            memetic_interval=self.params.get("memetic_interval", DEFAULT_MEMETIC_INTERVAL),
+            memetic_elites=self.params.get("memetic_elites", DEFAULT_MEMETIC_ELITES),
+            memetic_max_ms=self.params.get("memetic_max_ms"),
+            seed_ratio=self.params.get("seed_ratio", DEFAULT_SEED_RATIO),
+        )
+        return ga.best_individual, penalty, ga.stats
+
+
+class IslandSolver(Solver):
+    """
+    GA mô hình đảo: nhiều quần thể song song trên nhiều CPU, trao đổi cá thể tốt nhất định kỳ.
+    Không được chọn tự động (mỗi lần giải mở thêm process), dùng engine="islands" cho bài toán lớn
+    (xếp lịch hàng loạt, nhiều học kỳ) để có lời giải tốt hơn trong cùng thời gian.
+    """
+    name = "islands"
+
+    def solve(self, max_ms=None):
+        params = {key: value for key, value in self.params.items() if key != "min_diversity"}  # Đảo tự giữ đa dạng
+        return run_islands(self.problem, seed=self.seed, max_ms=max_ms, on_progress=self.on_progress,
+                           archive=self.archive, **params)
+
+
+class ExactEngine(Solver):
+    name = "exact"
+
+    def solve(self, max_ms=None):
+        return ExactSolver(self.problem).solve(max_ms=max_ms, on_progress=self.on_progress, archive=self.archive)
+
+
+class AnnealingSolver(Solver):
+    name = "annealing"
+
+    def solve(self, max_ms=None):
+        return SimulatedAnnealing(self.problem, seed=self.seed, **self.params).solve(max_ms=max_ms, on_progress=self.on_progress, archive=self.archive)
+
+
+class TabuSolver(Solver):
+    name = "tabu"
+
+    def solve(self, max_ms=None):
+        return TabuSearch(self.problem, seed=self.seed, **self.params).solve(max_ms=max_ms, on_progress=self.on_progress, archive=self.archive)
+
+
+SOLVERS = {solver.name: solver for solver in (
+    FixedSolver, GASolver, IslandSolver, ExactEngine, AnnealingSolver, TabuSolver
+)}
+
+
+def select_solver(problem, exact_max_subjects=EXACT_MAX_SUBJECTS):
+    """Chọn engine và tham số theo số môn, số slot và các ràng buộc đang bật"""
+    num_subjects, num_slots = problem.num_subjects, problem.num_slots
+    if num_subjects and not problem.free_subjects:
+        return "fixed", {}
+    if ExactSolver(problem).is_applicable(exact_max_subjects):
+        return "exact", {}
+    if num_subjects <= LOCAL_SEARCH_MAX_SUBJECTS and num_subjects <= num_slots:
+        if problem.avoid_consecutive or problem.balance_days:
+            # Ràng buộc nhiều gen tạo nhiều vùng bằng phẳng: tabu duyệt hết lân cận nên thoát tốt hơn
+            return "tabu", {"iterations": 10 * num_subjects, "tenure": max(5, num_subjects // 2)}
+        return "annealing", {"iterations": 2000 * num_subjects}
+    return "ga", {}
+
+
+def solve_problem(problem, engine="auto", max_ms=None, seed=None, exact_max_subjects=EXACT_MAX_SUBJECTS,
+                  on_progress=None, archive=None, **ga_params):
+    """Giải bài toán đã biên dịch bằng engine chỉ định hoặc tự chọn (engine='auto')"""
+    if engine == "auto":
+        engine, params = select_solver(problem, exact_max_subjects)
+    else:
+        params = {}
+    if engine in ("ga", "islands"):
+        params.update(ga_params)
+    if engine not in SOLVERS:
+        raise ValueError(f"Engine không hợp lệ: {engine}")
+
+    # Exact chỉ dùng nửa ngân sách, phần còn lại để GA chạy nếu chưa chứng minh được tối ưu
+    budget = max_ms / 2 if engine == "exact" and max_ms is not None else max_ms
+    individual, penalty, stats = SOLVERS[engine](
+        problem, seed=seed, on_progress=on_progress, archive=archive, **params
+    ).solve(max_ms=budget)
+    print(f"Engine {stats['engine']}: penalty = {penalty} ({stats['stop_reason']}, {stats['elapsed_ms']} ms)")
+
+    if archive is not None:
+        archive.add(individual, penalty)
+
+    # Exact chưa chứng minh tối ưu, hoặc archive chưa đủ top_k lời giải khác nhau (exact chỉ cho 1 lời giải,
+    # tabu/annealing/islands có thể hội tụ về ít lời giải): chạy thêm GA để bổ sung
+    need_alternatives = archive is not None and len(archive) < archive.k
+    needs_ga = (engine == "exact" and not stats["optimal"]) or need_alternatives
+    if needs_ga and stats["stop_reason"] != "cancelled":
+        remaining = None
+        if max_ms is not None:
+            # Ngân sách còn lại, tối thiểu TOP_UP_MIN_RATIO * max_ms khi engine chính đã dùng hết
+            remaining = max(max_ms - stats["elapsed_ms"], max_ms * TOP_UP_MIN_RATIO, 1)
+        archived_before = len(archive) if archive is not None else 0
+        ga_seed = seed if engine != "ga" or seed is None else seed + 1  # GA bổ sung không lặp lại đúng lần chạy đầu
+        ga_individual, ga_penalty, ga_stats = GASolver(
+            problem, seed=ga_seed, on_progress=on_progress, archive=archive, **ga_params
+        ).solve(max_ms=remaining)
+        top_up = {
+            "engine": ga_stats["engine"],
+            "elapsed_ms": ga_stats["elapsed_ms"],
+            "added_alternatives": (len(archive) - archived_before) if archive is not None else 0,
+        }
+        if ga_penalty < penalty:
+            individual, penalty, stats = ga_individual, ga_penalty, ga_stats
+        else:
+            stats["top_up"] = top_up
+
+    return individual, penalty, stats
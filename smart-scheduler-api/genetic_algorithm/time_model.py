@@ -0,0 +1,150 @@
+# smart-scheduler-api/genetic_algorithm/time_model.py
+"""
+Mô hình thời gian theo tuần: mỗi lớp học là 1 bitmask 7 ngày x các tick TICK_MINUTES phút.
+Hai lớp trùng giờ <=> (mask_a & mask_b) != 0. Cả danh sách lớp thành ma trận uint64 (n, MASK_WORDS)
+để tính trùng giờ của mọi cặp bằng 1 phép NumPy.
+"""
+import re
+from typing import Any, List, Optional
+
+import numpy as np
+
+DAY_ORDER = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
+# Tick 5 phút: giờ học ở trường thường lệch nhau 5 phút (07:50 kết thúc, 07:55 bắt đầu),
+# tick 15 phút sẽ báo trùng sai cho các tiết liền nhau
+TICK_MINUTES = 5
+TICKS_PER_DAY = 24 * 60 // TICK_MINUTES
+WEEK_TICKS = len(DAY_ORDER) * TICKS_PER_DAY
+MASK_WORDS = (WEEK_TICKS + 63) // 64  # Số uint64 cho 1 tuần
+
+_DAY_TO_INDEX = {day: i for i, day in enumerate(DAY_ORDER)}
+
+
+def parse_minutes(value):
+    """'HH:MM' -> số phút trong ngày, None nếu không đọc được"""
+    try:
+        hour, minute = str(value).strip().split(":")[:2]
+        return int(hour) * 60 + int(minute)
+    except (ValueError, AttributeError):
+        return None
+
+
+def normalize_day_token(raw_value: str) -> Optional[str]:
+    if not raw_value:
+        return None
+    token = str(raw_value).strip().upper()
+    # Chuẩn hoá định dạng thường gặp
+    token = token.replace("THỨ", "T")
+    token = token.replace("THU", "T")
+    token = token.replace(".", "")
+    token = token.replace(" ", "")
+    alias_map = {
+        "T2": "T2",
+        "T3": "T3",
+        "T4": "T4",
+        "T5": "T5",
+        "T6": "T6",
+        "T7": "T7",
+        "CN": "CN",
+        "TH2": "T2",
+        "TH3": "T3",
+        "TH4": "T4",
+        "TH5": "T5",
+        "TH6": "T6",
+        "TH7": "T7",
+        "MON": "T2",
+        "MONDAY": "T2",
+        "TUE": "T3",
+        "TUESDAY": "T3",
+        "WED": "T4",
+        "WEDNESDAY": "T4",
+        "THU": "T5",
+        "THURSDAY": "T5",
+        "FRI": "T6",
+        "FRIDAY": "T6",
+        "SAT": "T7",
+        "SATURDAY": "T7",
+        "SUN": "CN",
+        "SUNDAY": "CN",
+        "CHUNHAT": "CN",
+        "CHUNHẬT": "CN",
+    }
+    if token in alias_map:
+        return alias_map[token]
+    digit_match = re.search(r"([2-7])", token)
+    if digit_match:
+        return f"T{digit_match.group(1)}"
+    if "CN" in token:
+        return "CN"
+    return None
+
+
+def normalize_days(day_value: Any) -> Optional[List[str]]:
+    if day_value is None:
+        return None
+    if isinstance(day_value, (list, tuple, set)):
+        raw_items = list(day_value)
+    else:
+        raw_items = re.split(r"[,&/|;]+", str(day_value)) if isinstance(day_value, str) else [day_value]
+    normalized: List[str] = []
+    for item in raw_items:
+        normalized_token = normalize_day_token(item)
+        if normalized_token and normalized_token not in normalized:
+            normalized.append(normalized_token)
+    return normalized or None
+
+
+def weekly_mask(days, start_time, end_time):
+    """
+    Bitmask (int) các tick lớp chiếm trong tuần, khoảng [start_time, end_time).
+    days None/rỗng = chưa biết ngày, coi như học mọi ngày (giống has_day_overlap).
+    Giờ không đọc được = chiếm cả ngày; giờ lệch tick được làm tròn ra ngoài.
+    """
+    start, end = parse_minutes(start_time), parse_minutes(end_time)
+    if start is None or end is None:
+        first_tick, last_tick = 0, TICKS_PER_DAY
+    else:
+        first_tick = max(0, start // TICK_MINUTES)
+        last_tick = min(TICKS_PER_DAY, -(-end // TICK_MINUTES))
+    if last_tick <= first_tick:
+        return 0
+    day_mask = ((1 << (last_tick - first_tick)) - 1) << first_tick
+
+    day_indices = [_DAY_TO_INDEX[day] for day in days or [] if day in _DAY_TO_INDEX]
+    if not days:
+        day_indices = range(len(DAY_ORDER))
+    mask = 0
+    for day_index in day_indices:
+        mask |= day_mask << (day_index * TICKS_PER_DAY)
+    return mask
+
+
+def mask_matrix(masks):
+    """Danh sách bitmask (int) -> ma trận uint64 (n, MASK_WORDS)"""
+    buffer = b"".join(mask.to_bytes(MASK_WORDS * 8, "little") for mask in masks)
+    return np.frombuffer(buffer, dtype="<u8").reshape(len(masks), MASK_WORDS)
+
+
+def overlap_matrix(matrix):
+    """Ma trận bool (n, n): 2 lớp có ít nhất 1 tick chung trong tuần"""
+    # Chỉ giữ các word có lớp nào đó chiếm (giờ học tập trung vào vài khung trong tuần)
+    matrix = matrix[:, matrix.any(axis=0)]
+    return (matrix[:, np.newaxis, :] & matrix[np.newaxis, :, :]).any(axis=2)
+
+
+def date_overlap_matrix(starts, ends):
+    """Ma trận bool (n, n): ngày bắt đầu của 1 khoảng nằm trong khoảng [start, end] kia (start/end là date)"""
+    starts = np.array([day.toordinal() for day in starts], dtype=np.int64)
+    ends = np.array([day.toordinal() for day in ends], dtype=np.int64)
+    # [i, j]: start của i nằm trong khoảng của j
+    start_inside = (starts[np.newaxis, :] <= starts[:, np.newaxis]) & (starts[:, np.newaxis] <= ends[np.newaxis, :])
+    return start_inside | start_inside.T
+
+
+def conflict_pairs(masks, starts, ends):
+    """Mọi cặp (i, j), i < j, trùng cả khoảng ngày lẫn giờ trong tuần, theo thứ tự (i, j) tăng dần"""
+    if len(masks) < 2:
+        return []
+    conflicts = overlap_matrix(mask_matrix(masks)) & date_overlap_matrix(starts, ends)
+    rows, columns = np.nonzero(np.triu(conflicts, k=1))
+    return list(zip(rows.tolist(), columns.tolist()))
@@ -1,20 +1,30 @@
 # smart-scheduler-api/main.py
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from uuid import uuid4, UUID
 import pandas as pd
 import io
+import json
+import asyncio
+import contextlib
 import traceback
 import random
 import re
 
-from db.database import init_db
+from db.database import init_db, get_database
+from db.retention import chat_retention, collection_stats
+from db.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, encode_cursor, decode_cursor, after_filter
 from db.models import User, Schedule, Course, ChatHistory, OTP
+from db.catalog import (
+    bump_catalog_version, get_catalog_version, refresh_catalog_version, catalog_snapshots, SectionIndex, original_course_code,
+)
 from schemas import (
-    UserCreate, Token, ScheduleInput, SubjectInput,
+    UserCreate, Token, ScheduleInput, SubjectInput, BatchScheduleInput,
     CourseBase, CourseCreate, CourseListResponse, CourseUploadResponse,
     ChatInput, ChatMessage, ChatHistoryResponse, ChatSearchResponse,
     UserResponse, UserListResponse,
@@ -25,7 +35,12 @@ from auth.security import (
     get_current_user, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from chatbot.client import get_bot_response
-from genetic_algorithm.scheduler_ga import find_optimal_schedule
+from genetic_algorithm.scheduler_ga import DEFAULT_MAX_MS
+from genetic_algorithm.solve_executor import solve_executor, QueueFullError
+from genetic_algorithm.solution_cache import solution_cache
+from genetic_algorithm.conflicts import entries_conflict
+from genetic_algorithm.time_model import normalize_days, parse_minutes
+from genetic_algorithm.section_selection import select_sections, ORIGINAL_BONUS, AVAILABLE_BONUS
 
 # =================
 # KHỞI TẠO APP
@@ -46,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Cursor trang sau của /api/chat/history
 )
 
 # =================
@@ -54,6 +70,12 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    chat_retention.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await chat_retention.stop()
+    solve_executor.shutdown()
 
 # =================
 # HELPER FUNCTIONS
@@ -126,6 +148,118 @@ def _parse_pdf_courses(file_bytes: bytes) -> List[Dict[str, Any]]:
         print(f"Lỗi parse PDF: {e}")
     return courses
 
+# =================
+# PHÂN TRANG
+# =================
+def _decode_after(after: Optional[str], size: int, nullable: bool = False) -> Optional[list]:
+    if not after:
+        return None
+    try:
+        return decode_cursor(after, size, nullable)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _parse_cursor_datetime(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+
+def _parse_cursor_uuid(value: Optional[str]) -> UUID:
+    try:
+        return UUID(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+
+# =================
+# HELPER XẾP LỊCH (không cần DB, dùng chung cho API và benchmark)
+# =================
+# Tất cả các slot có thể trong tuần
+ALL_POSSIBLE_SLOTS = [
+    'T2_Sáng', 'T2_Chiều', 'T2_Tối',
+    'T3_Sáng', 'T3_Chiều', 'T3_Tối',
+    'T4_Sáng', 'T4_Chiều', 'T4_Tối',
+    'T5_Sáng', 'T5_Chiều', 'T5_Tối',
+    'T6_Sáng', 'T6_Chiều', 'T6_Tối',
+    'T7_Sáng', 'T7_Chiều', 'T7_Tối',
+    'CN_Sáng', 'CN_Chiều', 'CN_Tối',
+]
+
+def parse_date(value: str) -> datetime.date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def calc_priority(subject: SubjectInput) -> int:
+    base = subject.priority or 5
+    if getattr(subject, "is_retake", False):
+        base += 2
+    return min(10, base)
+
+def selection_order_key(entry: dict):
+    """Thứ tự ưu tiên giữ môn khi trùng lịch: priority cao, môn học lại, môn nhập trước, bắt đầu sớm"""
+    return (
+        -entry["priority"],
+        not getattr(entry["data"], "is_retake", False),
+        entry["original_index"],
+        entry["start"],
+    )
+
+def build_schedule_entries(input: ScheduleInput) -> List[dict]:
+    """Chuẩn hóa các môn trong input thành entry (khoảng ngày, ngày học, priority) để kiểm tra trùng lịch"""
+    entries = []
+    for index, subject in enumerate(input.subjects):
+        try:
+            start_date = parse_date(subject.start_date)
+            end_date = parse_date(subject.end_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Định dạng ngày không hợp lệ cho môn {subject.name}.")
+        entries.append({
+            "data": subject,
+            "priority": calc_priority(subject),
+            "start": start_date,
+            "end": end_date,
+            "days": normalize_days(getattr(subject, "day", None)),
+            "original_index": index,
+        })
+    return entries
+
+def build_solver_args(input: ScheduleInput, active_entries: List[dict]):
+    """Tham số cho find_optimal_schedule từ các môn còn lại sau khi xử lý trùng lịch"""
+    available_slots = input.available_time_slots if input.available_time_slots else ALL_POSSIBLE_SLOTS
+    unavailable_slots = [slot for slot in ALL_POSSIBLE_SLOTS if slot not in available_slots]
+    time_slots_for_ga = available_slots + unavailable_slots
+
+    subject_names = [entry["data"].name for entry in active_entries]
+    priorities = {entry["data"].name: entry["priority"] for entry in active_entries}
+    subject_details = {}
+    for entry in active_entries:
+        subject = entry["data"]
+        subject_details[subject.name] = {
+            "instructor": subject.instructor,
+            "start_time": subject.start_time,
+            "end_time": subject.end_time,
+            "start_date": subject.start_date,
+            "end_date": subject.end_date,
+            "priority": entry["priority"],
+            "is_retake": subject.is_retake or False,
+            "preferred_days": getattr(subject, "preferred_days", None) or [],
+            "days": entry["days"],  # Ngày học thật, dùng để thu hẹp miền slot của môn
+        }
+
+    additional_constraints_dict = {}
+    if input.additionalConstraints:
+        additional_constraints_dict = {
+            'avoidConsecutive': input.additionalConstraints.avoidConsecutive,
+            'balanceDays': input.additionalConstraints.balanceDays,
+            'preferMorning': input.additionalConstraints.preferMorning,
+            'allowSaturday': input.additionalConstraints.allowSaturday
+        }
+
+    additional_constraints_dict['available_slots'] = available_slots
+    additional_constraints_dict['unavailable_slots'] = unavailable_slots
+    return subject_names, time_slots_for_ga, priorities, additional_constraints_dict, subject_details
+
 def admin_required(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Chỉ admin mới có quyền truy cập")
@@ -426,8 +560,35 @@ async def handle_chat(
         return {"reply": error_message, "session_id": session_id}
 
 @app.get("/api/chat/history", response_model=List[ChatHistoryResponse])
-async def get_chat_history(current_user: User = Depends(get_current_user)):
-    messages = await ChatHistory.find({"user_id": current_user.id}).sort("created_at").to_list()
+async def get_chat_history(
+    response: Response,
+    session_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    all_items: bool = Query(False, alias="all"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Lịch sử chat gom theo phiên. Phân trang theo tin nhắn (limit + cursor after, cursor trang sau trong
+    header X-Next-Cursor; 1 phiên có thể nằm ở 2 trang liền nhau); all=true trả về tất cả.
+    """
+    query: Dict[str, Any] = {"user_id": current_user.id}
+    if session_id:
+        query["session_id"] = session_id
+    if all_items:
+        messages = await ChatHistory.find(query).sort("created_at").to_list()
+    else:
+        # Khóa (created_at, _id) tăng dần, dùng index user_created_id / user_session_created_id
+        after_values = _decode_after(after, 2, nullable=True)  # created_at có thể thiếu
+        if after_values:
+            query.update(after_filter(
+                ["created_at", "_id"],
+                [_parse_cursor_datetime(after_values[0]), _parse_cursor_uuid(after_values[1])],
+            ))
+        messages = await ChatHistory.find(query).sort("created_at", "_id").limit(limit + 1).to_list()
+        if len(messages) > limit:
+            messages = messages[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor([messages[-1].created_at, messages[-1].id])
     sessions_dict = {}
     for msg in messages:
         if msg.session_id not in sessions_dict:
@@ -488,16 +649,9 @@ async def get_course_sessions(
 ):
     """Lấy tất cả các sessions (nhóm/lớp) của một môn học."""
     # Nếu course_code có -G, lấy original_code
-    if "-G" in course_code:
-        original_code = course_code.split("-G")[0]
-    else:
-        original_code = course_code
-    
-    query = {"metadata.original_code": original_code}
-    if semester:
-        query["semester"] = semester
-    
-    courses = await Course.find(query).sort("code").to_list()
+    original_code = original_course_code(course_code)
+    snapshot = await catalog_snapshots.get(semester)
+    courses = [section.course for section in snapshot.sessions(original_code)]
     
     sessions = []
     for course in courses:
@@ -525,19 +679,28 @@ async def get_course_sessions(
 async def list_courses(
     semester: Optional[str] = None,
     major: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    all_items: bool = Query(False, alias="all"),
     current_user: User = Depends(get_current_user),
 ):
-    """Lấy danh sách môn học hiện có (đã upload)."""
-    query: Dict[str, Any] = {}
-    if semester:
-        query["semester"] = semester
-    if major:
-        query["major"] = major
-
-    courses = await Course.find(query).sort("code").to_list()
+    """Lấy danh sách môn học hiện có (đã upload), theo trang (limit + cursor after); all=true trả về tất cả."""
+    # Đọc từ snapshot danh mục của học kỳ (đã sắp theo mã), chỉ nạp lại khi admin thay đổi danh mục
+    snapshot = await catalog_snapshots.get(semester)
+    next_cursor = None
+    total = snapshot.count(major)
+    if all_items:
+        courses = [course for course in snapshot.courses if not major or course.major == major]
+    else:
+        after_key = _decode_after(after, 2)
+        courses = snapshot.page(after_key, limit + 1, major)
+        if len(courses) > limit:
+            courses = courses[:limit]
+            next_cursor = encode_cursor(list(snapshot.sort_key(courses[-1])))
 
     return CourseListResponse(
-        total=len(courses),
+        total=total,
+        count=len(courses),
         items=[
             CourseBase(
                 code=course.code,
@@ -550,6 +713,7 @@ async def list_courses(
             )
             for course in courses
         ],
+        next_cursor=next_cursor,
     )
 
 @app.post("/api/admin/upload-courses", response_model=CourseUploadResponse)
@@ -593,6 +757,8 @@ async def upload_courses(
                 await new_course.save()
                 inserted += 1
         
+        if inserted:
+            await bump_catalog_version(semester)
         sample = [CourseBase(**c) for c in courses[:5]]
         return CourseUploadResponse(inserted=inserted, semester=semester, sample=sample)
     except Exception as e:
@@ -617,6 +783,7 @@ async def create_course(
         created_by=current_admin.id,
     )
     await new_course.save()
+    await bump_catalog_version(new_course.semester)
     return CourseBase(
         code=new_course.code,
         name=new_course.name,
@@ -632,10 +799,28 @@ async def create_course(
 # =================
 @app.get("/api/admin/users", response_model=UserListResponse)
 async def list_users(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    all_items: bool = Query(False, alias="all"),
     current_admin: User = Depends(admin_required),
 ):
-    """Lấy danh sách tất cả người dùng (chỉ admin)."""
-    users = await User.find_all().sort("created_at").to_list()
+    """Lấy danh sách người dùng (chỉ admin), theo trang (limit + cursor after); all=true trả về tất cả."""
+    next_cursor = None
+    if all_items:
+        users = await User.find_all().sort("created_at").to_list()
+    else:
+        # Khóa (created_at, _id) tăng dần, dùng index created_at_id: trang nào cũng chỉ đọc limit + 1 user
+        after_values = _decode_after(after, 2, nullable=True)  # created_at có thể thiếu
+        query: Dict[str, Any] = {}
+        if after_values:
+            query = after_filter(
+                ["created_at", "_id"],
+                [_parse_cursor_datetime(after_values[0]), _parse_cursor_uuid(after_values[1])],
+            )
+        users = await User.find(query).sort("created_at", "_id").limit(limit + 1).to_list()
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor([getattr(users[-1], 'created_at', None), users[-1].id])
     
     user_list = []
     for user in users:
@@ -650,8 +835,10 @@ async def list_users(
         ))
     
     return UserListResponse(
-        total=len(user_list),
-        users=user_list
+        total=len(user_list) if all_items else await User.find_all().count(),
+        count=len(user_list),
+        users=user_list,
+        next_cursor=next_cursor,
     )
 
 @app.delete("/api/admin/users/{user_id}")
@@ -717,6 +904,55 @@ async def toggle_admin_status(
         )
     }
 
+@app.post("/api/admin/schedule/batch")
+async def batch_schedule(
+    batch: BatchScheduleInput,
+    current_admin: User = Depends(admin_required),
+):
+    """Xếp lịch cho cả khóa (nhiều sinh viên), trả kết quả từng sinh viên qua Server-Sent Events."""
+    return StreamingResponse(
+        _batch_schedule_events(batch, current_admin),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/admin/solution-cache/stats")
+async def get_solution_cache_stats(
+    current_admin: User = Depends(admin_required),
+):
+    """Thống kê cache kết quả xếp lịch (tỷ lệ hit, kích thước) của worker hiện tại."""
+    return solution_cache.stats()
+
+@app.get("/api/admin/catalog/stats")
+async def get_catalog_snapshot_stats(
+    current_admin: User = Depends(admin_required),
+):
+    """Thống kê snapshot danh mục môn học (học kỳ đang giữ trong bộ nhớ, số lần nạp lại) của worker hiện tại."""
+    return {**catalog_snapshots.stats(), "catalog_version": get_catalog_version()}
+
+@app.get("/api/admin/db/stats")
+async def get_db_stats(
+    current_admin: User = Depends(admin_required),
+):
+    """Kích thước các collection (số document, dữ liệu, index) và trạng thái dọn lịch sử chat."""
+    return {
+        "collections": await collection_stats(get_database()),
+        "chat_retention": chat_retention.stats(),
+    }
+
+@app.post("/api/admin/chat-retention/run")
+async def run_chat_retention(
+    current_admin: User = Depends(admin_required),
+):
+    """Chạy dọn lịch sử chat ngay (không chờ lượt định kỳ)."""
+    if not chat_retention.enabled:
+        raise HTTPException(status_code=400, detail="Chưa bật lưu giữ lịch sử chat (CHAT_RETENTION_DAYS = 0)")
+    try:
+        return await chat_retention.run_once()
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Lỗi dọn lịch sử chat: {e}")
+
 # =================
 # API SCHEDULE - VỚI TỰ ĐỘNG TÌM SESSIONS THAY THẾ
 # =================
@@ -725,435 +961,534 @@ async def handle_schedule(
     input: ScheduleInput,
     current_user: User = Depends(get_current_user)
 ):
+    return await _solve_schedule(input, current_user)
+
+@app.post("/api/schedule/jobs", status_code=202)
+async def create_schedule_job(
+    input: ScheduleInput,
+    current_user: User = Depends(get_current_user)
+):
+    """Tạo job xếp lịch chạy nền, trả về job_id để client hỏi kết quả sau"""
     try:
-        print(f"Nhận yêu cầu xếp lịch từ user: {current_user.username}")
-        print(f"Số môn học: {len(input.subjects)}")
-        
-        # 1. Chuẩn hóa dữ liệu
-        def parse_date(value: str) -> datetime.date:
-            return datetime.strptime(value, "%Y-%m-%d").date()
-
-        def calc_priority(subject: SubjectInput) -> int:
-            base = subject.priority or 5
-            if getattr(subject, "is_retake", False):
-                base += 2
-            return min(10, base)
-
-        def normalize_day_token(raw_value: str) -> Optional[str]:
-            if not raw_value:
-                return None
-            token = str(raw_value).strip().upper()
-            # Chuẩn hoá định dạng thường gặp
-            token = token.replace("THỨ", "T")
-            token = token.replace("THU", "T")
-            token = token.replace(".", "")
-            token = token.replace(" ", "")
-            alias_map = {
-                "T2": "T2",
-                "T3": "T3",
-                "T4": "T4",
-                "T5": "T5",
-                "T6": "T6",
-                "T7": "T7",
-                "CN": "CN",
-                "TH2": "T2",
-                "TH3": "T3",
-                "TH4": "T4",
-                "TH5": "T5",
-                "TH6": "T6",
-                "TH7": "T7",
-                "MON": "T2",
-                "MONDAY": "T2",
-                "TUE": "T3",
-                "TUESDAY": "T3",
-                "WED": "T4",
-                "WEDNESDAY": "T4",
-                "THU": "T5",
-                "THURSDAY": "T5",
-                "FRI": "T6",
-                "FRIDAY": "T6",
-                "SAT": "T7",
-                "SATURDAY": "T7",
-                "SUN": "CN",
-                "SUNDAY": "CN",
-                "CHUNHAT": "CN",
-                "CHUNHẬT": "CN",
-            }
-            if token in alias_map:
-                return alias_map[token]
-            digit_match = re.search(r"([2-7])", token)
-            if digit_match:
-                return f"T{digit_match.group(1)}"
-            if "CN" in token:
-                return "CN"
-            return None
-
-        def normalize_days(day_value: Any) -> Optional[List[str]]:
-            if day_value is None:
-                return None
-            if isinstance(day_value, (list, tuple, set)):
-                raw_items = list(day_value)
-            else:
-                raw_items = re.split(r"[,&/|;]+", str(day_value)) if isinstance(day_value, str) else [day_value]
-            normalized: List[str] = []
-            for item in raw_items:
-                normalized_token = normalize_day_token(item)
-                if normalized_token and normalized_token not in normalized:
-                    normalized.append(normalized_token)
-            return normalized or None
-
-        def has_day_overlap(entry_a: dict, entry_b: dict) -> bool:
-            days_a = entry_a.get("days")
-            days_b = entry_b.get("days")
-            if days_a and days_b:
-                return bool(set(days_a) & set(days_b))
-            return True
-
-        entries = []
-        for index, subject in enumerate(input.subjects):
-            try:
-                start_date = parse_date(subject.start_date)
-                end_date = parse_date(subject.end_date)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Định dạng ngày không hợp lệ cho môn {subject.name}.")
-            entries.append({
-                "data": subject,
-                "priority": calc_priority(subject),
-                "start": start_date,
-                "end": end_date,
-                "days": normalize_days(getattr(subject, "day", None)),
-                "original_index": index,
-            })
+        job_id = solve_executor.submit_job(_solve_schedule(input, current_user), owner_id=current_user.id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
 
-        removed_conflicts = []
-        alternative_sessions_used = []
-
-        def find_conflicts(items):
-            conflicts = []
-            for i in range(len(items)):
-                for j in range(i + 1, len(items)):
-                    a = items[i]
-                    b = items[j]
-                    # Kiểm tra trùng khoảng thời gian (ngày)
-                    if b["start"] <= a["start"] <= b["end"] or a["start"] <= b["start"] <= a["end"]:
-                        if not has_day_overlap(a, b):
-                            continue
-                        # Kiểm tra trùng giờ học
-                        a_start_time = a["data"].start_time
-                        a_end_time = a["data"].end_time
-                        b_start_time = b["data"].start_time
-                        b_end_time = b["data"].end_time
-                        if (a_start_time < b_end_time and a_end_time > b_start_time):
-                            conflicts.append((a, b))
-            return conflicts
-
-        async def find_alternative_sessions_from_db(original_code: str, semester: str, 
-                                                   conflicting_with: dict, 
-                                                   all_active_entries: list,
-                                                   remove_entry_ref: dict):
-            """Tìm sessions thay thế từ database"""
-            query = {"metadata.original_code": original_code}
-            if semester:
-                query["semester"] = semester
-            
-            courses = await Course.find(query).to_list()
-            alternatives = []
-            
-            for course in courses:
-                if not course.metadata or "start_date" not in course.metadata:
-                    continue
-                
-                try:
-                    alt_start_date = parse_date(course.metadata.get("start_date"))
-                    alt_end_date = parse_date(course.metadata.get("end_date"))
-                except:
-                    continue
-                
-                # Tạo SubjectInput từ course
-                class AltSubject:
-                    def __init__(self, course_data, metadata):
-                        self.name = course_data.name
-                        self.code = course_data.code
-                        self.start_time = metadata.get("start_time", "07:00")
-                        self.end_time = metadata.get("end_time", "11:30")
-                        self.start_date = metadata.get("start_date")
-                        self.end_date = metadata.get("end_date")
-                        self.day = metadata.get("day")
-                        self.credits = course_data.credits
-                        self.instructor = course_data.department or ""
-                        self.subject_type = "Lý thuyết"
-                        self.is_retake = getattr(remove_entry_ref["data"], "is_retake", False)  # Giữ nguyên is_retake
-                        self.priority = remove_entry_ref["data"].priority  # Giữ nguyên priority từ subject
-                
-                alt_subject = AltSubject(course, course.metadata)
-                
-                alt_entry = {
-                    "data": alt_subject,
-                    "priority": remove_entry_ref["priority"],  # Giữ nguyên priority
-                    "start": alt_start_date,
-                    "end": alt_end_date,
-                    "days": normalize_days(getattr(alt_subject, "day", None)),
-                    "original_index": remove_entry_ref["original_index"],  # Giữ nguyên index
-                }
-                
-                # Kiểm tra không trùng với môn đang conflict (keep_entry)
-                conflict_with_keep = False
-                if (conflicting_with["start"] <= alt_start_date <= conflicting_with["end"] or 
-                    alt_start_date <= conflicting_with["start"] <= alt_end_date):
-                    if not has_day_overlap(alt_entry, conflicting_with):
-                        conflict_with_keep = False
-                    else:
-                        # Kiểm tra trùng giờ học
-                        keep_start_time = conflicting_with["data"].start_time
-                        keep_end_time = conflicting_with["data"].end_time
-                        alt_start_time = alt_subject.start_time
-                        alt_end_time = alt_subject.end_time
-                        if (alt_start_time < keep_end_time and alt_end_time > keep_start_time):
-                            conflict_with_keep = True
-                
-                if conflict_with_keep:
-                    continue
-                
-                # Kiểm tra không trùng với các môn khác trong active_entries
-                has_conflict = False
-                for active_entry in all_active_entries:
-                    # Bỏ qua chính remove_entry (so sánh bằng code)
-                    if active_entry["data"].code == remove_entry_ref["data"].code:
-                        continue
-                    if (active_entry["start"] <= alt_start_date <= active_entry["end"] or 
-                        alt_start_date <= active_entry["start"] <= alt_end_date):
-                        if not has_day_overlap(active_entry, alt_entry):
-                            continue
-                        # Kiểm tra trùng giờ học
-                        active_start_time = active_entry["data"].start_time
-                        active_end_time = active_entry["data"].end_time
-                        alt_start_time = alt_subject.start_time
-                        alt_end_time = alt_subject.end_time
-                        if (alt_start_time < active_end_time and alt_end_time > active_start_time):
-                            has_conflict = True
-                            break
-                
-                if not has_conflict:
-                    alternatives.append(alt_entry)
-            
-            return alternatives
-
-        active_entries = entries[:]
-        max_iterations = len(entries) * 3
-        iteration = 0
-        
-        # Lấy semester từ subjects (nếu có) hoặc mặc định
-        semester_from_subjects = None
-        if input.subjects and hasattr(input.subjects[0], 'code'):
-            # Có thể lấy từ metadata hoặc để mặc định
-            semester_from_subjects = "2024-2"  # Mặc định, có thể cải thiện sau
-        
-        while iteration < max_iterations:
-            conflicts = find_conflicts(active_entries)
-            if not conflicts:
-                break
-            
-            entry_a, entry_b = conflicts[0]
-            
-            # Logic ưu tiên
-            if entry_a["priority"] > entry_b["priority"]:
-                keep_entry, remove_entry = entry_a, entry_b
-            elif entry_b["priority"] > entry_a["priority"]:
-                keep_entry, remove_entry = entry_b, entry_a
-            else:
-                is_retake_a = getattr(entry_a["data"], "is_retake", False)
-                is_retake_b = getattr(entry_b["data"], "is_retake", False)
-                if is_retake_a and not is_retake_b:
-                    keep_entry, remove_entry = entry_a, entry_b
-                elif is_retake_b and not is_retake_a:
-                    keep_entry, remove_entry = entry_b, entry_a
-                else:
-                    if entry_a["original_index"] < entry_b["original_index"]:
-                        keep_entry, remove_entry = entry_a, entry_b
-                    elif entry_b["original_index"] < entry_a["original_index"]:
-                        keep_entry, remove_entry = entry_b, entry_a
-                    else:
-                        if entry_a["start"] <= entry_b["start"]:
-                            keep_entry, remove_entry = entry_a, entry_b
-                        else:
-                            keep_entry, remove_entry = entry_b, entry_a
-
-            # TRƯỚC KHI LOẠI BỎ: Thử tìm alternative session từ database
-            remove_code = getattr(remove_entry["data"], "code", "")
-            original_code = None
-            
-            if "-G" in remove_code:
-                original_code = remove_code.split("-G")[0]
-            else:
-                original_code = remove_code
-            
-            if original_code:
-                # Tìm sessions thay thế từ database
-                alternatives = await find_alternative_sessions_from_db(
-                    original_code,
-                    semester_from_subjects,
-                    keep_entry,
-                    active_entries,
-                    remove_entry  # Truyền remove_entry vào hàm
-                )
-                
-                if alternatives:
-                    # Chọn session tốt nhất (ưu tiên available_slots nếu có)
-                    best_alternative = None
-                    available_slots = input.available_time_slots if input.available_time_slots else []
-                    
-                    # Lấy thông tin day từ course metadata trong alternatives
-                    # Ưu tiên sessions trong available_slots
-                    for alt in alternatives:
-                        # Lấy day từ course metadata (đã có trong alt_entry)
-                        # Cần query lại course để lấy day chính xác
-                        alt_course = await Course.find_one({"code": alt["data"].code})
-                        if alt_course and alt_course.metadata:
-                            alt_day = alt_course.metadata.get("day", "T2")
-                        else:
-                            alt_day = "T2"  # Mặc định
-                        
-                        alt_time = alt["data"].start_time
-                        # Map time to slot
-                        if "07:00" <= alt_time <= "11:30":
-                            slot_period = "Sáng"
-                        elif "12:30" <= alt_time <= "17:00":
-                            slot_period = "Chiều"
-                        else:
-                            slot_period = "Tối"
-                        slot = f"{alt_day}_{slot_period}"
-                        
-                        if slot in available_slots:
-                            best_alternative = alt
-                            break
-                    
-                    if not best_alternative:
-                        best_alternative = alternatives[0]
-                    
-                    # Thay thế
-                    remove_entry_index = active_entries.index(remove_entry)
-                    active_entries[remove_entry_index] = best_alternative
-                    
-                    alternative_sessions_used.append({
-                        "original": remove_entry["data"].name,
-                        "alternative": best_alternative["data"].name,
-                        "original_time": f"{remove_entry['data'].start_date} - {remove_entry['data'].end_date}",
-                        "alternative_time": f"{best_alternative['data'].start_date} - {best_alternative['data'].end_date}",
-                        "reason": f"Đã tự động chuyển sang nhóm/lớp khác để tránh trùng với {keep_entry['data'].name}"
-                    })
-                    iteration += 1
-                    continue
+@app.get("/api/schedule/jobs/{job_id}")
+async def get_schedule_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Lấy trạng thái và kết quả của job xếp lịch"""
+    job = solve_executor.get_job(job_id)
+    if not job or job["owner_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job xếp lịch")
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+@app.post("/api/schedule/stream")
+async def stream_schedule(
+    input: ScheduleInput,
+    current_user: User = Depends(get_current_user)
+):
+    """Xếp lịch và gửi dần lịch tốt nhất hiện tại qua Server-Sent Events"""
+    return StreamingResponse(
+        _stream_schedule_events(input, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/schedule/stream/{stream_id}/accept")
+async def accept_streamed_schedule(
+    stream_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dừng solver sớm và chấp nhận lịch tốt nhất hiện tại (sự kiện result vẫn được gửi qua stream).
+    Stream nằm trong bộ nhớ của worker đang giữ kết nối SSE: nhiều worker thì cần sticky session, nếu không 404.
+    """
+    if not solve_executor.stop_stream(stream_id, owner_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Không tìm thấy stream xếp lịch đang chạy")
+    return {"stream_id": stream_id, "status": "stopping"}
+
+async def _load_cached_schedule(input: ScheduleInput, current_user: User):
+    """Cache kết quả: cùng input + cùng phiên bản danh mục -> trả về ngay, không chạy lại GA"""
+    if not input.use_cache:
+        solution_cache.record_bypass()
+        return None, None
+    cache_key = solution_cache.make_key(input, await refresh_catalog_version())
+    cached = solution_cache.get(cache_key)
+    if cached is None:
+        return cache_key, None
+    new_schedule = Schedule(
+        user_id=current_user.id,
+        schedule_data=cached["schedule"],
+        cost=cached["cost"],
+        engine=cached["solver_stats"].get("engine"),
+    )
+    await new_schedule.save()
+    response = {**cached, "db_id": new_schedule.id, "solution_cache": "hit"}
+    if input.save_alternatives and cached.get("alternatives"):
+        response["alternatives"] = await _persist_alternatives(current_user, cached["alternatives"], response["solver_stats"])
+    return cache_key, response
+
+def _request_semester(input: ScheduleInput) -> Optional[str]:
+    # Lấy semester từ subjects (nếu có) hoặc mặc định
+    if input.subjects and hasattr(input.subjects[0], 'code'):
+        # Có thể lấy từ metadata hoặc để mặc định
+        return "2024-2"  # Mặc định, có thể cải thiện sau
+    return None
+
+def _section_slot(section_entry: dict) -> str:
+    """Slot (VD 'T2_Sáng') của 1 nhóm lớp, dùng để ưu tiên nhóm nằm trong available_time_slots"""
+    day = getattr(section_entry["data"], "day", None) or "T2"  # Mặc định
+    # So theo số phút, không so chuỗi ("7:30" < "07:00" theo thứ tự chuỗi)
+    start_minutes = parse_minutes(section_entry["data"].start_time)
+    if start_minutes is not None and 7 * 60 <= start_minutes <= 11 * 60 + 30:
+        slot_period = "Sáng"
+    elif start_minutes is not None and 12 * 60 + 30 <= start_minutes <= 17 * 60:
+        slot_period = "Chiều"
+    else:
+        slot_period = "Tối"
+    return f"{day}_{slot_period}"
 
-            # Không tìm thấy alternative, loại bỏ môn học
+def _alternative_entries(entry: dict, section_index: SectionIndex, semester: Optional[str]) -> List[dict]:
+    """Các nhóm lớp khác (cùng mã gốc) của môn, lấy trong chỉ mục nhóm lớp đã nạp sẵn (không truy vấn DB)"""
+    original_code = original_course_code(getattr(entry["data"], "code", ""))
+    if not original_code:
+        return []
+
+    alternatives = []
+    for section in section_index.sessions(original_code, semester):
+        if section.code == entry["data"].code:
+            continue
+        # Ngày/giờ/thứ đã chuẩn hóa sẵn trong snapshot; nhóm không có ngày hợp lệ thì bỏ qua
+        if section.start_date is None or section.end_date is None:
+            continue
+
+        # Tạo SubjectInput từ course
+        class AltSubject:
+            def __init__(self, section):
+                course_data, metadata = section.course, section.course.metadata
+                self.name = course_data.name
+                self.code = course_data.code
+                self.start_time = section.start_time
+                self.end_time = section.end_time
+                self.start_date = metadata.get("start_date")
+                self.end_date = metadata.get("end_date")
+                self.day = section.day
+                self.credits = course_data.credits
+                self.instructor = course_data.department or ""
+                self.subject_type = "Lý thuyết"
+                self.is_retake = getattr(entry["data"], "is_retake", False)  # Giữ nguyên is_retake
+                self.priority = entry["data"].priority  # Giữ nguyên priority từ subject
+
+        alternatives.append({
+            "data": AltSubject(section),
+            "priority": entry["priority"],  # Giữ nguyên priority
+            "start": section.start_date,
+            "end": section.end_date,
+            "days": section.days,
+            "original_index": entry["original_index"],  # Giữ nguyên index
+        })
+    return alternatives
+
+def _first_conflicting(section_entries: List[dict], kept_entries: List[dict]) -> Optional[dict]:
+    # Môn đang giữ đầu tiên trùng lịch với 1 trong các nhóm lớp
+    for kept_entry in kept_entries:
+        if any(entries_conflict(section_entry, kept_entry) for section_entry in section_entries):
+            return kept_entry
+    return None
+
+async def _resolve_conflicts(input: ScheduleInput, section_index: Optional[SectionIndex] = None):
+    """
+    Xử lý trùng lịch: chọn cùng lúc 1 nhóm lớp cho mọi môn (section_selection) sao cho không trùng lịch
+    và tổng priority các môn giữ lại lớn nhất; môn không còn nhóm nào phù hợp thì bị loại.
+    """
+    # 1. Chuẩn hóa dữ liệu
+    entries = build_schedule_entries(input)
+
+    # Nhóm lớp thay thế lấy từ snapshot danh mục của học kỳ (chỉ nạp từ DB khi admin vừa thay đổi danh mục),
+    # mọi tra cứu sau đó đều chạy trong bộ nhớ
+    semester_from_subjects = _request_semester(input)
+    section_index = section_index or SectionIndex()
+    await section_index.prefetch(semester_from_subjects)
+
+    # 2. Mỗi môn: nhóm gốc + các nhóm thay thế; ưu tiên giữ nhóm gốc, sau đó nhóm nằm trong slot rảnh
+    available_slots = set(input.available_time_slots or [])
+    ordered_entries = sorted(entries, key=selection_order_key)
+    candidates, bonuses = [], []
+    for entry in ordered_entries:
+        alternatives = _alternative_entries(entry, section_index, semester_from_subjects)
+        # Nhóm trong slot rảnh được thử trước
+        alternatives.sort(key=lambda alt: _section_slot(alt) not in available_slots)
+        candidates.append([entry] + alternatives)
+        bonuses.append([ORIGINAL_BONUS] + [
+            AVAILABLE_BONUS if _section_slot(alt) in available_slots else 0 for alt in alternatives
+        ])
+
+    # 3. Chọn nhóm lớp cho mọi môn trong 1 lần (quay lui + forward checking trên đồ thị trùng lịch tính sẵn)
+    chosen, selection_stats = select_sections(
+        candidates, [entry["priority"] for entry in ordered_entries], bonuses
+    )
+    print(f"🧩 Section selection: {selection_stats}")
+
+    kept = {}
+    for entry, sections, choice in zip(ordered_entries, candidates, chosen):
+        if choice is not None:
+            kept[entry["original_index"]] = sections[choice]
+    active_entries = [kept[entry["original_index"]] for entry in entries if entry["original_index"] in kept]
+
+    removed_conflicts = []
+    alternative_sessions_used = []
+    for entry, sections, choice in zip(ordered_entries, candidates, chosen):
+        if choice == 0:
+            continue
+        others = [other for other in active_entries if other["original_index"] != entry["original_index"]]
+        if choice is None:
+            kept_with = _first_conflicting([entry], others) or _first_conflicting(sections, others)
+            kept_name = kept_with["data"].name if kept_with else "không xác định"
             removed_conflicts.append({
-                "subject": remove_entry["data"].name,
-                "kept_with": keep_entry["data"].name,
-                "reason": f"{remove_entry['data'].start_date} - {remove_entry['data'].end_date} trùng với {keep_entry['data'].name}",
+                "subject": entry["data"].name,
+                "kept_with": kept_name,
+                "reason": f"{entry['data'].start_date} - {entry['data'].end_date} trùng với {kept_name}",
             })
-            active_entries = [entry for entry in active_entries if entry is not remove_entry]
-            iteration += 1
-
-        if not active_entries:
-            detail_msg = ", ".join([drop["subject"] for drop in removed_conflicts]) or "không xác định"
-            raise HTTPException(
-                status_code=400,
-                detail=f"Không thể tạo thời khóa biểu vì tất cả môn đều trùng thời gian ({detail_msg})."
-            )
+            continue
+        alternative = sections[choice]
+        kept_with = _first_conflicting([entry], others)
+        alternative_sessions_used.append({
+            "original": entry["data"].name,
+            "alternative": alternative["data"].name,
+            "original_time": f"{entry['data'].start_date} - {entry['data'].end_date}",
+            "alternative_time": f"{alternative['data'].start_date} - {alternative['data'].end_date}",
+            "reason": (
+                f"Đã tự động chuyển sang nhóm/lớp khác để tránh trùng với {kept_with['data'].name}"
+                if kept_with else "Đã tự động chuyển sang nhóm/lớp khác để giữ được nhiều môn hơn"
+            ),
+        })
 
-        # Tạo danh sách tất cả các slot có thể
-        all_possible_slots = [
-            'T2_Sáng', 'T2_Chiều', 'T2_Tối',
-            'T3_Sáng', 'T3_Chiều', 'T3_Tối',
-            'T4_Sáng', 'T4_Chiều', 'T4_Tối',
-            'T5_Sáng', 'T5_Chiều', 'T5_Tối',
-            'T6_Sáng', 'T6_Chiều', 'T6_Tối',
-            'T7_Sáng', 'T7_Chiều', 'T7_Tối',
-            'CN_Sáng', 'CN_Chiều', 'CN_Tối',
-        ]
-        
-        available_slots = input.available_time_slots if input.available_time_slots else all_possible_slots
-        unavailable_slots = [slot for slot in all_possible_slots if slot not in available_slots]
-        time_slots_for_ga = available_slots + unavailable_slots
-        
-        subject_names = [entry["data"].name for entry in active_entries]
-        priorities = {entry["data"].name: entry["priority"] for entry in active_entries}
-        subject_details = {}
-        for entry in active_entries:
-            subject = entry["data"]
-            subject_details[subject.name] = {
-                "instructor": subject.instructor,
-                "start_time": subject.start_time,
-                "end_time": subject.end_time,
-                "start_date": subject.start_date,
-                "end_date": subject.end_date,
-                "priority": entry["priority"],
-                "is_retake": subject.is_retake or False,
-                "preferred_days": getattr(subject, "preferred_days", None) or [],
-            }
-        
-        additional_constraints_dict = {}
-        if input.additionalConstraints:
-            additional_constraints_dict = {
-                'avoidConsecutive': input.additionalConstraints.avoidConsecutive,
-                'balanceDays': input.additionalConstraints.balanceDays,
-                'preferMorning': input.additionalConstraints.preferMorning,
-                'allowSaturday': input.additionalConstraints.allowSaturday
-            }
+    if not active_entries:
+        detail_msg = ", ".join([drop["subject"] for drop in removed_conflicts]) or "không xác định"
+        raise HTTPException(
+            status_code=400,
+            detail=f"Không thể tạo thời khóa biểu vì tất cả môn đều trùng thời gian ({detail_msg})."
+        )
+
+    return active_entries, removed_conflicts, alternative_sessions_used
+
+def _format_schedule(final_schedule: list, subject_details: dict) -> List[dict]:
+    formatted_schedule = []
+    for item in final_schedule:
+        subject_name = item['subject']
+        slot_name = item['time']
+        info = subject_details[subject_name]
+        formatted_schedule.append({
+            "subject": subject_name,
+            "time": slot_name,
+            "instructor": info["instructor"],
+            "sessions": 1,
+            "start_date": info["start_date"],
+            "end_date": info["end_date"],
+            "start_time": info["start_time"],
+            "end_time": info["end_time"],
+            "priority": info["priority"],
+            "is_retake": info["is_retake"],
+        })
+    return formatted_schedule
+
+def _alternative_documents(user_id: UUID, alternatives: list, solver_stats: dict) -> List[Schedule]:
+    return [
+        Schedule(
+            user_id=user_id,
+            schedule_data=alternative["schedule"],
+            cost=alternative["cost"],
+            engine=solver_stats.get("engine"),
+        )
+        for alternative in alternatives
+    ]
+
+async def _persist_alternatives(current_user: User, alternatives: list, solver_stats: dict) -> List[dict]:
+    """Lưu các lịch thay thế (top_k) thành Schedule riêng, 1 lần ghi cho tất cả"""
+    documents = _alternative_documents(current_user.id, alternatives, solver_stats)
+    if documents:
+        await Schedule.insert_many(documents)
+    return [{**alternative, "db_id": document.id} for alternative, document in zip(alternatives, documents)]
+
+def _build_schedule_result(subject_details: dict, final_schedule: list, final_cost: int, solver_stats: dict,
+                           removed_conflicts: list, alternative_sessions_used: list) -> dict:
+    """Định dạng kết quả solver (chưa lưu DB), dùng làm giá trị cache"""
+    # Lịch thay thế (top_k > 1) được trả riêng, không nằm trong solver_stats
+    alternatives = [
+        {"schedule": _format_schedule(alternative["schedule"], subject_details), "cost": alternative["cost"]}
+        for alternative in solver_stats.pop("alternatives", [])
+    ]
+    return {
+        "schedule": _format_schedule(final_schedule, subject_details),
+        "cost": final_cost,
+        "removed_conflicts": removed_conflicts,
+        "alternative_sessions": alternative_sessions_used,
+        "alternatives": alternatives,
+        "alternatives_missing": solver_stats.pop("alternatives_missing", 0),
+        "solver_stats": solver_stats,
+    }
+
+def _cache_schedule_result(cache_key: Optional[str], result: dict):
+    # Kết quả bị dừng sớm (client chấp nhận lịch tạm) không được cache
+    if cache_key and result["solver_stats"].get("stop_reason") != "cancelled":
+        solution_cache.put(cache_key, result)
+
+async def _save_schedule_result(input: ScheduleInput, current_user: User, cache_key: Optional[str],
+                                subject_details: dict, final_schedule: list, final_cost: int, solver_stats: dict,
+                                removed_conflicts: list, alternative_sessions_used: list):
+    """Định dạng kết quả solver, lưu Schedule vào DB và cache kết quả"""
+    result = _build_schedule_result(
+        subject_details, final_schedule, final_cost, solver_stats, removed_conflicts, alternative_sessions_used
+    )
+
+    new_schedule = Schedule(
+        user_id=current_user.id,
+        schedule_data=result["schedule"],
+        cost=final_cost,
+        engine=solver_stats.get("engine"),
+    )
+
+    await new_schedule.save()
+
+    print(f"Đã lưu lịch mới vào DB, ID: {new_schedule.id}")
+
+    _cache_schedule_result(cache_key, result)
+
+    response = {
+        **result,
+        "db_id": new_schedule.id,
+        "solution_cache": "miss" if cache_key else "bypass",
+    }
+    if input.save_alternatives and result["alternatives"]:
+        response["alternatives"] = await _persist_alternatives(current_user, result["alternatives"], solver_stats)
+    return response
+
+async def _solve_schedule(input: ScheduleInput, current_user: User):
+    """Toàn bộ quy trình xếp lịch; GA chạy trong process pool của solve_executor"""
+    try:
+        print(f"Nhận yêu cầu xếp lịch từ user: {current_user.username}")
+        print(f"Số môn học: {len(input.subjects)}")
         
-        additional_constraints_dict['available_slots'] = available_slots
-        additional_constraints_dict['unavailable_slots'] = unavailable_slots
+        # 0. Cache kết quả
+        cache_key, cached_response = await _load_cached_schedule(input, current_user)
+        if cached_response is not None:
+            return cached_response
+
+        # 1. Chuẩn hóa dữ liệu và xử lý trùng lịch
+        active_entries, removed_conflicts, alternative_sessions_used = await _resolve_conflicts(input)
+
+        # Tham số cho solver
+        subject_names, time_slots_for_ga, priorities, additional_constraints_dict, subject_details = \
+            build_solver_args(input, active_entries)
         
-        # Chạy GA
-        final_schedule, final_cost = find_optimal_schedule(
+        # Chạy solver (tự chọn engine theo kích thước bài toán, có giới hạn thời gian)
+        final_schedule, final_cost, solver_stats = await solve_executor.solve(
             subject_names,
             time_slots_for_ga,
             input.constraints,
             priorities,
             additional_constraints_dict,
-            subject_details
+            subject_details,
+            max_ms=input.max_ms or DEFAULT_MAX_MS,
+            return_stats=True,
+            top_k=input.top_k,
+            min_distance=input.min_distance,
         )
         
-        formatted_schedule = []
-        for item in final_schedule:
-            subject_name = item['subject']
-            slot_name = item['time']
-            info = subject_details[subject_name]
-            formatted_schedule.append({
-                "subject": subject_name,
-                "time": slot_name,
-                "instructor": info["instructor"],
-                "sessions": 1,
-                "start_date": info["start_date"],
-                "end_date": info["end_date"],
-                "start_time": info["start_time"],
-                "end_time": info["end_time"],
-                "priority": info["priority"],
-                "is_retake": info["is_retake"],
-            })
-        
-        new_schedule = Schedule(
-            user_id=current_user.id,
-            schedule_data=formatted_schedule,
-            cost=final_cost
+        return await _save_schedule_result(
+            input, current_user, cache_key, subject_details, final_schedule, final_cost, solver_stats,
+            removed_conflicts, alternative_sessions_used,
         )
-        
-        await new_schedule.save()
-        
-        print(f"Đã lưu lịch mới vào DB, ID: {new_schedule.id}")
-        
-        return {
-            "schedule": formatted_schedule,
-            "cost": final_cost,
-            "db_id": new_schedule.id,
-            "removed_conflicts": removed_conflicts,
-            "alternative_sessions": alternative_sessions_used,
-        }
     
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Lỗi GA: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Lỗi xử lý GA: {e}")
 
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+async def _solve_batch_input(input: ScheduleInput, section_index: SectionIndex, semaphore: asyncio.Semaphore) -> dict:
+    """Giải 1 input của batch (đại diện cho mọi sinh viên có input giống hệt), chưa lưu DB"""
+    async with semaphore:
+        active_entries, removed_conflicts, alternative_sessions_used = await _resolve_conflicts(input, section_index)
+        subject_names, time_slots_for_ga, priorities, additional_constraints_dict, subject_details = \
+            build_solver_args(input, active_entries)
+        final_schedule, final_cost, solver_stats = await solve_executor.solve(
+            subject_names,
+            time_slots_for_ga,
+            input.constraints,
+            priorities,
+            additional_constraints_dict,
+            subject_details,
+            max_ms=input.max_ms or DEFAULT_MAX_MS,
+            return_stats=True,
+            top_k=input.top_k,
+            min_distance=input.min_distance,
+        )
+    return _build_schedule_result(
+        subject_details, final_schedule, final_cost, solver_stats, removed_conflicts, alternative_sessions_used
+    )
+
+async def _batch_schedule_events(batch: BatchScheduleInput, current_admin: User):
+    """Sự kiện SSE: result/error cho từng sinh viên ngay khi xong, cuối cùng là done (sau 1 lần insert_many)"""
+    # Chỉ mục nhóm lớp dùng chung cho cả batch: mọi sinh viên dùng cùng snapshot danh mục của học kỳ
+    section_index = SectionIndex()
+    try:
+        for semester in {_request_semester(item.input) for item in batch.items}:
+            await section_index.prefetch(semester)
+    except Exception as e:
+        traceback.print_exc()
+        yield _sse_event("error", {"status_code": 500, "detail": f"Lỗi tải danh mục môn học: {e}"})
+        return
+    catalog_version = await refresh_catalog_version()
+
+    # Gom các input giống hệt nhau (cùng khóa cache) để chỉ giải 1 lần
+    groups: Dict[str, list] = {}
+    for item in batch.items:
+        groups.setdefault(solution_cache.make_key(item.input, catalog_version), []).append(item)
+    print(f"Batch xếp lịch: {len(batch.items)} sinh viên, {len(groups)} input khác nhau")
+
+    # Giới hạn số input đang giải bằng số process để batch không chiếm hết hàng đợi của request khác
+    semaphore = asyncio.Semaphore(solve_executor.max_workers)
+
+    async def run_group(cache_key: str, items: list):
+        input = items[0].input
+        try:
+            if not input.use_cache:
+                solution_cache.record_bypass()
+                return items, await _solve_batch_input(input, section_index, semaphore), "bypass", None
+            cached = solution_cache.get(cache_key)
+            if cached is not None:
+                return items, cached, "hit", None
+            result = await _solve_batch_input(input, section_index, semaphore)
+            _cache_schedule_result(cache_key, result)
+            return items, result, "miss", None
+        except QueueFullError as e:
+            return items, None, None, {"status_code": 503, "detail": str(e)}
+        except HTTPException as e:
+            return items, None, None, {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            print(f"Lỗi GA (batch): {e}")
+            traceback.print_exc()
+            return items, None, None, {"status_code": 500, "detail": f"Lỗi xử lý GA: {e}"}
+
+    tasks = [asyncio.create_task(run_group(cache_key, items)) for cache_key, items in groups.items()]
+    documents = []
+    failed = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            items, result, cache_status, error = await finished
+            for item in items:
+                if error:
+                    failed += 1
+                    yield _sse_event("error", {"student_id": item.student_id, **error})
+                    continue
+                # id được sinh sẵn ở client nên trả được db_id trước khi ghi DB
+                user_id = item.user_id or current_admin.id
+                schedule = Schedule(
+                    user_id=user_id,
+                    schedule_data=result["schedule"],
+                    cost=result["cost"],
+                    engine=result["solver_stats"].get("engine"),
+                )
+                alternatives = result["alternatives"]
+                documents.append(schedule)
+                if item.input.save_alternatives and alternatives:
+                    alternative_documents = _alternative_documents(user_id, alternatives, result["solver_stats"])
+                    documents.extend(alternative_documents)
+                    alternatives = [
+                        {**alternative, "db_id": document.id if batch.save else None}
+                        for alternative, document in zip(alternatives, alternative_documents)
+                    ]
+                yield _sse_event("result", {
+                    "student_id": item.student_id,
+                    **result,
+                    "alternatives": alternatives,
+                    "db_id": schedule.id if batch.save else None,
+                    "solution_cache": cache_status,
+                    "shared_with": len(items),
+                })
+
+        saved = 0
+        if batch.save and documents:
+            try:
+                await Schedule.insert_many(documents)
+                saved = len(documents)
+            except Exception as e:
+                traceback.print_exc()
+                yield _sse_event("error", {"status_code": 500, "detail": f"Lỗi lưu lịch vào DB: {e}"})
+        yield _sse_event("done", {
+            "students": len(batch.items),
+            "unique_inputs": len(groups),
+            "failed": failed,
+            "saved": saved,
+            "catalog_queries": section_index.queries,
+        })
+    finally:
+        # Client ngắt kết nối: hủy các input chưa giải xong
+        for task in tasks:
+            task.cancel()
+
+async def _stream_schedule_events(input: ScheduleInput, current_user: User):
+    """Sinh các sự kiện SSE: started -> progress (lịch tốt nhất hiện tại) -> result hoặc error"""
+    try:
+        cache_key, cached_response = await _load_cached_schedule(input, current_user)
+        if cached_response is not None:
+            yield _sse_event("result", cached_response)
+            return
+
+        active_entries, removed_conflicts, alternative_sessions_used = await _resolve_conflicts(input)
+        subject_names, time_slots_for_ga, priorities, additional_constraints_dict, subject_details = \
+            build_solver_args(input, active_entries)
+
+        events = solve_executor.solve_stream(
+            subject_names,
+            time_slots_for_ga,
+            input.constraints,
+            priorities,
+            additional_constraints_dict,
+            subject_details,
+            owner_id=current_user.id,
+            max_ms=input.max_ms or DEFAULT_MAX_MS,
+            return_stats=True,
+            top_k=input.top_k,
+            min_distance=input.min_distance,
+        )
+        # Client ngắt kết nối -> generator bị đóng -> solver được hủy trong finally của solve_stream
+        async with contextlib.aclosing(events):
+            async for event in events:
+                if event["type"] != "result":
+                    yield _sse_event(event["type"], event)
+                    continue
+                final_schedule, final_cost, solver_stats = event["result"]
+                response = await _save_schedule_result(
+                    input, current_user, cache_key, subject_details, final_schedule, final_cost, solver_stats,
+                    removed_conflicts, alternative_sessions_used,
+                )
+                yield _sse_event("result", response)
+    except QueueFullError as e:
+        yield _sse_event("error", {"status_code": 503, "detail": str(e)})
+    except HTTPException as e:
+        yield _sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        print(f"Lỗi GA: {e}")
+        traceback.print_exc()
+        yield _sse_event("error", {"status_code": 500, "detail": f"Lỗi xử lý GA: {e}"})
+
 # =================
 # CHẠY SERVER
 # =================
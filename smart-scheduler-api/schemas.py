@@ -102,6 +102,21 @@ class ScheduleInput(BaseModel):
     available_time_slots: List[str] = Field(default=[], example=["T2_Sáng", "T2_Chiều", "T3_Sáng"])  # Các khung giờ có sẵn
     constraints: Dict[str, List[str]] = Field(default={}, example={"Toán": ["T2_Sáng"]})  # Ràng buộc (tên môn -> danh sách giờ cấm)
     additionalConstraints: Optional[AdditionalConstraints] = None  # Ràng buộc bổ sung
+    max_ms: Optional[int] = Field(default=None, ge=100, le=10000)  # Ngân sách thời gian cho GA (ms), None = mặc định server
+    use_cache: bool = True  # False = luôn chạy lại, không dùng kết quả đã cache
+    top_k: int = Field(default=1, ge=1, le=10)  # Số lịch trả về (lịch tốt nhất + top_k - 1 lịch thay thế)
+    min_distance: Optional[int] = Field(default=None, ge=1)  # Số môn tối thiểu khác nhau giữa 2 lịch, None = 20% số môn
+    save_alternatives: bool = False  # True = lưu cả các lịch thay thế vào DB
+
+# --- Khuôn cho Xếp lịch hàng loạt (admin) ---
+class BatchScheduleItem(BaseModel):
+    student_id: str  # Mã sinh viên (hoặc nhãn bất kỳ) để client ghép kết quả
+    user_id: Optional[UUID] = None  # Lưu lịch cho user này, None = lưu cho admin gửi yêu cầu
+    input: ScheduleInput
+
+class BatchScheduleInput(BaseModel):
+    items: List[BatchScheduleItem] = Field(..., min_length=1, max_length=1000)
+    save: bool = True  # False = chỉ trả kết quả, không lưu DB
 
 # --- Khuôn cho môn học (DB <-> API) ---
 class CourseBase(BaseModel):
@@ -117,8 +132,10 @@ class CourseCreate(CourseBase):
     semester: str  # Bắt buộc khi thêm thủ công
 
 class CourseListResponse(BaseModel):
-    total: int
+    total: int  # Tổng số môn (của học kỳ/ngành), không phụ thuộc trang
+    count: int  # Số môn trong trang này
     items: List[CourseBase]
+    next_cursor: Optional[str] = None  # Truyền vào after để lấy trang sau; None = hết
 
 class CourseUploadResponse(BaseModel):
     inserted: int
@@ -136,8 +153,10 @@ class UserResponse(BaseModel):
     created_at: Optional[datetime] = None
 
 class UserListResponse(BaseModel):
-    total: int
+    total: int  # Tổng số user, không phụ thuộc trang
+    count: int  # Số user trong trang này
     users: List[UserResponse]
+    next_cursor: Optional[str] = None  # Truyền vào after để lấy trang sau; None = hết
 
 # --- Khuôn cho Quên mật khẩu ---
 class ForgotPasswordRequest(BaseModel):
@@ -17,6 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from db.database import init_db
 from db.models import Course, User
+from db.catalog import bump_catalog_version
 from uuid import uuid4
 
 # Dữ liệu môn học mẫu cho các ngành khác nhau
@@ -194,6 +195,7 @@ async def add_sample_courses():
     
     total_added = 0
     total_sessions = 0
+    changed_semesters = set()
     
     for semester, majors in SAMPLE_COURSES.items():
         for major, courses in majors.items():
@@ -240,11 +242,16 @@ async def add_sample_courses():
                     )
                     
                     await new_course.save()
+                    changed_semesters.add(semester)
                     total_added += 1
                     total_sessions += 1
                 
                 print(f"✅ Đã thêm {num_sessions} session cho: {course_data['code']} - {course_data['name']} ({semester}, {major})")
     
+    # Báo cho các server đang chạy nạp lại snapshot danh mục
+    for semester in changed_semesters:
+        await bump_catalog_version(semester)
+
     print(f"\n🎉 Hoàn thành! Đã thêm {total_added} môn học (sessions) mới.")
     print(f"📊 Tổng số sessions: {total_sessions}")
     print(f"\n📋 Danh sách môn học theo ngành:")
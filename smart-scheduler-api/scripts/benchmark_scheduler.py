@@ -0,0 +1,325 @@
+"""
+Benchmark bộ xếp lịch với dữ liệu giả lập (không cần MongoDB).
+
+Sinh ScheduleInput tái lập được (cùng seed -> cùng dữ liệu) trên lưới kích thước:
+số môn x số slot rảnh x ràng buộc bổ sung x mật độ trùng lịch. Mỗi instance chạy
+đủ các bước của /api/schedule không dùng DB: chuẩn hóa, xử lý trùng lịch (chỉ loại bỏ,
+không tìm nhóm thay thế), find_optimal_schedule. Ngoài ra đo thêm parser file upload.
+
+Báo cáo: thời gian, số lần đánh giá/giây, bộ nhớ đỉnh (tracemalloc), penalty;
+so sánh với file baseline và trả về exit code 1 nếu chậm hơn/penalty tăng.
+
+Cách sử dụng:
+    python scripts/benchmark_scheduler.py                     # lưới mặc định, so với baseline
+    python scripts/benchmark_scheduler.py --grid quick        # lưới nhỏ, chạy nhanh
+    python scripts/benchmark_scheduler.py --engine ga --repeat 5
+    python scripts/benchmark_scheduler.py --grid large --engine islands  # GA đảo, so với --engine ga
+    python scripts/benchmark_scheduler.py --update-baseline   # ghi lại baseline
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Thêm thư mục gốc vào path để import
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import (
+    ALL_POSSIBLE_SLOTS, build_schedule_entries, build_solver_args,
+    selection_order_key, _dataframe_to_courses,
+)
+from schemas import ScheduleInput, SubjectInput, AdditionalConstraints
+from genetic_algorithm.section_selection import select_sections
+from genetic_algorithm.scheduler_ga import find_optimal_schedule, DEFAULT_MAX_MS, DEFAULT_SEED_RATIO
+
+DEFAULT_BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+
+# Lưới kích thước: số môn, số slot rảnh, ràng buộc bổ sung, mật độ trùng lịch
+GRIDS = {
+    "quick": {
+        "subjects": [5, 12],
+        "slots": [9, 21],
+        "flags": ["none", "all"],
+        "density": [0.2],
+    },
+    "default": {
+        "subjects": [5, 10, 15, 25, 40],
+        "slots": [9, 15, 21],
+        "flags": ["none", "all"],
+        "density": [0.1, 0.4],
+    },
+    "large": {
+        "subjects": [60, 100],
+        "slots": [15, 21],
+        "flags": ["none", "all"],
+        "density": [0.1, 0.4],
+    },
+}
+PARSER_ROWS = [1000, 10000]
+
+# Mỗi khung giờ dài 50 phút, bắt đầu đầu giờ -> các cặp (ngày, giờ) khác nhau không trùng nhau
+DAYS = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
+START_HOURS = list(range(7, 21))
+
+
+# =================
+# SINH DỮ LIỆU GIẢ LẬP
+# =================
+def generate_instance(num_subjects, num_slots, flags, density, seed=0):
+    """
+    Sinh ScheduleInput tái lập được.
+    density: xác suất 1 môn lấy đúng ngày/giờ của 1 môn trước đó (tạo trùng lịch).
+    """
+    rng = random.Random(f"{seed}-{num_subjects}-{num_slots}-{flags}-{density}")
+
+    available_slots = sorted(rng.sample(ALL_POSSIBLE_SLOTS, num_slots), key=ALL_POSSIBLE_SLOTS.index)
+    free_windows = [(day, hour) for day in DAYS for hour in START_HOURS]
+    rng.shuffle(free_windows)
+
+    subjects = []
+    constraints = {}
+    for i in range(num_subjects):
+        if subjects and rng.random() < density:
+            template = rng.choice(subjects)
+            day, start_time, end_time = template.day, template.start_time, template.end_time
+        else:
+            day, hour = free_windows[i % len(free_windows)]
+            start_time, end_time = f"{hour:02d}:00", f"{hour:02d}:50"
+            # Dữ liệu thật không phải lúc nào cũng đủ: 1 phần môn không rõ ngày, 1 phần học 2 ngày/tuần
+            roll = rng.random()
+            if roll < 0.3:
+                day = None
+            elif roll < 0.5:
+                day = [day, rng.choice([other for other in DAYS if other != day])]
+        name = f"Môn {i + 1:03d}"
+        subjects.append(SubjectInput(
+            name=name,
+            start_time=start_time,
+            end_time=end_time,
+            credits=rng.choice([2, 3, 4]),
+            subject_type=rng.choice(["Lý thuyết", "Thực hành"]),
+            instructor=f"GV {rng.randint(1, 20):02d}",
+            start_date="2025-01-06",
+            end_date="2025-05-30",
+            day=day,
+            priority=rng.randint(1, 10),
+            is_retake=rng.random() < 0.1,
+            preferred_days=rng.sample(DAYS[:6], 2) if rng.random() < 0.3 else None,
+        ))
+        if rng.random() < 0.3:
+            constraints[name] = rng.sample(available_slots, min(len(available_slots), rng.randint(1, 3)))
+
+    additional = None
+    if flags == "all":
+        additional = AdditionalConstraints(avoidConsecutive=True, balanceDays=True, preferMorning=True)
+
+    return ScheduleInput(
+        subjects=subjects,
+        available_time_slots=available_slots,
+        constraints=constraints,
+        additionalConstraints=additional,
+        use_cache=False,
+    )
+
+
+def generate_course_table(num_rows, seed=0):
+    """Bảng môn học giống file CSV/Excel admin upload (tiêu đề tiếng Việt)"""
+    rng = random.Random(f"courses-{seed}-{num_rows}")
+    return pd.DataFrame({
+        "Mã môn học": [f"INT{i:05d}" for i in range(num_rows)],
+        "Tên môn học": [f"Môn học {i}" for i in range(num_rows)],
+        "Số tín chỉ": [rng.choice([2, 3, 4]) for _ in range(num_rows)],
+        "Bộ môn": [rng.choice(["Khoa CNTT", "Khoa Toán", ""]) for _ in range(num_rows)],
+    })
+
+
+# =================
+# CHẠY 1 INSTANCE
+# =================
+def resolve_conflicts_offline(entries):
+    """Chọn môn giữ lại như /api/schedule nhưng không có nhóm thay thế trong DB (mỗi môn chỉ 1 nhóm)"""
+    ordered_entries = sorted(entries, key=selection_order_key)
+    chosen, _ = select_sections([[entry] for entry in ordered_entries], [entry["priority"] for entry in ordered_entries])
+    kept = {id(entry) for entry, choice in zip(ordered_entries, chosen) if choice is not None}
+    return [entry for entry in entries if id(entry) in kept]
+
+
+def run_pipeline(schedule_input, engine, max_ms, seed, reduce_domains=True, seed_ratio=DEFAULT_SEED_RATIO):
+    started_at = time.perf_counter()
+    entries = build_schedule_entries(schedule_input)
+    active_entries = resolve_conflicts_offline(entries)
+    conflict_ms = (time.perf_counter() - started_at) * 1000
+
+    subject_names, time_slots, priorities, additional, details = build_solver_args(schedule_input, active_entries)
+    _, cost, stats = find_optimal_schedule(
+        subject_names, time_slots, schedule_input.constraints, priorities, additional, details,
+        max_ms=max_ms, return_stats=True, engine=engine, seed=seed, reduce_domains=reduce_domains,
+        seed_ratio=seed_ratio,
+    )
+    wall_ms = (time.perf_counter() - started_at) * 1000
+    return {
+        "wall_ms": wall_ms,
+        "conflict_ms": conflict_ms,
+        "removed": len(entries) - len(active_entries),
+        "penalty": int(cost),
+        "engine": stats.get("engine"),
+        "stop_reason": stats.get("stop_reason"),
+        "evaluations": stats.get("evaluations", 0),
+        "fixed_subjects": stats["domain"]["fixed_subjects"],
+        "best_generation": stats.get("best_generation"),  # Chỉ GA: thế hệ tìm ra lời giải cuối cùng
+    }
+
+
+def measure_peak_kb(func, *args):
+    # Chạy riêng 1 lần với tracemalloc vì tracemalloc làm chậm đáng kể
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def benchmark_instance(schedule_input, engine, max_ms, repeat, seed, verbose, reduce_domains=True,
+                       seed_ratio=DEFAULT_SEED_RATIO):
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        # Lần đo bộ nhớ chạy trước, đồng thời làm nóng (import, cache của numpy) cho các lần đo thời gian
+        peak_kb = measure_peak_kb(run_pipeline, schedule_input, engine, max_ms, seed, reduce_domains, seed_ratio)
+        runs = [run_pipeline(schedule_input, engine, max_ms, seed, reduce_domains, seed_ratio) for _ in range(repeat)]
+
+    wall_ms = statistics.median(run["wall_ms"] for run in runs)
+    evaluations = statistics.median(run["evaluations"] for run in runs)
+    return {
+        "wall_ms": round(wall_ms, 2),
+        "conflict_ms": round(statistics.median(run["conflict_ms"] for run in runs), 3),
+        "evals_per_sec": round(evaluations / (wall_ms / 1000)) if wall_ms else 0,
+        "evaluations": int(evaluations),
+        "peak_kb": peak_kb,
+        "penalty": int(statistics.median(run["penalty"] for run in runs)),
+        "engine": runs[-1]["engine"],
+        "stop_reason": runs[-1]["stop_reason"],
+        "removed_conflicts": runs[-1]["removed"],
+        "fixed_subjects": runs[-1]["fixed_subjects"],
+        "best_generation": runs[-1]["best_generation"],
+    }
+
+
+def benchmark_parser(num_rows, repeat):
+    csv_bytes = generate_course_table(num_rows).to_csv(index=False).encode("utf-8")
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        courses = _dataframe_to_courses(pd.read_csv(io.BytesIO(csv_bytes)))
+        timings.append((time.perf_counter() - started_at) * 1000)
+    wall_ms = statistics.median(timings)
+    return {
+        "wall_ms": round(wall_ms, 2),
+        "rows_per_sec": round(len(courses) / (wall_ms / 1000)) if wall_ms else 0,
+        "peak_kb": measure_peak_kb(lambda: _dataframe_to_courses(pd.read_csv(io.BytesIO(csv_bytes)))),
+    }
+
+
+# =================
+# SO SÁNH VỚI BASELINE
+# =================
+def compare(results, baseline, time_tolerance):
+    """Trả về danh sách cảnh báo: chậm hơn baseline quá ngưỡng hoặc penalty tăng"""
+    regressions = []
+    for section in ("instances", "parsers"):
+        for key, current in results[section].items():
+            previous = baseline.get(section, {}).get(key)
+            if not previous:
+                continue
+            if current["wall_ms"] > previous["wall_ms"] * (1 + time_tolerance) and current["wall_ms"] - previous["wall_ms"] > 5:
+                regressions.append(f"{key}: chậm hơn {current['wall_ms']:.1f} ms so với {previous['wall_ms']:.1f} ms")
+            if "penalty" in current and current["penalty"] > previous["penalty"]:
+                regressions.append(f"{key}: penalty tăng {previous['penalty']} -> {current['penalty']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bộ xếp lịch với dữ liệu giả lập")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="default")
+    parser.add_argument("--engine", default="auto", help="auto, ga, islands, exact, annealing, tabu")
+    parser.add_argument("--max-ms", type=int, default=DEFAULT_MAX_MS, help="Ngân sách thời gian mỗi lần giải")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi instance (lấy trung vị)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Ghi kết quả lần này làm baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Cho phép chậm hơn baseline bao nhiêu (0.5 = 50%%)")
+    parser.add_argument("--output", type=Path, help="Ghi kết quả ra file JSON")
+    parser.add_argument("--verbose", action="store_true", help="Hiện log của solver")
+    parser.add_argument("--no-domains", action="store_true", help="Tắt thu hẹp miền slot theo ngày/giờ học thật")
+    parser.add_argument("--seed-ratio", type=float, default=DEFAULT_SEED_RATIO,
+                        help="Tỷ lệ quần thể ban đầu của GA sinh bằng xếp tham lam (0 = ngẫu nhiên)")
+    args = parser.parse_args()
+
+    grid = GRIDS[args.grid]
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"grid": args.grid, "engine": args.engine, "max_ms": args.max_ms,
+                     "repeat": args.repeat, "seed": args.seed, "reduce_domains": not args.no_domains,
+                     "seed_ratio": args.seed_ratio},
+        "instances": {},
+        "parsers": {},
+    }
+
+    print(f"{'instance':<28} {'engine':<16} {'ms':>9} {'evals/s':>10} {'peak KB':>9} {'penalty':>8} {'best gen':>8}")
+    for num_subjects, num_slots, flags, density in itertools.product(
+            grid["subjects"], grid["slots"], grid["flags"], grid["density"]):
+        key = f"s{num_subjects}_t{num_slots}_{flags}_d{density}"
+        schedule_input = generate_instance(num_subjects, num_slots, flags, density, seed=args.seed)
+        row = benchmark_instance(schedule_input, args.engine, args.max_ms, args.repeat, args.seed, args.verbose,
+                                 reduce_domains=not args.no_domains, seed_ratio=args.seed_ratio)
+        results["instances"][key] = row
+        print(f"{key:<28} {row['engine']:<16} {row['wall_ms']:>9.1f} {row['evals_per_sec']:>10} "
+              f"{row['peak_kb']:>9.1f} {row['penalty']:>8} {row['best_generation'] if row['best_generation'] is not None else '-':>8}")
+
+    for num_rows in PARSER_ROWS:
+        key = f"csv_{num_rows}"
+        row = benchmark_parser(num_rows, args.repeat)
+        results["parsers"][key] = row
+        print(f"{key:<28} {'parser':<16} {row['wall_ms']:>9.1f} {row['rows_per_sec']:>10} {row['peak_kb']:>9.1f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Đã ghi kết quả vào {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Đã cập nhật baseline: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Chưa có baseline ({args.baseline}), chạy lại với --update-baseline để tạo")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("settings") != results["settings"]:
+        print(f"⚠️ Baseline được tạo với cấu hình khác: {baseline.get('settings')}")
+    regressions = compare(results, baseline, args.time_tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} hồi quy so với baseline:")
+        for message in regressions:
+            print(f"   - {message}")
+        return 1
+    print("✅ Không có hồi quy so với baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
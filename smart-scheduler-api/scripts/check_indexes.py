@@ -0,0 +1,129 @@
+"""
+Kiểm tra index MongoDB: chạy explain() cho mọi dạng truy vấn app sử dụng và báo các truy vấn quét cả
+collection (COLLSCAN) hoặc phải sắp xếp trong bộ nhớ (SORT).
+
+Cách chạy:
+    python scripts/check_indexes.py
+init_db tạo index còn thiếu (giống khi khởi động server) trước khi kiểm tra.
+Thoát với mã 1 nếu có truy vấn COLLSCAN ngoài danh sách cho phép.
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from bson import Binary
+
+# Đảm bảo có thể import được modules trong dự án
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.database import init_db, get_database  # noqa: E402
+
+SAMPLE_UUID = Binary.from_uuid(uuid4())
+
+# (tên, collection, filter, sort, cho phép COLLSCAN) - giữ đồng bộ với các truy vấn trong main.py, auth, db/
+QUERY_SHAPES = [
+    ("login / đăng ký: user theo username", "users", {"username": "sample"}, None, False),
+    ("đăng ký / quên mật khẩu: user theo email", "users", {"email": "sample@example.com"}, None, False),
+    ("đăng ký / quên mật khẩu: user theo phone", "users", {"phone": "0900000000"}, None, False),
+    ("admin: danh sách user (all=true)", "users", {}, [("created_at", 1)], False),
+    ("admin: 1 trang user", "users",
+     {"$or": [{"created_at": {"$gt": datetime(2000, 1, 1)}}, {"created_at": datetime(2000, 1, 1), "_id": {"$gt": SAMPLE_UUID}}]},
+     [("created_at", 1), ("_id", 1)], False),
+    ("token: user theo id", "users", {"_id": SAMPLE_UUID}, None, False),
+    ("xóa user: lịch theo user", "schedules", {"user_id": SAMPLE_UUID}, None, False),
+    ("snapshot: phiên bản danh mục", "catalog_versions", {"_id": {"$in": ["*", "2024-2"]}}, None, False),
+    ("snapshot danh mục 1 học kỳ", "courses", {"semester": "2024-2"}, None, False),
+    ("snapshot toàn bộ danh mục", "courses", {}, None, True),  # Cố ý đọc hết
+    ("upload/thêm môn: môn theo code + học kỳ", "courses", {"code": "INT1001", "semester": "2024-2"}, None, False),
+    ("các nhóm lớp của 1 môn", "courses", {"metadata.original_code": "INT1001", "semester": "2024-2"},
+     [("code", 1)], False),
+    ("danh sách môn theo học kỳ + ngành", "courses", {"semester": "2024-2", "major": "CNTT"}, [("code", 1)], False),
+    ("chat: lịch sử 1 phiên", "chat_history", {"session_id": "sample", "user_id": SAMPLE_UUID},
+     [("created_at", 1)], False),
+    ("chat: toàn bộ lịch sử của user", "chat_history", {"user_id": SAMPLE_UUID}, [("created_at", 1)], False),
+    ("chat: 1 trang lịch sử", "chat_history",
+     {"user_id": SAMPLE_UUID, "$or": [{"created_at": {"$gt": datetime(2000, 1, 1)}},
+                                     {"created_at": datetime(2000, 1, 1), "_id": {"$gt": SAMPLE_UUID}}]},
+     [("created_at", 1), ("_id", 1)], False),
+    ("chat: 1 trang của 1 phiên", "chat_history",
+     {"user_id": SAMPLE_UUID, "session_id": "sample", "$or": [{"created_at": {"$gt": datetime(2000, 1, 1)}},
+                                                             {"created_at": datetime(2000, 1, 1), "_id": {"$gt": SAMPLE_UUID}}]},
+     [("created_at", 1), ("_id", 1)], False),
+    ("chat: chọn lô tin nhắn cũ (retention)", "chat_history",
+     {"created_at": {"$lt": datetime(2000, 1, 1)},
+      "$or": [{"retention_claim": None}, {"retention_claimed_at": {"$lt": datetime(2000, 1, 1)}}]},
+     [("created_at", 1)], False),
+    ("chat: tìm kiếm", "chat_history", {"user_id": SAMPLE_UUID, "message": {"$regex": "abc", "$options": "i"}},
+     [("created_at", 1)], False),
+    ("OTP: xóa OTP cũ", "otps", {"identifier": "sample", "purpose": "forgot_password", "is_used": False}, None, False),
+    ("OTP: xác nhận", "otps", {"identifier": "sample", "otp_code": "123456", "purpose": "forgot_password",
+                             "is_used": False}, None, False),
+]
+
+
+def plan_stages(plan):
+    """Tên các stage trong winningPlan (duyệt cả inputStage/inputStages/queryPlan)"""
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        for key in ("inputStage", "queryPlan"):
+            if key in node:
+                pending.append(node[key])
+        pending.extend(node.get("inputStages", []))
+    return stages
+
+
+def plan_index(plan):
+    """Tên index được dùng trong winningPlan, None nếu không dùng index"""
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if "indexName" in node:
+            return node["indexName"]
+        for key in ("inputStage", "queryPlan"):
+            if key in node:
+                pending.append(node[key])
+        pending.extend(node.get("inputStages", []))
+    return None
+
+
+async def main():
+    await init_db()
+    database = get_database()
+
+    failures = 0
+    print(f"\n{'Truy vấn':<45} {'Stage':<28} Index")
+    for name, collection_name, query, sort, collscan_ok in QUERY_SHAPES:
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        stages = plan_stages(winning_plan)
+        index_name = plan_index(winning_plan) or "-"
+
+        mark = "✅"
+        if "COLLSCAN" in stages and not collscan_ok:
+            mark = "❌"
+            failures += 1
+        elif "SORT" in stages:
+            mark = "⚠️"  # Dùng index để lọc nhưng vẫn sắp xếp trong bộ nhớ
+        print(f"{mark} {name:<43} {'>'.join(reversed(stages)):<28} {index_name}")
+
+    if failures:
+        print(f"\n❌ {failures} truy vấn quét cả collection (COLLSCAN)")
+        sys.exit(1)
+    print("\n✅ Mọi truy vấn đều dùng index")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
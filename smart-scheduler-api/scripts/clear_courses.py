@@ -13,11 +13,16 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from db.database import init_db  # noqa: E402
 from db.models import Course  # noqa: E402
+from db.catalog import bump_catalog_version  # noqa: E402
 
 
 async def main():
     await init_db()
+    semesters = await Course.distinct("semester")
     result = await Course.delete_all()
+    # Báo cho các server đang chạy nạp lại snapshot danh mục
+    for semester in semesters or [None]:
+        await bump_catalog_version(semester)
     deleted = getattr(result, "deleted_count", None)
     print(f"🗑️  Đã xóa {deleted if deleted is not None else '0'} record trong collection Course.")
 
@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from db.database import init_db
 from db.models import Course
+from db.catalog import bump_catalog_version
 from scripts.add_sample_courses import add_sample_courses
 
 
@@ -18,7 +19,10 @@ async def reset_courses():
     await init_db()
 
     print("🧹 Đang xoá toàn bộ Course hiện có ...")
+    semesters = await Course.distinct("semester")
     delete_result = await Course.find_all().delete()
+    for semester in semesters or [None]:
+        await bump_catalog_version(semester)
     deleted = getattr(delete_result, "deleted_count", delete_result)
     print(f"✅ Đã xoá {deleted} lớp học.")
 
@@ -46,6 +50,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from db.database import init_db
 from db.models import Course
+from db.catalog import bump_catalog_version
 from scripts.add_sample_courses import add_sample_courses
 
 
@@ -54,7 +59,11 @@ async def reset_courses():
     await init_db()
 
     # Xóa toàn bộ collection courses
+    semesters = await Course.distinct("semester")
     deleted_result = await Course.find_all().delete()
+    # Báo cho các server đang chạy nạp lại snapshot danh mục
+    for semester in semesters or [None]:
+        await bump_catalog_version(semester)
     print(f"🗑️ Đã xóa toàn bộ courses, documents bị xóa: {deleted_result}")
 
     # Tạo lại dữ liệu mẫu với đầy đủ thông tin (bao gồm 'day')
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Cho phép import các module của dự án (db, genetic_algorithm...) khi chạy pytest từ bất kỳ đâu
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+from genetic_algorithm.scheduler_ga import find_optimal_schedule
+from main import build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+def solve(num_subjects, num_slots, flags, density, engine, top_k, min_distance=None):
+    schedule_input = generate_instance(num_subjects, num_slots, flags, density)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    return find_optimal_schedule(
+        names, time_slots, schedule_input.constraints, priorities, additional, details,
+        max_ms=600, return_stats=True, engine=engine, seed=0, top_k=top_k, min_distance=min_distance,
+    )
+
+
+def distance(schedule_a, schedule_b):
+    return sum(a["time"] != b["time"] for a, b in zip(schedule_a, schedule_b))
+
+
+@pytest.mark.parametrize("engine", ["exact", "annealing", "tabu", "ga", "islands"])
+def test_every_engine_returns_top_k_distinct_alternatives(engine):
+    top_k, min_distance = 3, 6  # Mặc định min_distance = 20% số môn
+    num_subjects = 10 if engine == "exact" else 30
+    schedule, cost, stats = solve(num_subjects, 21, "all", 0.4, engine, top_k, min_distance)
+
+    alternatives = stats["alternatives"]
+    assert len(alternatives) == top_k - 1
+    assert stats["alternatives_missing"] == 0
+    schedules = [schedule] + [alternative["schedule"] for alternative in alternatives]
+    for schedule_a, schedule_b in itertools.combinations(schedules, 2):
+        assert distance(schedule_a, schedule_b) >= min_distance
+    assert all(alternative["cost"] >= cost for alternative in alternatives)
+
+
+def test_tabu_on_16_subjects_fills_top_k():
+    _, _, stats = solve(16, 15, "all", 0.4, "tabu", 5)
+    assert len(stats["alternatives"]) == 4
+    assert stats["alternatives_missing"] == 0
+
+
+def test_shortfall_is_reported_when_problem_has_too_few_solutions():
+    # 2 môn, mỗi môn cố định đúng 1 slot: chỉ có 1 lời giải
+    schedule, _, stats = find_optimal_schedule(
+        ["A", "B"], ["T2_Sáng", "T3_Sáng"], {}, {"A": 1, "B": 1}, None,
+        {"A": {"days": ["T2"], "start_time": "07:00", "end_time": "09:00"},
+         "B": {"days": ["T3"], "start_time": "07:00", "end_time": "09:00"}},
+        max_ms=200, return_stats=True, top_k=3,
+    )
+    assert stats["alternatives"] == []
+    assert stats["alternatives_missing"] == 2
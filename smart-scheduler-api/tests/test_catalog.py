@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from db import catalog
+
+
+class FakeQuery:
+    def __init__(self, items):
+        self.items = items
+
+    async def to_list(self):
+        return list(self.items)
+
+
+class FakeCourses:
+    """Collection courses trong bộ nhớ (chỉ đủ cho CatalogSnapshotStore._load)"""
+
+    def __init__(self):
+        self.documents = []
+
+    def add(self, code, semester):
+        self.documents.append(SimpleNamespace(id=uuid4(), code=code, name=code, semester=semester, major=None,
+                                              metadata={"original_code": code.split("-G")[0]}))
+
+    def find(self, query):
+        return FakeQuery(d for d in self.documents if "semester" not in query or d.semester == query["semester"])
+
+
+class FakeVersionUpdate:
+    def __init__(self, versions, key):
+        self.versions, self.key = versions, key
+
+    async def update(self, update, upsert=False):
+        self.versions[self.key] = self.versions.get(self.key, 0) + update["$inc"]["version"]
+
+
+class FakeCatalogVersions:
+    """Collection catalog_versions trong bộ nhớ, dùng chung giữa các "worker" """
+
+    def __init__(self):
+        self.versions = {}
+
+    def find(self, query):
+        keys = query["_id"]["$in"]
+        return FakeQuery(SimpleNamespace(id=key, version=self.versions[key]) for key in keys if key in self.versions)
+
+    def find_one(self, query):
+        return FakeVersionUpdate(self.versions, query["_id"])
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    courses, versions = FakeCourses(), FakeCatalogVersions()
+    monkeypatch.setattr(catalog, "Course", courses)
+    monkeypatch.setattr(catalog, "CatalogVersion", versions)
+    monkeypatch.setattr(catalog, "_known_versions", {})
+    monkeypatch.setattr(catalog, "_checked_at", {})
+    return courses, versions
+
+
+def codes(snapshot):
+    return [course.code for course in snapshot.courses]
+
+
+def test_write_from_another_worker_is_seen(fake_db):
+    courses, versions = fake_db
+    courses.add("INT1001-G01", "2024-2")
+    store = catalog.CatalogSnapshotStore(check_seconds=0)
+
+    async def scenario():
+        assert codes(await store.get("2024-2")) == ["INT1001-G01"]
+        assert codes(await store.get("2024-2")) == ["INT1001-G01"]
+        assert store.loads == 1
+
+        # Worker khác / script ghi thẳng vào MongoDB và tăng phiên bản
+        courses.add("INT1002-G01", "2024-2")
+        versions.versions["2024-2"] = versions.versions.get("2024-2", 0) + 1
+        versions.versions["*"] = versions.versions.get("*", 0) + 1
+        assert codes(await store.get("2024-2")) == ["INT1001-G01", "INT1002-G01"]
+        assert codes(await store.get(None)) == ["INT1001-G01", "INT1002-G01"]
+
+    asyncio.run(scenario())
+
+
+def test_version_is_rechecked_only_after_check_interval(fake_db):
+    courses, versions = fake_db
+    courses.add("INT1001-G01", "2024-2")
+    store = catalog.CatalogSnapshotStore(check_seconds=3600)
+
+    async def scenario():
+        await store.get("2024-2")
+        versions.versions["2024-2"] = 1
+        courses.add("INT1002-G01", "2024-2")
+        assert codes(await store.get("2024-2")) == ["INT1001-G01"]
+        assert store.current("2024-2") is not None
+
+        store.check_seconds = 0
+        assert store.current("2024-2") is None
+        assert codes(await store.get("2024-2")) == ["INT1001-G01", "INT1002-G01"]
+
+    asyncio.run(scenario())
+
+
+def test_bump_in_same_worker_is_seen_immediately(fake_db):
+    courses, _ = fake_db
+    store = catalog.CatalogSnapshotStore(check_seconds=3600)
+
+    async def scenario():
+        assert codes(await store.get("2024-2")) == []
+        courses.add("INT1001-G01", "2024-2")
+        await catalog.bump_catalog_version("2024-2")
+        assert catalog.get_catalog_version("2024-2") == 1
+        assert catalog.get_catalog_version() == 1
+        assert codes(await store.get("2024-2")) == ["INT1001-G01"]
+
+    asyncio.run(scenario())
+
+
+def test_write_without_version_bump_is_seen_after_max_age(fake_db):
+    courses, _ = fake_db
+    store = catalog.CatalogSnapshotStore(check_seconds=0, max_age_seconds=3600)
+
+    async def scenario():
+        await store.get("2024-2")
+        courses.add("INT1001-G01", "2024-2")
+        assert codes(await store.get("2024-2")) == []
+
+        store.max_age_seconds = 0
+        assert codes(await store.get("2024-2")) == ["INT1001-G01"]
+
+    asyncio.run(scenario())
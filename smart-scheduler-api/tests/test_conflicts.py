@@ -0,0 +1,65 @@
+import itertools
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from genetic_algorithm.conflicts import ConflictIndex, entries_conflict, find_conflicts
+from genetic_algorithm.section_selection import select_sections
+
+DAYS = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
+
+
+def random_entry(rng):
+    start_minutes = rng.randrange(6 * 60, 20 * 60, 5)
+    end_minutes = start_minutes + rng.choice([45, 50, 90, 120, 150])
+    start = date(2025, 1, 1) + timedelta(days=rng.randrange(90))
+    end = start + timedelta(days=rng.randrange(-10, 120))  # Có cả khoảng ngày ngược (dữ liệu lỗi)
+    return {
+        "data": SimpleNamespace(
+            start_time=f"{start_minutes // 60:02d}:{start_minutes % 60:02d}",
+            end_time=f"{end_minutes // 60:02d}:{end_minutes % 60:02d}",
+        ),
+        "days": rng.choice([None, rng.sample(DAYS, 1), rng.sample(DAYS, 2)]),
+        "start": start,
+        "end": end,
+    }
+
+
+def pairwise_conflicts(entries):
+    # Cách cũ: so từng cặp
+    return [(a, b) for a, b in itertools.combinations(entries, 2) if entries_conflict(a, b)]
+
+
+def as_positions(entries, pairs):
+    position = {id(entry): i for i, entry in enumerate(entries)}
+    return [(position[id(a)], position[id(b)]) for a, b in pairs]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_conflict_index_matches_pairwise_scan(seed):
+    rng = random.Random(seed)
+    entries = [random_entry(rng) for _ in range(rng.randint(0, 40))]
+    expected = as_positions(entries, pairwise_conflicts(entries))
+    assert as_positions(entries, ConflictIndex(entries).conflicts()) == expected
+    assert as_positions(entries, find_conflicts(entries)) == expected
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_select_sections_is_optimal(seed):
+    rng = random.Random(seed)
+    candidates = [[random_entry(rng) for _ in range(rng.randint(1, 3))] for _ in range(rng.randint(1, 6))]
+    priorities = [rng.randint(1, 10) for _ in candidates]
+
+    chosen, stats = select_sections(candidates, priorities, max_ms=None)
+    selected = [candidates[i][k] for i, k in enumerate(chosen) if k is not None]
+    assert stats["optimal"]
+    assert not pairwise_conflicts(selected)
+
+    best = 0
+    for combo in itertools.product(*[[None] + list(range(len(sections))) for sections in candidates]):
+        picked = [candidates[i][k] for i, k in enumerate(combo) if k is not None]
+        if not pairwise_conflicts(picked):
+            best = max(best, sum(priorities[i] for i, k in enumerate(combo) if k is not None))
+    assert sum(priorities[i] for i, k in enumerate(chosen) if k is not None) == best
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+import pytest
+
+from genetic_algorithm.scheduler_ga import ScheduleGA
+from main import build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+def small_ga(flags, seed, **options):
+    schedule_input = generate_instance(12, 15, flags, 0.4, seed=seed)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    return ScheduleGA(names, time_slots, schedule_input.constraints, priorities, additional, details, seed=seed,
+                      **options)
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+def test_list_ga_runs_with_delta_checks(flags):
+    random.seed(0)
+    # check_delta=True: mỗi apply_move (lai ghép, đột biến, leo đồi) đều được so với tính lại toàn bộ
+    ga = small_ga(flags, seed=1, vectorized=False, check_delta=True)
+    _, best_score = ga.run_ga(max_ms=500, memetic_interval=5)
+    assert ga.stats["generations"] > 1
+    assert ga.calculate_fitness(ga.best_individual) == best_score
+
+
+@pytest.mark.parametrize("flags, reduce_domains", [("none", True), ("all", True), ("all", False)])
+def test_delta_penalty_matches_full_evaluation(flags, reduce_domains):
+    random.seed(2)
+    ga = small_ga(flags, seed=2, reduce_domains=reduce_domains)
+    rng = np.random.default_rng(2)
+    states = [ga.create_state(genes) for genes in ga.random_population(rng, 6).tolist()]
+    for state in states:
+        assert state.penalty == ga.calculate_fitness(state.genes)
+
+    for step in range(300):
+        if step % 3:
+            # Đổi slot 1 gen (kể cả gen ngoài miền khi không thu hẹp miền)
+            state = states[rng.integers(len(states))]
+            ga.apply_move(state, int(rng.integers(ga.num_subjects)), int(rng.integers(ga.num_slots)))
+            assert state.penalty == ga.calculate_fitness(state.genes)
+        else:
+            # Lai ghép 1 điểm: con khớp đúng cách ghép gen của cha mẹ
+            first, second = rng.choice(len(states), size=2, replace=False)
+            parent1, parent2 = states[first], states[second]
+            child1, child2 = ga.crossover_states(parent1, parent2)
+            point = next((i for i in range(ga.num_subjects) if child1.genes[i] != parent1.genes[i]), None)
+            if point is not None:
+                assert child1.genes == parent1.genes[:point] + parent2.genes[point:]
+            for child in (child1, child2):
+                assert child.penalty == ga.calculate_fitness(child.genes)
+            states[first], states[second] = child1, child2
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from genetic_algorithm.problem import PERIOD_MINUTES, CompiledProblem, subject_slot_domain
+from main import ALL_POSSIBLE_SLOTS
+
+
+def clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def domain_slots(details, time_slots=ALL_POSSIBLE_SLOTS):
+    domain = subject_slot_domain(details, time_slots)
+    return None if domain is None else [time_slots[index] for index in domain]
+
+
+@pytest.mark.parametrize("period", PERIOD_MINUTES)
+def test_session_inside_one_period(period):
+    low, high = PERIOD_MINUTES[period]
+    details = {"days": ["T3", "T5"], "start_time": clock(low + 30), "end_time": clock(high - 30)}
+    assert domain_slots(details) == [f"T3_{period}", f"T5_{period}"]
+
+
+@pytest.mark.parametrize("period", PERIOD_MINUTES)
+def test_period_boundaries_are_exclusive(period):
+    low, high = PERIOD_MINUTES[period]
+    # Kết thúc đúng lúc buổi bắt đầu / bắt đầu đúng lúc buổi kết thúc: không chạm buổi đó
+    sessions = []
+    if low > 0:
+        sessions.append((low - 60, low))
+    if high < 24 * 60:
+        sessions.append((high, high + 60))
+    for start, end in sessions:
+        slots = domain_slots({"days": ["T4"], "start_time": clock(start), "end_time": clock(end)})
+        assert slots and f"T4_{period}" not in slots
+
+
+@pytest.mark.parametrize("start_time, end_time, periods", [
+    ("11:00", "13:00", ["Sáng", "Chiều"]),  # Qua 2 buổi thì cả 2 buổi đều hợp lệ
+    ("17:30", "18:30", ["Chiều", "Tối"]),
+    ("07:00", "20:00", ["Sáng", "Chiều", "Tối"]),
+    ("12:00", "17:59", ["Chiều"]),
+])
+def test_session_spanning_periods(start_time, end_time, periods):
+    details = {"days": ["T6"], "start_time": start_time, "end_time": end_time}
+    assert domain_slots(details) == [f"T6_{period}" for period in periods]
+
+
+def test_missing_information():
+    # Không rõ giờ: mọi buổi của các ngày học
+    assert domain_slots({"days": ["T2"], "start_time": "10:00", "end_time": "09:00"}) == ["T2_Sáng", "T2_Chiều", "T2_Tối"]
+    # Không rõ ngày: buổi học ở mọi ngày
+    assert domain_slots({"start_time": "07:00", "end_time": "09:00"}) == [
+        slot for slot in ALL_POSSIBLE_SLOTS if slot.endswith("_Sáng")
+    ]
+    assert domain_slots({}) is None
+    # Không slot nào khớp (VD ngày học không nằm trong danh sách slot): không giới hạn
+    assert domain_slots({"days": ["CN"], "start_time": "07:00", "end_time": "09:00"}, ALL_POSSIBLE_SLOTS[:6]) is None
+
+
+def test_compiled_domains_and_random_genes_respect_real_times():
+    subjects = ["Sáng T3", "Chiều T2/T4", "Không rõ"]
+    details = {
+        "Sáng T3": {"days": ["T3"], "start_time": "07:00", "end_time": "09:00"},
+        "Chiều T2/T4": {"days": ["T2", "T4"], "start_time": "13:00", "end_time": "15:00"},
+    }
+    problem = CompiledProblem(subjects, ALL_POSSIBLE_SLOTS, {}, subject_details=details)
+    assert [[ALL_POSSIBLE_SLOTS[index] for index in domain] for domain in problem.domains[:2]] == [
+        ["T3_Sáng"], ["T2_Chiều", "T4_Chiều"],
+    ]
+    assert len(problem.domains[2]) == len(ALL_POSSIBLE_SLOTS)
+    assert problem.free_subjects == [1, 2]
+
+    rng = np.random.default_rng(0)
+    population = problem.random_population(rng, 200)
+    assert all(problem.allowed_slots[i, population[:, i]].all() for i in range(len(subjects)))
+    subject_indices, slot_indices = problem.random_moves(rng, 200)
+    assert problem.allowed_slots[subject_indices, slot_indices].all()
+    # Không thu hẹp miền: mọi môn được xếp vào mọi slot
+    assert not CompiledProblem(subjects, ALL_POSSIBLE_SLOTS, {}, subject_details=details, reduce_domains=False).is_reduced
@@ -0,0 +1,103 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from genetic_algorithm.exact_solver import EXACT_MAX_SUBJECTS, ExactSolver, hungarian
+from genetic_algorithm.problem import CompiledProblem
+from main import ALL_POSSIBLE_SLOTS, build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+BRUTE_FORCE_MAX_ASSIGNMENTS = 100000
+
+
+def brute_force(problem):
+    """Penalty nhỏ nhất trên mọi cách gán (trong miền của từng môn), tính theo từng khối bằng evaluate_population"""
+    assignments = itertools.product(*problem.domains)
+    best = None
+    while True:
+        block = np.array(list(itertools.islice(assignments, 20000)), dtype=np.int64)
+        if not len(block):
+            return best
+        penalty = int(problem.evaluate_population(block).min())
+        best = penalty if best is None else min(best, penalty)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_hungarian_matches_brute_force(seed):
+    rng = random.Random(seed)
+    rows = rng.randint(1, 5)
+    columns = rng.randint(rows, 7)
+    cost = [[rng.randint(-200, 1000) for _ in range(columns)] for _ in range(rows)]
+
+    assignment = hungarian(cost).tolist()
+    assert len(set(assignment)) == rows
+    best = min(sum(cost[i][j] for i, j in enumerate(assigned))
+               for assigned in itertools.permutations(range(columns), rows))
+    assert sum(cost[i][j] for i, j in enumerate(assignment)) == best
+
+
+def unary_problem(rng):
+    # Không có avoidConsecutive/balanceDays, không thu hẹp miền, chênh lệch unary < 1000: dùng Hungarian
+    time_slots = sorted(rng.sample(ALL_POSSIBLE_SLOTS, rng.randint(4, 7)), key=ALL_POSSIBLE_SLOTS.index)
+    subjects = [f"Môn {i}" for i in range(rng.randint(1, len(time_slots)))]
+    constraints = {name: rng.sample(time_slots, rng.randint(1, 2)) for name in subjects if rng.random() < 0.5}
+    details = {
+        name: {"is_retake": rng.random() < 0.2, "preferred_days": rng.sample(["T2", "T3", "T4", "T5"], 2)}
+        for name in subjects
+    }
+    return CompiledProblem(subjects, time_slots, constraints, {name: rng.randint(1, 10) for name in subjects},
+                           {"allowSaturday": True}, details)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_hungarian_engine_is_optimal_when_applicable(seed):
+    problem = unary_problem(random.Random(seed))
+    solver = ExactSolver(problem)
+    assert solver.use_hungarian()
+
+    individual, penalty, stats = solver.solve()
+    assert stats["engine"] == "hungarian" and stats["optimal"]
+    assert problem.calculate_fitness(individual) == penalty
+    # So với mọi cách gán, kể cả cách gán có trùng lịch
+    assert penalty == brute_force(problem)
+
+
+def compiled(num_subjects, flags, seed, reduce_domains=True):
+    schedule_input = generate_instance(num_subjects, 15, flags, 0.4, seed=seed)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    return CompiledProblem(names, time_slots, schedule_input.constraints, priorities, additional, details,
+                           reduce_domains=reduce_domains)
+
+
+def check_branch_and_bound(problem):
+    individual, penalty, stop_reason = ExactSolver(problem)._branch_and_bound(deadline=None)
+    assert stop_reason == "optimal"
+    assert all(slot in domain for slot, domain in zip(individual, problem.domains))
+    assert problem.calculate_fitness(individual) == penalty
+    assert penalty == brute_force(problem)
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+@pytest.mark.parametrize("num_subjects", [4, 6, 8, 10])
+def test_branch_and_bound_matches_brute_force(flags, num_subjects):
+    checked = 0
+    for seed in range(8):
+        problem = compiled(num_subjects, flags, seed)
+        assert len(problem.free_subjects) <= EXACT_MAX_SUBJECTS
+        # Chỉ so trên các instance duyệt hết được
+        if math.prod(problem.domain_sizes.tolist()) <= BRUTE_FORCE_MAX_ASSIGNMENTS:
+            check_branch_and_bound(problem)
+            checked += 1
+    assert checked >= 4
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+@pytest.mark.parametrize("seed", range(3))
+def test_branch_and_bound_without_domain_reduction(flags, seed):
+    # Đủ 21 slot cho mọi môn: lời giải ban đầu là gán Hungarian
+    check_branch_and_bound(compiled(3, flags, seed, reduce_domains=False))
@@ -0,0 +1,48 @@
+import time
+
+from genetic_algorithm.problem import CompiledProblem
+from genetic_algorithm.scheduler_ga import ScheduleGA, SolutionArchive, run_islands
+from genetic_algorithm.solvers import solve_problem
+from main import build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+def large_problem():
+    schedule_input = generate_instance(60, 15, "all", 0.4)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    return CompiledProblem(names, time_slots, schedule_input.constraints, priorities, additional, details)
+
+
+def test_same_seed_gives_same_result_in_parallel_and_sequential():
+    problem = large_problem()
+    options = dict(seed=7, num_islands=3, generations=40, migration_interval=10, memetic_interval=0,
+                   stagnation_generations=None)
+    parallel = run_islands(problem, parallel=True, **options)
+    sequential = run_islands(problem, parallel=False, **options)
+    assert parallel[:2] == sequential[:2]
+    assert problem.calculate_fitness(parallel[0]) == parallel[1]
+
+
+def test_deadline_is_checked_inside_each_epoch():
+    problem = large_problem()
+    started_at = time.perf_counter()
+    _, _, stats = run_islands(problem, seed=1, max_ms=300, num_islands=2, generations=100000,
+                              migration_interval=100000, stagnation_generations=None, parallel=False)
+    assert stats["stop_reason"] == "deadline"
+    # 1 epoch (100000 thế hệ) không được chạy hết: dừng ngay khi quá max_ms
+    assert (time.perf_counter() - started_at) * 1000 < 1500
+
+
+def test_islands_engine_uses_seeding_memetic_and_archive():
+    problem = large_problem()
+    archive = SolutionArchive(3, 5)
+    individual, penalty, stats = solve_problem(problem, engine="islands", max_ms=1500, seed=3, archive=archive,
+                                               num_islands=2, parallel=False)
+    assert stats["engine"] == "islands"
+    assert stats["memetic"]["phases"] > 0
+    assert len(archive) >= 1
+    assert problem.calculate_fitness(individual) == penalty
+    # Cá thể tham lam (gieo hạt) đã tốt: islands không tệ hơn xếp tham lam
+    greedy = problem.calculate_fitness(ScheduleGA.from_problem(problem).greedy_individual())
+    assert penalty <= greedy
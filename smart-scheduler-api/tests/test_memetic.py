@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from genetic_algorithm.scheduler_ga import ScheduleGA
+from main import build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+def make_ga(flags, seed, vectorized=True):
+    schedule_input = generate_instance(25, 15, flags, 0.4, seed=seed)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    ga = ScheduleGA(names, time_slots, schedule_input.constraints, priorities, additional, details,
+                    vectorized=vectorized, seed=seed)
+    ga.init_memetic(1, memetic_elites=5, memetic_max_ms=5000)
+    return ga
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+@pytest.mark.parametrize("seed", range(3))
+def test_local_search_never_raises_penalty(flags, seed):
+    ga = make_ga(flags, seed)
+    for genes in ga.random_population(ga.rng, 5).tolist():
+        state = ga.create_state(genes)
+        before = state.penalty
+        ga.local_search_state(state)
+        assert state.penalty <= before
+        assert state.penalty == ga.calculate_fitness(state.genes)
+        # Kết quả là cực tiểu địa phương: không còn đổi slot 1 môn nào làm giảm penalty
+        for i in ga.free_subjects:
+            for slot_index in ga.domains[i]:
+                candidate = state.genes[:]
+                candidate[i] = slot_index
+                assert ga.calculate_fitness(candidate) >= state.penalty
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+def test_memetic_batch_never_raises_penalty(flags):
+    ga = make_ga(flags, seed=4)
+    population = ga.random_population(ga.rng, 20)
+    scores = ga.evaluate_population(population)
+    before = scores.copy()
+
+    ga.memetic_batch(population, scores)
+    assert (scores <= before).all()
+    assert (scores < before).sum() == ga.memetic_stats["improved"] > 0
+    assert scores.tolist() == ga.evaluate_population(population).tolist()
+    # Chỉ các cá thể tốt nhất được leo đồi, phần còn lại giữ nguyên
+    assert (scores != before).sum() <= ga.memetic_elites
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+def test_memetic_states_never_raises_penalty(flags):
+    random.seed(5)
+    ga = make_ga(flags, seed=5, vectorized=False)
+    population = [ga.create_state(ga.create_individual()) for _ in range(20)]
+    before = [state.penalty for state in population]
+
+    ga.memetic_states(population)
+    after = [state.penalty for state in population]
+    assert all(new <= old for new, old in zip(after, before))
+    assert sum(new < old for new, old in zip(after, before)) == ga.memetic_stats["improved"] > 0
+    assert after == [ga.calculate_fitness(state.genes) for state in population]
+    assert sum(new != old for new, old in zip(after, before)) <= ga.memetic_elites
@@ -0,0 +1,63 @@
+import base64
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from db.catalog import CatalogSnapshot
+from db.pagination import after_filter, decode_cursor, encode_cursor
+
+
+def forge(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_cursor_round_trip():
+    key = ["INT1001", str(uuid4())]
+    assert decode_cursor(encode_cursor(key), 2) == key
+    assert decode_cursor(encode_cursor([None, "x"]), 2, nullable=True) == [None, "x"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "không-phải-base64",
+    forge({"a": 1}),
+    forge(["INT1001"]),
+    forge(["INT1001", "x", "y"]),
+    forge([1, "x"]),
+    forge([["INT1001"], "x"]),
+    forge([{"$gt": ""}, "x"]),
+    forge([None, "x"]),
+])
+def test_forged_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_nullable_cursor_still_rejects_other_types():
+    with pytest.raises(ValueError):
+        decode_cursor(forge([{"$ne": None}, "x"]), 2, nullable=True)
+
+
+def test_snapshot_pages_follow_cursor():
+    courses = [
+        SimpleNamespace(id=uuid4(), code=f"INT{i:04d}", major="CNTT" if i % 2 else "KT", metadata={})
+        for i in range(7)
+    ]
+    snapshot = CatalogSnapshot("2024-2", 0, courses)
+    assert snapshot.count() == 7 and snapshot.count("CNTT") == 3
+
+    seen, after = [], None
+    while True:
+        page = snapshot.page(after, 3, "CNTT")
+        seen += [course.code for course in page]
+        if len(page) < 3:
+            break
+        after = decode_cursor(encode_cursor(list(snapshot.sort_key(page[-1]))), 2)
+    assert seen == ["INT0001", "INT0003", "INT0005"]
+
+
+def test_after_filter_with_missing_value():
+    assert after_filter(["created_at", "_id"], [None, "x"]) == {
+        "$or": [{"created_at": {"$ne": None}}, {"created_at": None, "_id": {"$gt": "x"}}]
+    }
@@ -0,0 +1,236 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from db.catalog import CatalogSnapshot, SectionIndex
+from genetic_algorithm.conflicts import find_conflicts
+from genetic_algorithm.section_selection import DEFAULT_SELECTION_MAX_MS, select_sections
+import main
+from main import (
+    _alternative_entries, _request_semester, _resolve_conflicts, _section_slot, build_schedule_entries,
+    selection_order_key,
+)
+from schemas import ScheduleInput, SubjectInput
+
+SEMESTER = "2024-2"
+
+
+class CodedSubject(SubjectInput):
+    """Môn có mã nhóm lớp (có code thì mới tìm nhóm thay thế)"""
+    code: str
+
+
+def subject(code, day, start_time, end_time, priority=5, is_retake=False):
+    return CodedSubject(
+        name=code, code=code, day=day, start_time=start_time, end_time=end_time, credits=3,
+        subject_type="Lý thuyết", instructor="GV", start_date="2025-01-06", end_date="2025-04-30",
+        priority=priority, is_retake=is_retake,
+    )
+
+
+def section(code, day, start_time, end_time):
+    """1 nhóm lớp trong danh mục (Course giả, đủ cho CatalogSnapshot)"""
+    return SimpleNamespace(
+        id=uuid4(), code=code, name=code, semester=SEMESTER, major=None, credits=3, department="GV",
+        metadata={
+            "original_code": code.split("-G")[0], "day": day, "start_time": start_time, "end_time": end_time,
+            "start_date": "2025-01-06", "end_date": "2025-04-30",
+        },
+    )
+
+
+def section_index(courses):
+    # Snapshot dựng sẵn trong bộ nhớ: prefetch thấy đã có học kỳ nên không truy vấn DB
+    index = SectionIndex()
+    index._snapshots[SEMESTER] = CatalogSnapshot(SEMESTER, 0, courses)
+    return index
+
+
+def resolve(subjects, courses, available_time_slots=None):
+    input = ScheduleInput(subjects=subjects, available_time_slots=available_time_slots or [])
+    return asyncio.run(_resolve_conflicts(input, section_index(courses)))
+
+
+def baseline_resolution(subjects, courses, available_time_slots=None):
+    """
+    Vòng lặp xử lý trùng lịch cũ (trước select_sections): lấy cặp trùng đầu tiên, giữ môn ưu tiên hơn,
+    môn kia chuyển sang nhóm thay thế đầu tiên (ưu tiên nhóm trong slot rảnh) không trùng môn nào, không có thì bị loại
+    """
+    input = ScheduleInput(subjects=subjects, available_time_slots=available_time_slots or [])
+    index = section_index(courses)
+    semester = _request_semester(input)
+    entries = build_schedule_entries(input)
+    active_entries = entries[:]
+    removed = []
+    for _ in range(len(entries) * 3):
+        conflicts = find_conflicts(active_entries)
+        if not conflicts:
+            break
+        keep_entry, remove_entry = sorted(conflicts[0], key=selection_order_key)
+        alternatives = [
+            alt for alt in _alternative_entries(remove_entry, index, semester)
+            if not find_conflicts([alt, keep_entry]) and not any(
+                find_conflicts([alt, other]) for other in active_entries
+                if other["data"].code != remove_entry["data"].code
+            )
+        ]
+        if alternatives:
+            preferred = [alt for alt in alternatives if _section_slot(alt) in (input.available_time_slots or [])]
+            active_entries[active_entries.index(remove_entry)] = (preferred or alternatives)[0]
+            continue
+        removed.append(remove_entry["data"].name)
+        active_entries = [entry for entry in active_entries if entry is not remove_entry]
+    return [entry["data"].code for entry in active_entries], removed
+
+
+def outcome(result):
+    active_entries, removed_conflicts, _ = result
+    return [entry["data"].code for entry in active_entries], [drop["subject"] for drop in removed_conflicts]
+
+
+BASELINE_CASES = {
+    "no_conflict": (
+        [subject("A-G01", "T2", "07:00", "09:00"), subject("B-G01", "T3", "07:00", "09:00")],
+        [],
+    ),
+    "moves_lower_priority_to_free_section": (
+        [subject("A-G01", "T2", "07:00", "09:00", priority=8), subject("B-G01", "T2", "08:00", "10:00")],
+        [section("B-G01", "T2", "08:00", "10:00"), section("B-G02", "T4", "08:00", "10:00")],
+    ),
+    "skips_section_clashing_with_third_subject": (
+        [
+            subject("A-G01", "T2", "07:00", "09:00", priority=8),
+            subject("B-G01", "T2", "08:00", "10:00"),
+            subject("C-G01", "T4", "08:00", "10:00", priority=7),
+        ],
+        [section("B-G02", "T4", "08:30", "10:30"), section("B-G03", "T5", "13:00", "15:00")],
+    ),
+    "drops_subject_without_alternative": (
+        [subject("A-G01", "T2", "07:00", "09:00", priority=8), subject("B-G01", "T2", "08:00", "10:00")],
+        [section("B-G02", "T2", "07:30", "08:30")],
+    ),
+    "retake_wins_tie": (
+        [subject("A-G01", "T2", "07:00", "09:00", priority=5), subject("B-G01", "T2", "08:00", "10:00", priority=3,
+                                                                     is_retake=True)],
+        [section("A-G02", "T6", "07:00", "09:00")],
+    ),
+    "earlier_subject_wins_tie": (
+        [subject("A-G01", "T2", "07:00", "09:00"), subject("B-G01", "T2", "08:00", "10:00")],
+        [section("A-G02", "T6", "07:00", "09:00"), section("B-G02", "T6", "13:00", "15:00")],
+    ),
+}
+
+
+@pytest.mark.parametrize("case", BASELINE_CASES)
+def test_matches_baseline_resolution(case):
+    subjects, courses = BASELINE_CASES[case]
+    assert outcome(resolve(subjects, courses)) == baseline_resolution(subjects, courses)
+
+
+def random_instance(rng, num_subjects):
+    days = ["T2", "T3", "T4"]
+    subjects, courses = [], []
+    for i in range(num_subjects):
+        code = f"S{i:02d}"
+        times = []
+        for _ in range(1 + rng.randint(0, 2)):
+            start = rng.randrange(7 * 60, 16 * 60, 30)
+            end = start + rng.choice([90, 120, 150])
+            times.append((rng.choice(days), f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+        subjects.append(subject(f"{code}-G01", *times[0], priority=rng.randint(1, 10), is_retake=rng.random() < 0.2))
+        courses += [section(f"{code}-G{k + 1:02d}", *time) for k, time in enumerate(times)]
+    return subjects, courses
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_never_keeps_less_priority_than_baseline(seed):
+    rng = random.Random(seed)
+    subjects, courses = random_instance(rng, rng.randint(2, 8))
+    priority = {entry["data"].code.split("-G")[0]: entry["priority"]
+                for entry in build_schedule_entries(ScheduleInput(subjects=subjects))}
+
+    active_entries, _, _ = resolve(subjects, courses)
+    codes, _ = baseline_resolution(subjects, courses)
+    assert not find_conflicts(active_entries)
+    assert sum(entry["priority"] for entry in active_entries) >= sum(priority[code.split("-G")[0]] for code in codes)
+
+
+def test_keeps_original_section_when_nothing_clashes():
+    # Nhóm thay thế nằm trong slot rảnh nhưng nhóm gốc không trùng gì: ORIGINAL_BONUS > AVAILABLE_BONUS
+    subjects = [subject("A-G01", "T2", "13:00", "15:00"), subject("B-G01", "T3", "07:00", "09:00")]
+    courses = [section("A-G02", "T4", "07:00", "09:00"), section("B-G02", "T5", "07:00", "09:00")]
+    active_entries, removed_conflicts, alternative_sessions_used = resolve(subjects, courses, ["T4_Sáng", "T5_Sáng"])
+    assert [entry["data"].code for entry in active_entries] == ["A-G01", "B-G01"]
+    assert removed_conflicts == [] and alternative_sessions_used == []
+
+
+def test_moved_subject_prefers_section_in_available_slot():
+    subjects = [subject("A-G01", "T2", "07:00", "09:00", priority=8), subject("B-G01", "T2", "08:00", "10:00")]
+    courses = [
+        section("B-G02", "T3", "13:00", "15:00"),  # Không nằm trong slot rảnh, đứng trước
+        section("B-G03", "T5", "07:00", "09:00"),
+        section("B-G04", "T6", "13:00", "15:00"),
+    ]
+    codes, _ = outcome(resolve(subjects, courses, ["T5_Sáng"]))
+    assert codes == ["A-G01", "B-G03"]
+    # Không có slot rảnh nào khớp: nhóm thay thế đầu tiên
+    codes, _ = outcome(resolve(subjects, courses, ["CN_Tối"]))
+    assert codes == ["A-G01", "B-G02"]
+
+
+def test_reports_unresolvable_conflicts():
+    subjects = [
+        subject("A-G01", "T2", "07:00", "09:00", priority=9),
+        subject("B-G01", "T2", "08:00", "10:00", priority=6),
+        subject("C-G01", "T3", "13:00", "15:00"),
+        subject("D-G01", "T3", "14:00", "16:00", priority=3),
+    ]
+    courses = [section("B-G02", "T2", "08:30", "09:30")]  # Nhóm thay thế duy nhất cũng trùng A
+    active_entries, removed_conflicts, alternative_sessions_used = resolve(subjects, courses)
+    assert [entry["data"].code for entry in active_entries] == ["A-G01", "C-G01"]
+    assert [(drop["subject"], drop["kept_with"]) for drop in removed_conflicts] == [
+        ("B-G01", "A-G01"), ("D-G01", "C-G01"),
+    ]
+    assert alternative_sessions_used == []
+
+
+def test_all_subjects_dropped_is_rejected():
+    subjects = [subject("A-G01", "T2", "07:00", "09:00")]
+    input = ScheduleInput(subjects=subjects)
+    entries = build_schedule_entries(input)
+    # Chỉ 1 môn thì không thể trùng: giả lập select_sections loại hết
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(main, "select_sections", lambda candidates, *args, **kwargs: ([None] * len(entries), {}))
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(_resolve_conflicts(input, section_index([])))
+    assert error.value.status_code == 400
+
+
+def test_falls_back_to_best_found_when_budget_runs_out(monkeypatch):
+    calls = []
+
+    def recording_select_sections(*args, **kwargs):
+        chosen, stats = select_sections(*args, **kwargs)
+        calls.append((kwargs, stats))
+        return chosen, stats
+
+    monkeypatch.setattr(main, "select_sections", recording_select_sections)
+    rng = random.Random(7)
+    subjects, courses = random_instance(rng, 40)
+
+    started_at = time.perf_counter()
+    active_entries, removed_conflicts, _ = resolve(subjects, courses)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+    (kwargs, stats), = calls
+    assert "max_ms" not in kwargs  # Dùng ngân sách mặc định DEFAULT_SELECTION_MAX_MS
+    assert stats["optimal"] is False
+    assert elapsed_ms < DEFAULT_SELECTION_MAX_MS * 5
+    # Lời giải tốt nhất đã tìm được vẫn hợp lệ: không trùng lịch, mọi môn hoặc được giữ hoặc được báo bị loại
+    assert not find_conflicts(active_entries)
+    assert len(active_entries) + len(removed_conflicts) == len(subjects)
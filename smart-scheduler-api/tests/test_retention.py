@@ -0,0 +1,132 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from db import retention
+from db.retention import ChatRetention
+
+
+def matches(document, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+            continue
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeQuery:
+    def __init__(self, collection, query):
+        self.collection, self.query, self._limit = collection, query, None
+
+    def sort(self, field):
+        self.field = field
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def project(self, model):
+        return self
+
+    def _matching(self):
+        found = [d for d in self.collection.documents.values() if matches(d, self.query)]
+        found.sort(key=lambda d: d["created_at"])
+        return found[:self._limit] if self._limit else found
+
+    async def to_list(self):
+        await asyncio.sleep(0)  # Nhường cho worker khác như 1 lần gọi DB thật
+        return [Message(d) for d in self._matching()]
+
+    async def update(self, update):
+        await asyncio.sleep(0)
+        for document in self._matching():  # Mỗi document được cập nhật nguyên tử
+            document.update(update["$set"])
+
+    async def delete(self):
+        await asyncio.sleep(0)
+        for document in self._matching():
+            del self.collection.documents[document["_id"]]
+
+
+class Message(SimpleNamespace):
+    def __init__(self, document):
+        super().__init__(id=document["_id"], message=document["message"], created_at=document["created_at"])
+
+    def model_dump(self, mode=None):
+        return {"id": str(self.id), "message": self.message, "created_at": self.created_at.isoformat()}
+
+
+class FakeChatHistory:
+    def __init__(self, count, age_days):
+        now = datetime.now()
+        self.documents = {}
+        for i in range(count):
+            _id = uuid4()
+            self.documents[_id] = {"_id": _id, "message": f"tin {i}",
+                                   "created_at": now - timedelta(days=age_days, minutes=i)}
+
+    def find(self, query):
+        return FakeQuery(self, query)
+
+
+def archived_messages(archive_dir):
+    rows = []
+    for path in archive_dir.glob("*.jsonl.gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows += [json.loads(line)["message"] for line in f]
+    return rows
+
+
+def test_concurrent_workers_archive_each_message_once(tmp_path, monkeypatch):
+    collection = FakeChatHistory(count=250, age_days=400)
+    monkeypatch.setattr(retention, "ChatHistory", collection)
+    workers = [ChatRetention(retention_days=180, mode="archive", archive_dir=tmp_path / str(i), batch_size=40)
+               for i in range(3)]
+    for worker in workers:
+        worker.batch_pause_seconds = 0
+
+    async def scenario():
+        return await asyncio.gather(*(worker.run_once() for worker in workers))
+
+    runs = asyncio.run(scenario())
+    rows = archived_messages(tmp_path / "0") + archived_messages(tmp_path / "1") + archived_messages(tmp_path / "2")
+    assert sorted(rows) == sorted(f"tin {i}" for i in range(250))
+    assert sum(run["purged"] for run in runs) == 250
+    assert collection.documents == {}
+
+
+def test_stale_claim_is_taken_over(tmp_path, monkeypatch):
+    collection = FakeChatHistory(count=5, age_days=400)
+    for document in collection.documents.values():
+        document["retention_claim"] = "worker-đã-chết"
+        document["retention_claimed_at"] = datetime.now() - timedelta(minutes=retention.CLAIM_TIMEOUT_MINUTES + 1)
+    monkeypatch.setattr(retention, "ChatHistory", collection)
+
+    run = asyncio.run(ChatRetention(retention_days=180, mode="delete", archive_dir=tmp_path).run_once())
+    assert run["purged"] == 5 and collection.documents == {}
+
+
+def test_recent_messages_and_live_claims_are_kept(tmp_path, monkeypatch):
+    collection = FakeChatHistory(count=3, age_days=10)
+    old = FakeChatHistory(count=2, age_days=400)
+    for document in old.documents.values():
+        document["retention_claim"] = "worker-khác"
+        document["retention_claimed_at"] = datetime.now()
+    collection.documents.update(old.documents)
+    monkeypatch.setattr(retention, "ChatHistory", collection)
+
+    run = asyncio.run(ChatRetention(retention_days=180, mode="delete", archive_dir=tmp_path).run_once())
+    assert run["purged"] == 0 and len(collection.documents) == 5
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+import pytest
+
+from main import _section_slot
+
+
+@pytest.mark.parametrize("day, start_time, expected", [
+    ("T3", "07:00", "T3_Sáng"),
+    ("T3", "7:30", "T3_Sáng"),
+    ("T3", "9:00", "T3_Sáng"),
+    ("T4", "11:30", "T4_Sáng"),
+    ("T4", "12:30", "T4_Chiều"),
+    ("T5", "13:00", "T5_Chiều"),
+    ("T5", "17:00", "T5_Chiều"),
+    ("T6", "17:30", "T6_Tối"),
+    ("T6", "6:45", "T6_Tối"),
+    (None, "không rõ", "T2_Tối"),
+])
+def test_section_slot_compares_minutes(day, start_time, expected):
+    assert _section_slot({"data": SimpleNamespace(day=day, start_time=start_time)}) == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from genetic_algorithm.scheduler_ga import ScheduleGA
+from main import build_schedule_entries, build_solver_args
+from scripts.benchmark_scheduler import generate_instance
+
+
+def make_ga(num_subjects, flags, seed):
+    schedule_input = generate_instance(num_subjects, 15, flags, 0.4, seed=seed)
+    entries = build_schedule_entries(schedule_input)
+    names, time_slots, priorities, additional, details = build_solver_args(schedule_input, entries)
+    return ScheduleGA(names, time_slots, schedule_input.constraints, priorities, additional, details, seed=seed)
+
+
+def in_domains(ga, genes):
+    return all(slot_index in domain for slot_index, domain in zip(genes, ga.domains))
+
+
+@pytest.mark.parametrize("num_subjects", [5, 25, 60])
+@pytest.mark.parametrize("flags", ["none", "all"])
+@pytest.mark.parametrize("seed", range(3))
+def test_seeded_individuals_stay_in_domains(num_subjects, flags, seed):
+    ga = make_ga(num_subjects, flags, seed)
+    assert ga.is_reduced
+
+    seeded = ga.seed_individuals(100, 0.2)
+    assert len(seeded) == 20
+    assert all(len(genes) == num_subjects and in_domains(ga, genes) for genes in seeded)
+    # Môn cố định luôn ở slot duy nhất của nó
+    assert all(genes[i] == domain[0] for genes in seeded for i, domain in enumerate(ga.domains) if len(domain) == 1)
+
+    population = ga.create_population(50, seed_ratio=0.5)
+    assert all(in_domains(ga, genes) for genes in population.tolist())
+
+
+@pytest.mark.parametrize("flags", ["none", "all"])
+def test_greedy_individual_beats_random_start(flags):
+    ga = make_ga(25, flags, seed=1)
+    greedy = ga.greedy_individual()
+    assert in_domains(ga, greedy)
+    random_scores = ga.evaluate_population(ga.random_population(ga.rng, 100))
+    assert ga.calculate_fitness(greedy) <= random_scores.min()
+
+
+def test_seed_ratio_bounds():
+    ga = make_ga(10, "none", seed=0)
+    assert ga.seed_individuals(100, 0) == []
+    assert len(ga.seed_individuals(10, 1.0)) == 10
+    assert len(ga.seed_individuals(7, 0.5)) == 4
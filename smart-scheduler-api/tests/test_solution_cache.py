@@ -0,0 +1,20 @@
+from schemas import ScheduleInput
+from genetic_algorithm.solution_cache import SolutionCache
+
+
+def schedule_input(**overrides):
+    data = {"subjects": [], "available_time_slots": ["T2_Sáng"], "constraints": {"T2": ["Sáng", "Chiều"]}}
+    data.update(overrides)
+    return ScheduleInput(**data)
+
+
+def test_key_includes_time_budget():
+    assert SolutionCache.make_key(schedule_input(max_ms=200), 1) != SolutionCache.make_key(schedule_input(max_ms=5000), 1)
+    assert SolutionCache.make_key(schedule_input(max_ms=200), 1) == SolutionCache.make_key(schedule_input(max_ms=200), 1)
+
+
+def test_key_ignores_slot_order_in_constraints_and_cache_flags():
+    assert SolutionCache.make_key(schedule_input(use_cache=False), 1) == SolutionCache.make_key(
+        schedule_input(constraints={"T2": ["Chiều", "Sáng"]}), 1
+    )
+    assert SolutionCache.make_key(schedule_input(), 1) != SolutionCache.make_key(schedule_input(), 2)
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from genetic_algorithm.solve_executor import SolveExecutor
+
+
+class Broken(Exception):
+    pass
+
+
+def broken():
+    raise Broken()
+
+
+def test_failed_stream_setup_releases_queue_slot():
+    executor = SolveExecutor(max_workers=1, max_queue=1)
+    executor._get_manager = broken
+
+    async def consume():
+        async for _ in executor.solve_stream():
+            pass
+
+    for _ in range(3):
+        with pytest.raises(Broken):
+            asyncio.run(consume())
+    assert executor._pending == 0
+    assert executor.streams == {}
+
+
+def test_failed_solve_releases_queue_slot():
+    executor = SolveExecutor(max_workers=1, max_queue=1)
+    executor._get_pool = broken
+    for _ in range(3):
+        with pytest.raises(Broken):
+            asyncio.run(executor.solve())
+    assert executor._pending == 0
+
+
+def test_job_result_is_kept_in_memory_of_this_worker():
+    executor = SolveExecutor(max_workers=1, max_queue=2)
+
+    async def work():
+        return {"ok": True}
+
+    async def scenario():
+        job_id = executor.submit_job(work(), owner_id="u1")
+        await asyncio.gather(*executor._tasks)
+        return executor.get_job(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "done" and job["result"] == {"ok": True}
+    assert SolveExecutor(max_workers=1).get_job(job["job_id"]) is None
+
+
+def test_stream_can_only_be_stopped_on_the_worker_holding_it():
+    executor = SolveExecutor(max_workers=1, max_queue=2)
+    stop_event = asyncio.Event()
+    executor.streams["s1"] = {"owner_id": "u1", "stop_event": stop_event}
+
+    # Worker khác (process khác) không thấy stream: accept tới nhầm worker sẽ 404
+    assert not SolveExecutor(max_workers=1).stop_stream("s1", owner_id="u1")
+    assert not executor.stop_stream("s1", owner_id="u2")
+    assert not stop_event.is_set()
+    assert executor.stop_stream("s1", owner_id="u1")
+    assert stop_event.is_set()
@@ -0,0 +1,62 @@
+import pytest
+
+from genetic_algorithm.problem import CompiledProblem
+from genetic_algorithm.solvers import SOLVERS, select_solver
+from main import ALL_POSSIBLE_SLOTS
+
+# Môn cố định: học đúng 1 buổi (T2 sáng) nên miền chỉ còn 1 slot
+FIXED_DETAILS = {"days": ["T2"], "start_time": "07:00", "end_time": "09:00"}
+# Tối thứ 7 không rảnh (800 + 300 + 80): chênh lệch unary >= chi phí trùng lịch nên Hungarian không áp dụng
+HARD = {"unavailable_slots": ["T7_Tối"]}
+# Chênh lệch unary nhỏ (chỉ phạt buổi tối): gán không trùng bằng Hungarian là tối ưu
+EASY = {"allowSaturday": True}
+
+
+def make_problem(num_free, num_fixed=0, num_slots=21, **additional):
+    subjects = [f"Môn {i}" for i in range(num_free + num_fixed)]
+    details = {name: FIXED_DETAILS for name in subjects[num_free:]}
+    return CompiledProblem(subjects, ALL_POSSIBLE_SLOTS[:num_slots], {}, {}, additional, details)
+
+
+@pytest.mark.parametrize("problem_args, expected", [
+    # Mọi môn cố định
+    (dict(num_free=0, num_fixed=3), "fixed"),
+    # <= 10 môn tự do: exact (branch-and-bound), kể cả khi có ràng buộc nhiều gen hoặc nhiều môn cố định
+    (dict(num_free=1, **HARD), "exact"),
+    (dict(num_free=10, **HARD), "exact"),
+    (dict(num_free=10, avoidConsecutive=True, balanceDays=True, **HARD), "exact"),
+    (dict(num_free=6, num_fixed=14, **HARD), "exact"),
+    # Hungarian áp dụng được: exact với bất kỳ số môn nào
+    (dict(num_free=14, **EASY), "exact"),
+    (dict(num_free=20, **EASY), "exact"),
+    # 11-16 môn: tabu khi có avoidConsecutive/balanceDays, ngược lại annealing
+    (dict(num_free=11, **HARD), "annealing"),
+    (dict(num_free=16, **HARD), "annealing"),
+    (dict(num_free=14, avoidConsecutive=True, **EASY), "tabu"),
+    (dict(num_free=14, balanceDays=True, **HARD), "tabu"),
+    (dict(num_free=16, avoidConsecutive=True, balanceDays=True, **HARD), "tabu"),
+    # Nhiều môn hơn slot hoặc > 16 môn: GA
+    (dict(num_free=12, num_slots=11, **EASY), "ga"),
+    (dict(num_free=17, **HARD), "ga"),
+    (dict(num_free=17, avoidConsecutive=True, **EASY), "ga"),
+    (dict(num_free=60, balanceDays=True, **HARD), "ga"),
+])
+def test_select_solver_routing(problem_args, expected):
+    engine, params = select_solver(make_problem(**problem_args))
+    assert engine == expected
+    assert engine in SOLVERS
+    if engine == "tabu":
+        assert set(params) == {"iterations", "tenure"}
+    elif engine == "annealing":
+        assert set(params) == {"iterations"}
+
+
+def test_islands_is_never_selected_automatically():
+    assert "islands" in SOLVERS
+    engines = {
+        select_solver(make_problem(num_free, num_fixed, **additional))[0]
+        for num_free in range(0, 70, 3) for num_fixed in (0, 5)
+        for additional in (HARD, EASY, {"avoidConsecutive": True}, {"balanceDays": True})
+    }
+    assert "islands" not in engines
+    assert {"fixed", "exact", "annealing", "tabu", "ga"} <= engines
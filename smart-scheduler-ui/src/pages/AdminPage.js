@@ -37,7 +37,7 @@ function AdminPage() {
     setIsLoadingCourses(true);
     try {
       const response = await api.get('/api/courses', {
-        params: { semester, major: major || undefined },
+        params: { semester, major: major || undefined, all: true },
       });
       setCourses(response.data?.items || []);
       setError(null);
@@ -58,7 +58,7 @@ function AdminPage() {
     setIsLoadingUsers(true);
     setUsersError(null);
     try {
-      const response = await api.get('/api/admin/users');
+      const response = await api.get('/api/admin/users', { params: { all: true } });
       setUsers(response.data?.users || []);
     } catch (err) {
       console.error('Lỗi tải danh sách người dùng:', err);
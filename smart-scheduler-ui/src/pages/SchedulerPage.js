@@ -60,7 +60,7 @@ function ChatbotPage() {
 
   const loadChatHistory = async () => {
     try {
-      const response = await api.get('/api/chat/history', { params: { limit: 20 } });
+      const response = await api.get('/api/chat/history', { params: { all: true } });
       setChatHistory(response.data || []);
     } catch (error) {
       console.error('Lỗi tải lịch sử chat:', error);
@@ -82,7 +82,7 @@ function ChatbotPage() {
 
   const loadSession = async (sessionIdToLoad) => {
     try {
-      const response = await api.get('/api/chat/history', { params: { session_id: sessionIdToLoad } });
+      const response = await api.get('/api/chat/history', { params: { session_id: sessionIdToLoad, all: true } });
       if (response.data && response.data.length > 0) {
         const session = response.data[0];
         setMessages(session.messages || []);
@@ -346,7 +346,7 @@ function SchedulerForm({ onGenerate }) {
       
       setIsLoadingCourses(true);
       try {
-        const params = { semester: studyInfo.semester };
+        const params = { semester: studyInfo.semester, all: true };
         // Thêm filter theo chuyên ngành nếu có
         if (studyInfo.major && studyInfo.major.trim()) {
           params.major = studyInfo.major.trim();